@@ -8,6 +8,20 @@ from tensordict import TensorDict
 from metta.agent.lib.nn_layer_library import LayerBase
 
 
+def _unpack_tokens(x: torch.Tensor, segments: torch.Tensor, offsets: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+    """Pads packed [N, F] tokens out to [B_TT, M, F], where M is the longest sequence. Returns them with a [B_TT, M]
+    mask that is True for padding."""
+    counts = offsets[1:] - offsets[:-1]
+    B_TT = counts.shape[0]
+    M = max(int(counts.max()), 1) if B_TT > 0 else 1
+    positions = torch.arange(x.shape[0], device=x.device) - offsets[segments]
+    padded = x.new_zeros((B_TT, M, x.shape[-1]))
+    padded[segments, positions] = x
+    mask = torch.ones((B_TT, M), dtype=torch.bool, device=x.device)
+    mask[segments, positions] = False
+    return padded, mask
+
+
 class ObsLatentAttn(LayerBase):
     """
     Performs multi-layer cross-attention between learnable query tokens and input features.
@@ -50,7 +64,9 @@ class ObsLatentAttn(LayerBase):
 
     Input TensorDict:
         - `x_features` (from `self._sources[0]["name"]`): Tensor of shape `[B_TT, M, feat_dim]`
-          containing the input features.
+          containing the input features, or `[N, feat_dim]` packed tokens from a packed `ObsTokenPadStrip`.
+          Packed tokens are normalized and projected as they are, then padded out to the longest sequence and
+          masked for attention, so `use_mask` has no effect.
         - `obs_mask` (optional, if `use_mask` is True): Tensor of shape `[B_TT, M]` indicating
           elements to be masked (True for masked).
         - `_BxTT_`: Batch-time dimension.
@@ -150,9 +166,6 @@ class ObsLatentAttn(LayerBase):
 
     def _forward(self, td: TensorDict) -> TensorDict:
         x_features = td[self._sources[0]["name"]]
-        key_mask = None
-        if self._use_mask:
-            key_mask = td["obs_mask"]
         B_TT = td["_BxTT_"]
 
         queries = self._q_token.expand(B_TT, -1, -1)
@@ -161,6 +174,18 @@ class ObsLatentAttn(LayerBase):
         k_p = self.k_proj(kv_norm)
         v_p = self.v_proj(kv_norm)
 
+        if x_features.dim() == 2:
+            # Packed tokens are only padded back out here, once they are projected. Scoring them one token at a time
+            # runs many tiny matmuls, which is slower than attending over the padding.
+            kv_p, key_mask = _unpack_tokens(
+                torch.cat([k_p, v_p], dim=-1), td["obs_token_segments"], td["obs_token_offsets"]
+            )
+            k_p, v_p = kv_p.split([self._qk_dim, self._v_dim], dim=-1)
+        elif self._use_mask:
+            key_mask = td["obs_mask"]
+        else:
+            key_mask = None
+
         k_p = einops.rearrange(k_p, "b m (h d) -> b h m d", h=self._num_heads)
         v_p = einops.rearrange(v_p, "b m (h d) -> b h m d", h=self._num_heads)
 
@@ -187,11 +212,15 @@ class ObsLatentAttn(LayerBase):
             queries = queries_res + attn_output
 
             # MLP block
-            queries_res = queries
-            queries_norm = layer["norm2"](queries)
-            mlp_output = layer["mlp"](queries_norm)
-            queries = queries_res + mlp_output
+            queries = self._mlp_block(layer, queries)
+
+        return self._output(td, queries)
 
+    def _mlp_block(self, layer: nn.ModuleDict, queries: torch.Tensor) -> torch.Tensor:
+        queries_norm = layer["norm2"](queries)
+        return queries + layer["mlp"](queries_norm)
+
+    def _output(self, td: TensorDict, queries: torch.Tensor) -> TensorDict:
         x = self.final_norm(queries)
         x = self.output_proj(x)
 
@@ -260,12 +289,17 @@ class ObsSelfAttn(LayerBase):
 
     def _forward(self, td: TensorDict) -> TensorDict:
         x_features = td[self._sources[0]["name"]]
+        key_mask = None
+        if x_features.dim() == 2:
+            # Packed tokens are padded back out to the longest sequence, which is what the unpacked path attends over.
+            x_features, key_mask = _unpack_tokens(x_features, td["obs_token_segments"], td["obs_token_offsets"])
+        elif self._use_mask:
+            key_mask = td["obs_mask"]  # True for elements to be masked
+
         if self._use_cls_token:
             x_features = torch.cat([self._cls_token.expand(x_features.shape[0], -1, -1), x_features], dim=1)
 
-        key_mask = None
-        if self._use_mask:
-            key_mask = td["obs_mask"]  # True for elements to be masked
+        if key_mask is not None:
             if self._use_cls_token:
                 key_mask = torch.cat([torch.zeros(key_mask.shape[0], 1, device=key_mask.device), key_mask], dim=1)
 
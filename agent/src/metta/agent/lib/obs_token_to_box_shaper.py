@@ -25,6 +25,31 @@ class ObsTokenToBoxShaper(LayerBase):
         self.num_layers = max(feature_normalizations.keys()) + 1
         self._out_tensor_shape = [self.num_layers, self.out_width, self.out_height]
 
+    def __getstate__(self):
+        # The scatter buffers are only a cache, so keep them out of saved policies.
+        state = self.__dict__.copy()
+        state.pop("_scatter_cache", None)
+        return state
+
+    def _scatter_buffers(self, B_TT: int, device: torch.device, reuse: bool) -> tuple[torch.Tensor, torch.Tensor]:
+        """Returns a zeroed flat box buffer with one trailing sacrificial cell, and each row's offset into it."""
+        cells_per_row = self.num_layers * self.out_width * self.out_height
+        cache = self.__dict__.setdefault("_scatter_cache", {})
+        key = (B_TT, device)
+        if cache.get("key") != key:
+            cache.clear()
+            cache["key"] = key
+            cache["row_offsets"] = (torch.arange(B_TT, device=device) * cells_per_row).unsqueeze(-1)
+            cache["box"] = None
+
+        if not reuse:
+            box = torch.zeros(B_TT * cells_per_row + 1, dtype=torch.float32, device=device)
+        elif cache["box"] is None:
+            box = cache["box"] = torch.zeros(B_TT * cells_per_row + 1, dtype=torch.float32, device=device)
+        else:
+            box = cache["box"].zero_()
+        return box, cache["row_offsets"]
+
     def _forward(self, td: TensorDict):
         token_observations = td["x"]
 
@@ -47,22 +72,27 @@ class ObsTokenToBoxShaper(LayerBase):
         atr_values = token_observations[..., 2].float()  # Shape: [B_TT, M]
 
         # In ObservationShaper we permute. Here, we create the observations pre-permuted.
-        # We'd like to pre-create this as part of initialization, but we don't know the batch size or time steps at
-        # that point.
-        box_obs = torch.zeros(
-            (B * TT, self.num_layers, self.out_width, self.out_height),
-            dtype=atr_values.dtype,
-            device=token_observations.device,
+        # Inference runs with a constant batch shape, so its box is reused from call to call. With autograd on, the
+        # previous box may still be needed for a backward pass, so a fresh one is allocated.
+        box_flat, row_offsets = self._scatter_buffers(
+            B * TT, token_observations.device, reuse=not torch.is_grad_enabled()
         )
-        batch_indices = torch.arange(B * TT, device=token_observations.device).unsqueeze(-1).expand_as(atr_values)
-
-        valid_tokens = coords_byte != 0xFF
-        box_obs[
-            batch_indices[valid_tokens],
-            atr_indices[valid_tokens],
-            x_coord_indices[valid_tokens],
-            y_coord_indices[valid_tokens],
-        ] = atr_values[valid_tokens]
+
+        # Rather than compacting out the empty tokens, send them (and anything out of range) to the sacrificial cell
+        # at the end of the buffer, so every token is scattered with the same flat index computation.
+        cell_indices = (atr_indices * self.out_width + x_coord_indices) * self.out_height + y_coord_indices
+        cell_indices = cell_indices + row_offsets
+        valid_tokens = (
+            (coords_byte != 0xFF)
+            & (atr_indices < self.num_layers)
+            & (x_coord_indices < self.out_width)
+            & (y_coord_indices < self.out_height)
+        )
+        sacrificial_cell = box_flat.shape[0] - 1
+        cell_indices = torch.where(valid_tokens, cell_indices, sacrificial_cell)
+        box_flat[cell_indices.flatten()] = atr_values.flatten()
+
+        box_obs = box_flat[:sacrificial_cell].view(B * TT, self.num_layers, self.out_width, self.out_height)
 
         td["_TT_"] = TT
         td["_batch_size_"] = B
@@ -18,16 +18,24 @@ class ObsTokenPadStrip(LayerBase):
     eliminates the padding tokens from the the sequence with the fewest padding tokens and also removes that number of
     padding tokens from all other sequences. In practice, the sequence with the most dense tokens can have many more
     dense tokens than the average sequence so there is room for improvement by computing attention over ragged tensors.
+
+    With packed=True it strips all padding instead, returning the dense tokens of every sequence concatenated into one
+    tensor of shape [N, 3]. It adds "obs_token_segments" ([N], the sequence each token came from) and
+    "obs_token_offsets" ([B_TT + 1], where each sequence starts in the packed tensor) for downstream layers. The
+    tokenizer layers work on packed tokens unchanged, and the encoders in obs_enc.py recognize them by their 2-D shape
+    and pool them back into one row per sequence.
     """
 
     def __init__(
         self,
         obs_shape: Tuple[int, ...],
+        packed: bool = False,
         **cfg,
     ) -> None:
         super().__init__(**cfg)
         self._obs_shape = obs_shape
         self._M = obs_shape[0]
+        self._packed = packed
         # Initialize feature remapping as identity by default
         self.register_buffer("feature_id_remap", torch.arange(256, dtype=torch.uint8))
         self._remapping_active = False
@@ -49,6 +57,13 @@ class ObsTokenPadStrip(LayerBase):
         identity = torch.arange(256, dtype=torch.uint8, device=self.feature_id_remap.device)
         self._remapping_active = not torch.equal(self.feature_id_remap, identity)
 
+    def _remap_features(self, stripped: torch.Tensor) -> torch.Tensor:
+        # Stripping always copies (boolean indexing), so the copy can be remapped in place. Remapping after stripping
+        # also means only the kept tokens are looked up.
+        if self._remapping_active:
+            stripped[..., 1] = self.feature_id_remap[stripped[..., 1].long()]
+        return stripped
+
     def _forward(self, td: TensorDict) -> TensorDict:
         # [B, M, 3] the 3 vector is: coord (unit8), attr_idx, attr_val
         observations = td["x"]
@@ -63,16 +78,18 @@ class ObsTokenPadStrip(LayerBase):
             observations = einops.rearrange(observations, "b t h c -> (b t) h c")
         td["_BxTT_"] = B * TT
 
-        # Apply feature remapping if active
-        if self._remapping_active:
-            observations = observations.clone()
-            feature_ids = observations[..., 1].long()
-            remapped_ids = self.feature_id_remap[feature_ids]
-            observations[..., 1] = remapped_ids
-
         coords = observations[..., 0]
         obs_mask = coords == 255  # important! true means mask me
 
+        if self._packed:
+            segments, positions = (~obs_mask).nonzero(as_tuple=True)
+            offsets = torch.zeros(B * TT + 1, dtype=torch.long, device=obs_mask.device)
+            offsets[1:] = torch.cumsum((~obs_mask).sum(dim=1), dim=0)
+            td[self._name] = self._remap_features(observations[segments, positions])  # shape [N, 3]
+            td["obs_token_segments"] = segments
+            td["obs_token_offsets"] = offsets
+            return td
+
         # find each row's flip‐point ie when it goes from dense to padding
         flip_pts = obs_mask.int().argmax(dim=1)  # shape [B]
 
@@ -90,7 +107,7 @@ class ObsTokenPadStrip(LayerBase):
         observations = observations[:, keep_cols]  # shape [B, max_flip]
         obs_mask = obs_mask[:, keep_cols]
 
-        td[self._name] = observations
+        td[self._name] = self._remap_features(observations)
         td["obs_mask"] = obs_mask
         return td
 
@@ -122,15 +139,41 @@ class ObsAttrValNorm(LayerBase):
         self.register_buffer("_norm_factors", norm_tensor)
         return None
 
+    def __getstate__(self):
+        # The output buffer is only a cache, so keep it out of saved policies.
+        state = self.__dict__.copy()
+        state.pop("_output_buffer", None)
+        return state
+
+    def _output_like(self, observations: torch.Tensor) -> torch.Tensor:
+        """Returns an uninitialized tensor with the shape, dtype and device of `observations`."""
+        if torch.is_grad_enabled():
+            # The previous output may still be needed for a backward pass
+            return torch.empty_like(observations)
+        # The token count changes from batch to batch, so inference keeps one flat buffer, grown to the largest batch
+        # seen, and views its front.
+        numel = observations.numel()
+        buffer = self.__dict__.get("_output_buffer")
+        if (
+            buffer is None
+            or buffer.numel() < numel
+            or buffer.dtype != observations.dtype
+            or buffer.device != observations.device
+        ):
+            buffer = self.__dict__["_output_buffer"] = torch.empty(
+                numel, dtype=observations.dtype, device=observations.device
+            )
+        return buffer[:numel].view(observations.shape)
+
     def _forward(self, td: TensorDict) -> TensorDict:
         observations = td[self._sources[0]["name"]]
 
-        attr_indices = observations[..., 1].long()
-        norm_factors = self._norm_factors[attr_indices]
-        observations = observations.clone()
-        observations[..., 2] = observations[..., 2] / norm_factors
+        # Write straight into the output rather than cloning the input and then overwriting its values column.
+        normalized = self._output_like(observations)
+        normalized[..., :2] = observations[..., :2]
+        normalized[..., 2] = observations[..., 2] / self._norm_factors[observations[..., 1].long()]
 
-        td[self._name] = observations
+        td[self._name] = normalized
         return td
 
 
@@ -251,9 +294,8 @@ class ObsAttrEmbedFourier(LayerBase):
         x_coords_norm = x_coords_norm.unsqueeze(-1)  # [B_TT, M, 1]
         y_coords_norm = y_coords_norm.unsqueeze(-1)  # [B_TT, M, 1]
 
-        # Get frequencies and reshape for broadcasting
-        # self.frequencies is [f], reshape to [1, 1, f]
-        frequencies = self.get_buffer("frequencies").view(1, 1, -1)
+        # Get frequencies, [f], which broadcast against the trailing dim of the coords (packed tokens have no M dim)
+        frequencies = self.get_buffer("frequencies")
 
         # Compute scaled coordinates for Fourier features
         x_scaled = x_coords_norm * frequencies
@@ -7,13 +7,20 @@ It provides functionality to:
 - Track policy metadata and versioning
 
 The PolicyStore is used by the training system to manage opponent policies and checkpoints.
+
+Checkpoints are saved as a .pt file (the pickled PolicyRecord, in torch's zip format) with a small JSON sidecar next to
+it holding the record's metadata. Listing and selecting checkpoints only reads the sidecars, and loading a policy
+memory-maps the .pt file, so tensors are only paged in as they're used. Checkpoints without a sidecar (or whose .pt
+changed since it was written) are read from the .pt file as before.
 """
 
 import collections
+import json
 import logging
 import os
 import random
 import sys
+import zipfile
 from types import SimpleNamespace
 from typing import Any, List, Optional, Union
 
@@ -33,6 +40,13 @@ from metta.rl.trainer_config import TrainerConfig, create_trainer_config
 
 logger = logging.getLogger("policy_store")
 
+SIDECAR_FORMAT_VERSION = 1
+
+
+def sidecar_path(path: str) -> str:
+    """The metadata sidecar for the checkpoint at `path`, e.g. model_0001.pt -> model_0001.json."""
+    return os.path.splitext(path)[0] + ".json"
+
 
 class PolicySelectorConfig:
     """Simple config class for policy selection without pydantic dependency."""
@@ -51,6 +65,18 @@ class PolicyStore:
         self._cached_prs = PolicyCache(max_size=cache_size)
         self._made_codebase_backwards_compatible = False
 
+    def __getstate__(self) -> dict[str, Any]:
+        # Copies sent to worker processes (e.g. by a parallel SimulationSuite) leave the wandb run with the process
+        # that owns it, and start with an empty cache
+        state = self.__dict__.copy()
+        state["_wandb_run"] = None
+        del state["_cached_prs"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._cached_prs = PolicyCache(max_size=self._cfg.get("policy_cache_size", 10))
+
     def policy_record(
         self, uri_or_config: Union[str, DictConfig], selector_type: str = "top", metric="score"
     ) -> PolicyRecord:
@@ -241,6 +267,8 @@ class PolicyStore:
                 except OSError:
                     pass
 
+        self._write_sidecar(pr, path)
+
         # Don't cache the policy that we just saved,
         # since it might be updated later. We always
         # load the policy from the file when needed.
@@ -248,6 +276,57 @@ class PolicyStore:
         self._cached_prs.put(path, pr)
         return pr
 
+    def _write_sidecar(self, pr: PolicyRecord, path: str) -> None:
+        """Write the metadata sidecar for a just-saved checkpoint. It records the checkpoint's size and mtime, so a
+        sidecar that's older than its checkpoint is ignored."""
+        metadata = dict(pr.metadata)
+        try:
+            encoded_metadata = json.dumps(metadata)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not writing a metadata sidecar for {path}, its metadata isn't JSON serializable: {e}")
+            return
+        if json.loads(encoded_metadata) != metadata:
+            # e.g. non-string dict keys, which JSON would turn into strings
+            logger.warning(f"Not writing a metadata sidecar for {path}, its metadata doesn't round-trip through JSON")
+            return
+
+        stat = os.stat(path)
+        sidecar = {
+            "format_version": SIDECAR_FORMAT_VERSION,
+            "run_name": pr.run_name,
+            "policy_class": type(pr._cached_policy).__name__ if pr._cached_policy is not None else None,
+            "checkpoint_size": stat.st_size,
+            "checkpoint_mtime_ns": stat.st_mtime_ns,
+            "metadata": metadata,
+        }
+        temp_path = sidecar_path(path) + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(sidecar, f)
+            os.replace(temp_path, sidecar_path(path))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _load_from_sidecar(self, path: str) -> PolicyRecord | None:
+        """A metadata-only PolicyRecord from the checkpoint's sidecar, or None if it has no up-to-date sidecar."""
+        try:
+            with open(sidecar_path(path)) as f:
+                sidecar = json.load(f)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            sidecar.get("format_version") != SIDECAR_FORMAT_VERSION
+            or sidecar.get("checkpoint_size") != stat.st_size
+            or sidecar.get("checkpoint_mtime_ns") != stat.st_mtime_ns
+        ):
+            logger.info(f"Ignoring stale metadata sidecar for {path}")
+            return None
+
+        return PolicyRecord(self, sidecar["run_name"], f"file://{path}", PolicyMetadata(**sidecar["metadata"]))
+
     def add_to_wandb_run(self, run_id: str, pr: PolicyRecord, additional_files: list[str] | None = None) -> str:
         return self.add_to_wandb_artifact(run_id, "model", pr.metadata, pr.file_path, additional_files)
 
@@ -398,17 +477,25 @@ class PolicyStore:
                 return cached_pr
 
         if not path.endswith(".pt") and os.path.isdir(path):
-            path = os.path.join(path, os.listdir(path)[-1])
-
-        logger.info(f"Loading policy from {path}")
+            path = os.path.join(path, sorted(p for p in os.listdir(path) if p.endswith(".pt"))[-1])
 
         assert path.endswith(".pt"), f"Policy file {path} does not have a .pt extension"
 
+        if metadata_only:
+            pr = self._load_from_sidecar(path)
+            if pr is not None:
+                self._cached_prs.put(path, pr)
+                return pr
+
+        logger.info(f"Loading policy from {path}")
+
         # Make codebase backwards compatible before loading
         self._make_codebase_backwards_compatible()
 
-        # Load checkpoint - could be PolicyRecord or legacy format
-        checkpoint = torch.load(path, map_location=self._device, weights_only=False)
+        # Load checkpoint - could be PolicyRecord or legacy format. Memory-mapping means only the tensors that are
+        # actually used get read, but it needs torch's zip format, which very old checkpoints predate.
+        mmap = zipfile.is_zipfile(path)
+        checkpoint = torch.load(path, map_location=self._device, weights_only=False, mmap=mmap)
 
         if isinstance(checkpoint, PolicyRecord):
             # New format - PolicyRecord object
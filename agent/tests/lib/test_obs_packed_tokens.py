@@ -0,0 +1,113 @@
+import pytest
+import torch
+from tensordict import TensorDict
+
+from metta.agent.lib.obs_enc import ObsLatentAttn, ObsSelfAttn
+from metta.agent.lib.obs_tokenizers import ObsAttrEmbedFourier, ObsTokenPadStrip
+
+
+def make_observations(token_counts: list[int], num_tokens: int = 8) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(0)
+    observations = torch.full((len(token_counts), num_tokens, 3), 0xFF, dtype=torch.uint8)
+    for row, count in enumerate(token_counts):
+        coords = torch.randint(0, 0xAA, (count,), generator=generator, dtype=torch.uint8)
+        observations[row, :count, 0] = coords
+        observations[row, :count, 1] = torch.randint(0, 10, (count,), generator=generator, dtype=torch.uint8)
+        observations[row, :count, 2] = torch.randint(0, 5, (count,), generator=generator, dtype=torch.uint8)
+    return observations
+
+
+def build_encoder(packed: bool, encoder: torch.nn.Module) -> list[torch.nn.Module]:
+    pad_strip = ObsTokenPadStrip(obs_shape=(8, 3), packed=packed, name="_obs_")
+    fourier = ObsAttrEmbedFourier(attr_embed_dim=6, num_freqs=2, name="obs_fourier", sources=[{"name": "_obs_"}])
+    pad_strip.setup()
+    fourier.setup({"_obs_": pad_strip})
+    encoder.setup({"obs_fourier": fourier})
+    return [pad_strip, fourier, encoder]
+
+
+def run(layers: list[torch.nn.Module], observations: torch.Tensor) -> TensorDict:
+    td = TensorDict({"x": observations})
+    for layer in layers:
+        layer._forward(td)
+    return td
+
+
+def test_pad_strip_packs_dense_tokens():
+    observations = make_observations([3, 1, 0, 5])
+    pad_strip = ObsTokenPadStrip(obs_shape=(8, 3), packed=True, name="_obs_")
+    pad_strip.setup()
+    td = run([pad_strip], observations)
+
+    assert td["_obs_"].shape == (9, 3)
+    assert td["obs_token_offsets"].tolist() == [0, 3, 4, 4, 9]
+    assert td["obs_token_segments"].tolist() == [0, 0, 0, 1, 3, 3, 3, 3, 3]
+    assert torch.equal(td["_obs_"][4:], observations[3, :5])
+
+
+def assert_packed_matches_padded(make_encoder):
+    observations = make_observations([3, 1, 7, 5])
+    padded_layers = build_encoder(False, make_encoder())
+    packed_layers = build_encoder(True, make_encoder())
+    for packed_layer, padded_layer in zip(packed_layers, padded_layers, strict=True):
+        packed_layer.load_state_dict(padded_layer.state_dict())
+
+    padded = run(padded_layers, observations)["attn"]
+    packed = run(packed_layers, observations)["attn"]
+    torch.testing.assert_close(packed, padded)
+    return packed
+
+
+def test_latent_attn_packed_matches_padded():
+    def make_encoder():
+        return ObsLatentAttn(
+            out_dim=12,
+            use_mask=True,
+            num_query_tokens=2,
+            num_heads=2,
+            num_layers=2,
+            query_token_dim=8,
+            name="attn",
+            sources=[{"name": "obs_fourier"}],
+        )
+
+    assert assert_packed_matches_padded(make_encoder).shape == (4, 2, 12)
+
+
+def test_self_attn_accepts_packed_tokens():
+    def make_encoder():
+        return ObsSelfAttn(
+            out_dim=14, use_mask=True, use_cls_token=True, name="attn", sources=[{"name": "obs_fourier"}]
+        )
+
+    assert assert_packed_matches_padded(make_encoder).shape == (4, 14)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_latent_attn_forward_backward_performance(benchmark, packed):
+    """Rows hold 20-80 tokens out of 200, plus one nearly full row, so most of the padded batch is padding."""
+    generator = torch.Generator().manual_seed(0)
+    token_counts = torch.randint(20, 80, (1024,), generator=generator).tolist()
+    token_counts[0] = 199
+    observations = make_observations(token_counts, num_tokens=200)
+
+    pad_strip = ObsTokenPadStrip(obs_shape=(200, 3), packed=packed, name="_obs_")
+    fourier = ObsAttrEmbedFourier(attr_embed_dim=12, num_freqs=6, name="obs_fourier", sources=[{"name": "_obs_"}])
+    encoder = ObsLatentAttn(
+        out_dim=32,
+        use_mask=True,
+        num_query_tokens=10,
+        num_heads=8,
+        num_layers=3,
+        query_token_dim=32,
+        name="attn",
+        sources=[{"name": "obs_fourier"}],
+    )
+    pad_strip.setup()
+    fourier.setup({"_obs_": pad_strip})
+    encoder.setup({"obs_fourier": fourier})
+
+    def forward_backward():
+        run([pad_strip, fourier, encoder], observations)["attn"].sum().backward()
+
+    benchmark.pedantic(forward_backward, rounds=5, warmup_rounds=1)
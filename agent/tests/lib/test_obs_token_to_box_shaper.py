@@ -76,3 +76,66 @@ def test_obs_token_to_box_shaper_forward():
     assert output_td["_batch_size_"] == batch_size
     assert output_td["_TT_"] == 1
     assert output_td["_BxTT_"] == batch_size
+
+
+def reference_box_obs(token_observations, num_layers, obs_width, obs_height):
+    """The scatter through boolean-compacted indices that the shaper used to do."""
+    coords_byte = token_observations[..., 0]
+    x_coord_indices = ((coords_byte >> 4) & 0x0F).long()
+    y_coord_indices = (coords_byte & 0x0F).long()
+    atr_indices = token_observations[..., 1].long()
+    atr_values = token_observations[..., 2].float()
+    box_obs = torch.zeros((token_observations.shape[0], num_layers, obs_width, obs_height))
+    batch_indices = torch.arange(token_observations.shape[0]).unsqueeze(-1).expand_as(atr_values)
+    valid_tokens = coords_byte != 0xFF
+    box_obs[
+        batch_indices[valid_tokens],
+        atr_indices[valid_tokens],
+        x_coord_indices[valid_tokens],
+        y_coord_indices[valid_tokens],
+    ] = atr_values[valid_tokens]
+    return box_obs
+
+
+def random_tokens(batch_size, num_tokens, num_layers, generator):
+    x = torch.randint(0, 11, (batch_size, num_tokens), generator=generator)
+    y = torch.randint(0, 11, (batch_size, num_tokens), generator=generator)
+    tokens = torch.stack(
+        [
+            (x << 4) | y,
+            torch.randint(0, num_layers, (batch_size, num_tokens), generator=generator),
+            torch.randint(1, 256, (batch_size, num_tokens), generator=generator),
+        ],
+        dim=-1,
+    ).to(torch.uint8)
+    # Pad each row's tail
+    for row, num_dense in enumerate(torch.randint(0, num_tokens + 1, (batch_size,), generator=generator).tolist()):
+        tokens[row, num_dense:] = 0xFF
+    return tokens
+
+
+def test_obs_token_to_box_shaper_reuses_buffers_without_changing_outputs():
+    feature_normalizations = {i: 1 for i in range(5)}
+    shaper = ObsTokenToBoxShaper(
+        obs_shape=(20, 3), obs_width=11, obs_height=11, feature_normalizations=feature_normalizations
+    )
+    shaper._name = "box"
+    generator = torch.Generator().manual_seed(0)
+
+    with torch.no_grad():
+        previous = None
+        for _ in range(3):
+            tokens = random_tokens(4, 20, 5, generator)
+            box_obs = shaper._forward(TensorDict({"x": tokens}))["box"]
+            assert torch.equal(box_obs, reference_box_obs(tokens, 5, 11, 11))
+            if previous is not None:
+                # Inference reuses the same storage from call to call
+                assert box_obs.data_ptr() == previous.data_ptr()
+            previous = box_obs
+
+    # With autograd on, each call gets its own box
+    tokens = random_tokens(4, 20, 5, generator)
+    first = shaper._forward(TensorDict({"x": tokens}))["box"]
+    second = shaper._forward(TensorDict({"x": tokens}))["box"]
+    assert first.data_ptr() != second.data_ptr()
+    assert torch.equal(first, reference_box_obs(tokens, 5, 11, 11))
@@ -7,7 +7,7 @@ import torch
 import torch.nn as nn
 from tensordict import TensorDict
 
-from metta.agent.lib.obs_tokenizers import ObsTokenPadStrip
+from metta.agent.lib.obs_tokenizers import ObsAttrValNorm, ObsTokenPadStrip
 from metta.agent.metta_agent import MettaAgent
 from metta.agent.policy_metadata import PolicyMetadata
 from metta.agent.policy_record import PolicyRecord
@@ -114,6 +114,67 @@ def test_obs_token_pad_strip_remapping():
     assert remapped_obs[0, 1, 2] == 20
 
 
+def test_remapped_tokens_are_normalized_by_original_id():
+    """Test that remapping doesn't modify the input, and normalization uses the remapped (original) IDs."""
+    pad_strip = ObsTokenPadStrip(obs_shape=(3, 3), name="_obs_")
+    pad_strip.setup()
+    remap_table = torch.arange(256, dtype=torch.uint8)
+    remap_table[3] = 1
+    pad_strip.update_feature_remapping(remap_table)
+
+    normalizer = ObsAttrValNorm(feature_normalizations=[1.0, 10.0], name="norm", sources=[{"name": "_obs_"}])
+    normalizer.setup({"_obs_": pad_strip})
+
+    observations = torch.tensor(
+        [[[0x12, 3, 40], [0x34, 0, 7], [0xFF, 0xFF, 0xFF]]],
+        dtype=torch.uint8,
+    )
+    original = observations.clone()
+    td = TensorDict({"x": observations})
+    pad_strip._forward(td)
+    normalizer._forward(td)
+
+    assert torch.equal(observations, original)
+    assert td["_obs_"][0, :, 1].tolist() == [1, 0]
+    assert td["norm"][0, :, 1].tolist() == [1, 0]
+    # Values keep the observation dtype: 40 / 10 and 7 / 1
+    assert td["norm"][0, :, 2].tolist() == [4, 7]
+    assert torch.equal(td["norm"][..., 0], td["_obs_"][..., 0])
+
+
+def test_normalizer_reuses_its_output_buffer_without_changing_outputs():
+    """Test that inference reuses the normalizer's output storage across token counts, and training doesn't."""
+    normalizer = ObsAttrValNorm(feature_normalizations=[1.0, 10.0, 4.0], name="norm", sources=[{"name": "_obs_"}])
+    pad_strip = ObsTokenPadStrip(obs_shape=(5, 3), name="_obs_")
+    pad_strip.setup()
+    normalizer.setup({"_obs_": pad_strip})
+    generator = torch.Generator().manual_seed(0)
+
+    def tokens(num_tokens):
+        return torch.randint(0, 3, (2, num_tokens, 3), generator=generator).to(torch.uint8) * 20
+
+    def expected(observations):
+        normalized = observations.clone()
+        normalized[..., 2] = observations[..., 2] / normalizer._norm_factors[observations[..., 1].long()]
+        return normalized
+
+    with torch.no_grad():
+        previous = None
+        for num_tokens in [5, 3, 5]:
+            observations = tokens(num_tokens)
+            normalized = normalizer._forward(TensorDict({"_obs_": observations}))["norm"]
+            assert torch.equal(normalized, expected(observations))
+            if previous is not None:
+                assert normalized.data_ptr() == previous.data_ptr()
+            previous = normalized
+
+    observations = tokens(5)
+    first = normalizer._forward(TensorDict({"_obs_": observations}))["norm"]
+    second = normalizer._forward(TensorDict({"_obs_": observations}))["norm"]
+    assert first.data_ptr() != second.data_ptr()
+    assert torch.equal(first, expected(observations))
+
+
 def test_feature_remapping_in_agent():
     """Test that feature remapping is correctly set up in MettaAgent."""
     agent = MockAgent()
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 """Test that PolicyStore can save/load policies"""
 
+import json
 import os
 import tempfile
+from unittest import mock
 
+import pytest
 import torch
 from omegaconf import OmegaConf
 
 from metta.agent.mocks import MockPolicy
 from metta.agent.policy_metadata import PolicyMetadata
 from metta.agent.policy_record import PolicyRecord
-from metta.agent.policy_store import PolicyStore
+from metta.agent.policy_store import PolicyStore, sidecar_path
 
 
 def test_policy_save_load_without_pydantic():
@@ -250,8 +253,136 @@ def test_policy_record_backwards_compatibility():
         print("✅ Correctly raised AttributeError when no metadata found")
 
 
+def test_policy_metadata_sidecar():
+    """Test that saving writes a metadata sidecar, and metadata-only loads read it instead of the checkpoint"""
+    cfg = OmegaConf.create(
+        {
+            "device": "cpu",
+            "run": "test_run",
+            "run_dir": tempfile.mkdtemp(),
+            "vectorization": "serial",
+            "trainer": {
+                "checkpoint": {"checkpoint_dir": tempfile.mkdtemp()},
+                "num_workers": 1,
+            },
+            "data_dir": tempfile.mkdtemp(),
+        }
+    )
+
+    policy_store = PolicyStore(cfg, wandb_run=None)
+    metadata = PolicyMetadata(action_names=["move", "turn"], agent_step=100, epoch=5, generation=1, train_time=60.0)
+
+    with tempfile.NamedTemporaryFile(suffix=".pt", delete=False) as f:
+        temp_path = f.name
+
+    try:
+        pr = policy_store.create_empty_policy_record(name=temp_path, override_path=temp_path)
+        pr.metadata = metadata
+        pr.policy = MockPolicy()
+        policy_store.save(pr)
+
+        with open(sidecar_path(temp_path)) as f:
+            sidecar = json.load(f)
+        assert sidecar["metadata"] == dict(metadata)
+        assert sidecar["policy_class"] == "MockPolicy"
+
+        # A fresh store lists the checkpoint without unpickling it
+        fresh_store = PolicyStore(cfg, wandb_run=None)
+        with mock.patch.object(torch, "load", side_effect=AssertionError("checkpoint was unpickled")):
+            listed_pr = fresh_store._load_from_file(temp_path, metadata_only=True)
+        assert listed_pr.metadata == metadata
+        assert listed_pr._cached_policy is None
+
+        # The policy itself still loads from the checkpoint
+        output = listed_pr.policy(torch.randn(1, 10))
+        assert output.shape == torch.Size([1, 10])
+
+        # A sidecar that no longer matches its checkpoint is ignored
+        sidecar["checkpoint_size"] += 1
+        sidecar["metadata"]["epoch"] = 999
+        with open(sidecar_path(temp_path), "w") as f:
+            json.dump(sidecar, f)
+        stale_store = PolicyStore(cfg, wandb_run=None)
+        assert stale_store._load_from_file(temp_path, metadata_only=True).metadata["epoch"] == 5
+
+    finally:
+        for path in [temp_path, sidecar_path(temp_path)]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_load_latest_checkpoint_from_directory():
+    """Test that loading a checkpoint directory picks its latest .pt file, not a metadata sidecar"""
+    cfg = OmegaConf.create(
+        {
+            "device": "cpu",
+            "run": "test_run",
+            "run_dir": tempfile.mkdtemp(),
+            "vectorization": "serial",
+            "trainer": {
+                "checkpoint": {"checkpoint_dir": tempfile.mkdtemp()},
+                "num_workers": 1,
+            },
+            "data_dir": tempfile.mkdtemp(),
+        }
+    )
+
+    policy_store = PolicyStore(cfg, wandb_run=None)
+    checkpoint_dir = tempfile.mkdtemp()
+    for epoch in [1, 2]:
+        path = os.path.join(checkpoint_dir, f"model_{epoch:04d}.pt")
+        pr = policy_store.create_empty_policy_record(name=path, override_path=path)
+        pr.metadata = PolicyMetadata(agent_step=100 * epoch, epoch=epoch, generation=1, train_time=60.0)
+        pr.policy = MockPolicy()
+        policy_store.save(pr)
+    # model_0002.json sorts after model_0002.pt
+    assert os.path.exists(os.path.join(checkpoint_dir, "model_0002.json"))
+
+    pr = PolicyStore(cfg, wandb_run=None)._load_from_file(checkpoint_dir, metadata_only=True)
+    assert pr.metadata["epoch"] == 2
+
+
+def test_load_legacy_checkpoint_without_mmap():
+    """Test that checkpoints in torch's pre-zip format load without mmap, and other load errors aren't retried"""
+    cfg = OmegaConf.create(
+        {
+            "device": "cpu",
+            "run": "test_run",
+            "run_dir": tempfile.mkdtemp(),
+            "vectorization": "serial",
+            "trainer": {
+                "checkpoint": {"checkpoint_dir": tempfile.mkdtemp()},
+                "num_workers": 1,
+            },
+            "data_dir": tempfile.mkdtemp(),
+        }
+    )
+
+    policy_store = PolicyStore(cfg, wandb_run=None)
+    checkpoint_dir = tempfile.mkdtemp()
+    path = os.path.join(checkpoint_dir, "model.pt")
+    pr = policy_store.create_empty_policy_record(name=path, override_path=path)
+    pr.metadata = PolicyMetadata(agent_step=100, epoch=1, generation=1, train_time=60.0)
+    pr.policy = MockPolicy()
+    policy_store.save(pr)
+
+    legacy_path = os.path.join(checkpoint_dir, "legacy.pt")
+    torch.save(torch.load(path, weights_only=False), legacy_path, _use_new_zipfile_serialization=False)
+    legacy_pr = PolicyStore(cfg, wandb_run=None)._load_from_file(legacy_path)
+    assert legacy_pr.policy(torch.randn(1, 10)).shape == torch.Size([1, 10])
+
+    with mock.patch.object(torch, "load", side_effect=RuntimeError("read failed")) as load:
+        with pytest.raises(RuntimeError, match="read failed"):
+            PolicyStore(cfg, wandb_run=None)._load_from_file(path)
+    assert load.call_count == 1
+    assert load.call_args.kwargs["mmap"]
+
+
 if __name__ == "__main__":
     test_policy_save_load_without_pydantic()
     test_policy_save_load_with_dict_metadata()
     test_policy_record_backwards_compatibility()
+    test_policy_metadata_sidecar()
+    test_load_latest_checkpoint_from_directory()
+    test_load_legacy_checkpoint_without_mmap()
     print("✅ All tests passed!")
@@ -4,6 +4,7 @@ import httpx
 from pydantic import BaseModel
 
 from metta.app_backend.routes.eval_task_routes import (
+    TaskChangesResponse,
     TaskClaimRequest,
     TaskClaimResponse,
     TaskCreateRequest,
@@ -54,6 +55,15 @@ class EvalTaskClient:
         params = {"assignee": assignee} if assignee is not None else {}
         return await self._make_request(TasksResponse, "GET", "/tasks/claimed", params=params)
 
+    async def wait_for_task_changes(
+        self, since: int | None = None, assignee: str | None = None, timeout: float = 30.0
+    ) -> TaskChangesResponse:
+        params = remove_none_values({"since": since, "assignee": assignee, "timeout": timeout})
+        # The server holds the request for up to `timeout` seconds
+        return await self._make_request(
+            TaskChangesResponse, "GET", "/tasks/changes", params=params, timeout=timeout + 30.0
+        )
+
     async def update_task_status(self, request: TaskUpdateRequest) -> TaskUpdateResponse:
         return await self._make_request(
             TaskUpdateResponse, "POST", "/tasks/claimed/update", json=request.model_dump(mode="json")
@@ -7,6 +7,9 @@ This script:
 2. Pulls tasks from the backend queue and routes them to the appropriate worker
 3. Dynamically creates workers for new git hashes
 4. Monitors container status and reports results
+
+It runs a cycle whenever the backend reports that tasks changed, and at least every `change_wait_timeout` seconds. If
+the backend can't report changes, it runs a cycle every `poll_interval` seconds instead.
 """
 
 import asyncio
@@ -36,6 +39,7 @@ class EvalTaskOrchestrator:
         machine_token: str,
         docker_image: str = "metta-policy-evaluator-local:latest",
         poll_interval: float = 5.0,
+        change_wait_timeout: float = 30.0,
         worker_idle_timeout: float = 600.0,
         container_manager: AbstractContainerManager | None = None,
         logger: logging.Logger | None = None,
@@ -43,6 +47,7 @@ class EvalTaskOrchestrator:
         self._backend_url = backend_url
         self._docker_image = docker_image
         self._poll_interval = poll_interval
+        self._change_wait_timeout = change_wait_timeout
         self._worker_idle_timeout = worker_idle_timeout
         self._machine_token = machine_token
         self._logger = logger or logging.getLogger(__name__)
@@ -156,10 +161,23 @@ class EvalTaskOrchestrator:
             except Exception:
                 self._logger.error(f"Failed to check idle status for worker {worker.container_name}", exc_info=True)
 
+    async def _wait_for_task_changes(self, cursor: int | None, start_time: datetime) -> int | None:
+        """Waits for tasks to change after `cursor`, and returns the new cursor. Falls back to polling on failure."""
+        try:
+            changes = await self._task_client.wait_for_task_changes(since=cursor, timeout=self._change_wait_timeout)
+            return changes.cursor
+        except Exception as e:
+            self._logger.debug(f"Failed to wait for task changes, polling instead: {e}")
+            elapsed_time = (datetime.now(timezone.utc) - start_time).total_seconds()
+            await asyncio.sleep(max(0, self._poll_interval - elapsed_time))
+            return None
+
     async def run(self) -> None:
         self._logger.info(f"Backend URL: {self._backend_url}")
         self._logger.info(f"Worker idle timeout: {self._worker_idle_timeout}s")
 
+        # The cursor is always taken before the cycle that follows it, so changes made during a cycle aren't missed
+        cursor: int | None = None
         while True:
             start_time = datetime.now(timezone.utc)
             try:
@@ -167,9 +185,7 @@ class EvalTaskOrchestrator:
             except Exception as e:
                 self._logger.error(f"Error in orchestrator loop: {e}", exc_info=True)
 
-            elapsed_time = (datetime.now(timezone.utc) - start_time).total_seconds()
-            sleep_time = max(0, self._poll_interval - elapsed_time)
-            await asyncio.sleep(sleep_time)
+            cursor = await self._wait_for_task_changes(cursor, start_time)
 
 
 async def main() -> None:
@@ -181,6 +197,7 @@ async def main() -> None:
     backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
     docker_image = os.environ.get("DOCKER_IMAGE", "metta-policy-evaluator-local:latest")
     poll_interval = float(os.environ.get("POLL_INTERVAL", "5"))
+    change_wait_timeout = float(os.environ.get("CHANGE_WAIT_TIMEOUT", "30"))
     worker_idle_timeout = float(os.environ.get("WORKER_IDLE_TIMEOUT", "600"))
     machine_token = os.environ["MACHINE_TOKEN"]
 
@@ -189,6 +206,7 @@ async def main() -> None:
         machine_token=machine_token,
         docker_image=docker_image,
         poll_interval=poll_interval,
+        change_wait_timeout=change_wait_timeout,
         worker_idle_timeout=worker_idle_timeout,
         logger=logger,
     )
@@ -3,9 +3,10 @@
 Runs eval tasks inside a Docker container.
 
 - Checks out the specified git hash once at startup
-- Polls the backend for tasks assigned to this worker
-- Processes tasks one at a time
-- Reports success/failure back
+- Waits for the backend to assign it tasks (long-polling, or polling if the backend can't report task changes)
+- Processes tasks one at a time, in a long-lived sim server process (tools/sim_server.py) that stays warm between
+  tasks, or with a fresh tools/sim.py process per task
+- Reports success/failure, and the time each task spent in each phase, back
 """
 
 import asyncio
@@ -23,13 +24,22 @@ from metta.app_backend.routes.eval_task_routes import (
     TaskStatusUpdate,
     TaskUpdateRequest,
 )
+from metta.app_backend.sim_server_process import SimServerProcess, SimServerStartError
 from metta.common.util.collections import remove_none_values
 from metta.common.util.logging_helpers import init_logging
 
 
 class EvalTaskWorker:
     def __init__(
-        self, backend_url: str, git_hash: str, assignee: str, machine_token: str, logger: logging.Logger | None = None
+        self,
+        backend_url: str,
+        git_hash: str,
+        assignee: str,
+        machine_token: str,
+        logger: logging.Logger | None = None,
+        warm: bool = True,
+        task_timeout: float | None = None,
+        memory_limit_mb: int | None = None,
     ):
         self._backend_url = backend_url
         self._git_hash = git_hash
@@ -38,11 +48,18 @@ class EvalTaskWorker:
         self._client = EvalTaskClient(backend_url)
         self._logger = logger or logging.getLogger(__name__)
         self._poll_interval = 5.0
+        self._change_wait_timeout = 30.0
+        self._warm = warm
+        self._task_timeout = task_timeout
+        self._memory_limit_mb = memory_limit_mb
+        self._sim_server: SimServerProcess | None = None
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._sim_server is not None:
+            await self._sim_server.close()
         await self._client.close()
 
     def _setup_versioned_checkout(self) -> None:
@@ -75,21 +92,11 @@ class EvalTaskWorker:
 
         self._logger.info(f"Successfully set up versioned checkout at {self._versioned_path}")
 
-    async def _run_sim_task(
-        self,
-        task: TaskResponse,
-        sim_suite: str,
-        env_overrides: dict,
-    ) -> None:
+    def _sim_overrides(self, task: TaskResponse, sim_suite: str, env_overrides: dict) -> list[str]:
         policy_name = task.policy_name
         if not policy_name:
             raise RuntimeError(f"Policy name not found for task {task.id}")
-        cmd = [
-            "uv",
-            "--project",
-            self._versioned_path,
-            "run",
-            "tools/sim.py",
+        overrides = [
             f"policy_uri=wandb://run/{policy_name}",
             f"sim={sim_suite}",
             f"eval_task_id={str(task.id)}",
@@ -99,22 +106,53 @@ class EvalTaskWorker:
         ]
 
         for key, value in env_overrides.items():
-            cmd.append(f"env_overrides.{key}={value}")
+            overrides.append(f"env_overrides.{key}={value}")
+        return overrides
 
+    async def _run_sim_task(
+        self,
+        task: TaskResponse,
+        sim_suite: str,
+        env_overrides: dict,
+    ) -> dict[str, float]:
+        """Runs the task's simulations, and returns the time spent in each phase."""
+        overrides = self._sim_overrides(task, sim_suite, env_overrides)
+
+        if self._warm:
+            if self._sim_server is None:
+                self._sim_server = SimServerProcess(
+                    ["uv", "--project", self._versioned_path, "run", "tools/sim_server.py"],
+                    task_timeout=self._task_timeout,
+                    memory_limit_mb=self._memory_limit_mb,
+                    logger=self._logger,
+                )
+            try:
+                result = await self._sim_server.run(overrides)
+                self._logger.info(f"Simulation completed successfully: {result.results}")
+                return result.timings
+            except SimServerStartError as e:
+                # e.g. the checkout at this git hash is too old for the sim server
+                self._logger.warning(f"Sim server didn't start, running a sim.py process per task instead: {e}")
+                self._warm = False
+
+        cmd = ["uv", "--project", self._versioned_path, "run", "tools/sim.py", *overrides]
         self._logger.info(f"Running command: {' '.join(cmd)}")
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        start_time = datetime.now()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=self._task_timeout)
 
         if result.returncode != 0:
             raise RuntimeError(f"sim.py failed with exit code {result.returncode}:\n{result.stderr}")
 
         self._logger.info(f"Simulation completed successfully: {result.stdout}")
+        return {"total": (datetime.now() - start_time).total_seconds()}
 
     async def _update_task_status(
         self,
         task_id: uuid.UUID,
         status: TaskStatus,
         error_reason: str | None = None,
+        timings: dict[str, float] | None = None,
     ) -> None:
         await self._client.update_task_status(
             TaskUpdateRequest(
@@ -122,7 +160,9 @@ class EvalTaskWorker:
                 updates={
                     task_id: TaskStatusUpdate(
                         status=status,
-                        attributes=remove_none_values({f"error_reason_{self._assignee}": error_reason}),
+                        attributes=remove_none_values(
+                            {f"error_reason_{self._assignee}": error_reason, f"timings_{self._assignee}": timings}
+                        ),
                     )
                 },
             )
@@ -133,6 +173,19 @@ class EvalTaskWorker:
             else ""
         )
 
+    async def _wait_for_task_changes(self, cursor: int | None, loop_start_time: datetime) -> int | None:
+        """Waits for tasks assigned to this worker to change after `cursor`, and returns the new cursor."""
+        try:
+            changes = await self._client.wait_for_task_changes(
+                since=cursor, assignee=self._assignee, timeout=self._change_wait_timeout
+            )
+            return changes.cursor
+        except Exception as e:
+            self._logger.debug(f"Failed to wait for task changes, polling instead: {e}")
+            elapsed_time = (datetime.now() - loop_start_time).total_seconds()
+            await asyncio.sleep(max(0, self._poll_interval - elapsed_time))
+            return None
+
     async def run(self) -> None:
         self._logger.info(f"Starting eval worker for git hash {self._git_hash}")
         self._logger.info(f"Backend URL: {self._backend_url}")
@@ -142,6 +195,8 @@ class EvalTaskWorker:
 
         self._logger.info(f"Worker running from main branch, sim.py will use git hash {self._git_hash}")
 
+        # The cursor is always taken before the tasks are read, so tasks assigned in between aren't missed
+        cursor: int | None = None
         while True:
             loop_start_time = datetime.now()
             try:
@@ -151,9 +206,11 @@ class EvalTaskWorker:
                     task: TaskResponse = min(claimed_tasks.tasks, key=lambda x: x.assigned_at or datetime.min)
                     self._logger.info(f"Processing task {task.id}")
                     try:
-                        await self._run_sim_task(task, task.sim_suite, task.attributes.get("env_overrides", {}))
+                        timings = await self._run_sim_task(
+                            task, task.sim_suite, task.attributes.get("env_overrides", {})
+                        )
                         self._logger.info(f"Task {task.id} completed successfully")
-                        await self._update_task_status(task.id, "done")
+                        await self._update_task_status(task.id, "done", timings=timings)
                         self._logger.info(f"Task {task.id} updated to done")
                     except Exception as e:
                         self._logger.error(f"Task failed: {e}", exc_info=True)
@@ -161,8 +218,7 @@ class EvalTaskWorker:
                 else:
                     self._logger.debug("No tasks claimed")
 
-                elapsed_time = (datetime.now() - loop_start_time).total_seconds()
-                await asyncio.sleep(max(0, self._poll_interval - elapsed_time))
+                cursor = await self._wait_for_task_changes(cursor, loop_start_time)
 
             except KeyboardInterrupt:
                 self._logger.info("Worker interrupted")
@@ -181,8 +237,20 @@ async def main() -> None:
     git_hash = os.environ["GIT_HASH"]
     assignee = os.environ["WORKER_ASSIGNEE"]
     machine_token = os.environ["MACHINE_TOKEN"]
-
-    async with EvalTaskWorker(backend_url, git_hash, assignee, machine_token, logger) as worker:
+    warm = os.environ.get("EVAL_WORKER_WARM", "true").lower() in ("1", "true")
+    task_timeout = float(os.environ.get("EVAL_TASK_TIMEOUT", "3600"))
+    memory_limit_mb = os.environ.get("EVAL_WORKER_MEMORY_LIMIT_MB")
+
+    async with EvalTaskWorker(
+        backend_url,
+        git_hash,
+        assignee,
+        machine_token,
+        logger,
+        warm=warm,
+        task_timeout=task_timeout,
+        memory_limit_mb=int(memory_limit_mb) if memory_limit_mb else None,
+    ) as worker:
         await worker.run()
 
 
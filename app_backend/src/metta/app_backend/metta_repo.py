@@ -1,12 +1,15 @@
+import asyncio
 import hashlib
 import json
+import logging
 import secrets
 import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Any, Literal
 
-from psycopg import Connection
+from psycopg import AsyncConnection, Connection
+from psycopg.rows import class_row
 from psycopg.types.json import Jsonb
 from psycopg_pool import AsyncConnectionPool
 from pydantic import BaseModel, Field
@@ -14,8 +17,13 @@ from pydantic import BaseModel, Field
 from metta.app_backend.query_logger import execute_single_row_query_and_log
 from metta.app_backend.schema_manager import SqlMigration, run_migrations
 
+logger = logging.getLogger(__name__)
+
 TaskStatus = Literal["unprocessed", "canceled", "done", "error"]
 
+# Every insert and update of eval_tasks notifies this channel with {"seq": ..., "assignee": ...}
+EVAL_TASK_CHANGES_CHANNEL = "eval_task_changes"
+
 
 class TaskStatusUpdate(BaseModel):
     status: TaskStatus
@@ -23,6 +31,22 @@ class TaskStatusUpdate(BaseModel):
     attributes: dict[str, Any] = Field(default_factory=dict)
 
 
+class EpisodeRecord(BaseModel):
+    """One episode for record_episodes. Recording the same idempotency_key again returns the first episode's id."""
+
+    idempotency_key: str | None = None
+    agent_policies: dict[int, uuid.UUID]
+    agent_metrics: dict[int, dict[str, float]]
+    primary_policy_id: uuid.UUID
+    stats_epoch: uuid.UUID | None = None
+    eval_name: str | None = None
+    simulation_suite: str | None = None
+    replay_url: str | None = None
+    attributes: dict[str, Any] = Field(default_factory=dict)
+    eval_task_id: uuid.UUID | None = None
+    tags: list[str] | None = None
+
+
 # This is a list of migrations that will be applied to the eval database.
 # Do not change existing migrations, only add new ones.
 MIGRATIONS = [
@@ -376,13 +400,258 @@ MIGRATIONS = [
             """,
         ],
     ),
+    SqlMigration(
+        version=20,
+        description="Add idempotency_key to episodes table",
+        sql_statements=[
+            """ALTER TABLE episodes ADD COLUMN idempotency_key TEXT""",
+            """CREATE UNIQUE INDEX idx_episodes_idempotency_key ON episodes(idempotency_key)""",
+        ],
+    ),
+    SqlMigration(
+        version=21,
+        description="Notify eval task changes",
+        sql_statements=[
+            f"""CREATE FUNCTION notify_eval_task_change() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{EVAL_TASK_CHANGES_CHANNEL}', json_build_object('assignee', NEW.assignee)::text);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql""",
+            """CREATE TRIGGER eval_tasks_notify_change
+                AFTER INSERT OR UPDATE ON eval_tasks
+                FOR EACH ROW EXECUTE FUNCTION notify_eval_task_change()""",
+        ],
+    ),
+    SqlMigration(
+        version=22,
+        description="Add per-policy eval metric aggregates, maintained as episodes are recorded",
+        sql_statements=[
+            # One row per (primary policy, eval, metric), summing the metric over every agent of every episode
+            """CREATE TABLE policy_eval_metric_aggregates (
+                policy_id UUID NOT NULL REFERENCES policies(id),
+                eval_name TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                eval_category TEXT,
+                env_name TEXT,
+                total_value DOUBLE PRECISION NOT NULL,
+                num_agents BIGINT NOT NULL,
+                num_episodes BIGINT NOT NULL,
+                latest_episode_id INTEGER NOT NULL,
+                latest_replay_url TEXT,
+                first_episode_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (policy_id, eval_name, metric)
+            )""",
+            """CREATE INDEX idx_policy_eval_metric_aggregates_category_metric
+                ON policy_eval_metric_aggregates(eval_category, metric)""",
+            """INSERT INTO policy_eval_metric_aggregates (
+                policy_id, eval_name, metric, eval_category, env_name, total_value, num_agents, num_episodes,
+                latest_episode_id, latest_replay_url, first_episode_at
+            )
+            SELECT
+                e.primary_policy_id,
+                e.eval_name,
+                eam.metric,
+                ANY_VALUE(e.eval_category),
+                ANY_VALUE(e.env_name),
+                COALESCE(SUM(eam.value::double precision), 0),
+                COUNT(*),
+                COUNT(DISTINCT e.internal_id),
+                MAX(e.internal_id),
+                (ARRAY_AGG(e.replay_url ORDER BY e.internal_id DESC))[1],
+                MIN(e.created_at)
+            FROM episodes e
+            JOIN episode_agent_metrics eam ON eam.episode_internal_id = e.internal_id
+            WHERE e.eval_name IS NOT NULL
+            GROUP BY e.primary_policy_id, e.eval_name, eam.metric""",
+        ],
+    ),
 ]
 
 
+class PolicyEvalAggregate(BaseModel):
+    """A metric summed over every agent of every episode of a policy in an eval."""
+
+    policy_id: uuid.UUID
+    policy_name: str
+    eval_name: str
+    eval_category: str | None
+    env_name: str | None
+    total_value: float
+    num_agents: int
+    latest_episode_id: int
+    latest_replay_url: str | None
+    run_id: uuid.UUID | None
+    epoch: int | None
+
+
+# Adds episodes, which must already have their metrics, to policy_eval_metric_aggregates. Rows are upserted in key
+# order, so that concurrent ingestions lock them in the same order.
+ADD_TO_EVAL_AGGREGATES_QUERY = """
+    INSERT INTO policy_eval_metric_aggregates AS agg (
+        policy_id, eval_name, metric, eval_category, env_name, total_value, num_agents, num_episodes,
+        latest_episode_id, latest_replay_url, first_episode_at
+    )
+    SELECT
+        e.primary_policy_id,
+        e.eval_name,
+        eam.metric,
+        ANY_VALUE(e.eval_category),
+        ANY_VALUE(e.env_name),
+        COALESCE(SUM(eam.value::double precision), 0),
+        COUNT(*),
+        COUNT(DISTINCT e.internal_id),
+        MAX(e.internal_id),
+        (ARRAY_AGG(e.replay_url ORDER BY e.internal_id DESC))[1],
+        MIN(e.created_at)
+    FROM episodes e
+    JOIN episode_agent_metrics eam ON eam.episode_internal_id = e.internal_id
+    WHERE e.internal_id = ANY(%s) AND e.eval_name IS NOT NULL
+    GROUP BY e.primary_policy_id, e.eval_name, eam.metric
+    ORDER BY e.primary_policy_id, e.eval_name, eam.metric
+    ON CONFLICT (policy_id, eval_name, metric) DO UPDATE SET
+        total_value = agg.total_value + EXCLUDED.total_value,
+        num_agents = agg.num_agents + EXCLUDED.num_agents,
+        num_episodes = agg.num_episodes + EXCLUDED.num_episodes,
+        latest_episode_id = GREATEST(agg.latest_episode_id, EXCLUDED.latest_episode_id),
+        latest_replay_url = CASE
+            WHEN EXCLUDED.latest_episode_id > agg.latest_episode_id THEN EXCLUDED.latest_replay_url
+            ELSE agg.latest_replay_url
+        END,
+        first_episode_at = LEAST(agg.first_episode_at, EXCLUDED.first_episode_at)
+"""
+
+# Policies are selected by training run, or directly if they aren't part of one
+POLICY_EVAL_AGGREGATES_QUERY = """
+    SELECT
+        agg.policy_id,
+        p.name AS policy_name,
+        agg.eval_name,
+        agg.eval_category,
+        agg.env_name,
+        agg.total_value,
+        agg.num_agents,
+        agg.latest_episode_id,
+        agg.latest_replay_url,
+        ep.run_id,
+        ep.end_training_epoch AS epoch
+    FROM policy_eval_metric_aggregates agg
+    JOIN policies p ON p.id = agg.policy_id
+    LEFT JOIN epochs ep ON p.epoch_id = ep.id
+    WHERE (ep.run_id = ANY(%(training_run_ids)s) OR (ep.run_id IS NULL AND agg.policy_id = ANY(%(policy_ids)s)))
+    AND agg.metric = %(metric)s
+    AND (%(eval_names)s::text[] IS NULL OR agg.eval_name = ANY(%(eval_names)s))
+    AND (%(eval_category)s::text IS NULL OR agg.eval_category = %(eval_category)s)
+    ORDER BY p.name, agg.eval_name
+"""
+
+
+class EvalTaskChangeListener:
+    """
+    LISTENs for eval task changes on a dedicated connection, and wakes up whoever is waiting for them.
+
+    Waiters pass the cursor they were last given, and are woken by any change notification received after it was
+    given out, or by any such notification for a task assigned to them. Notifications are only sent once a change is
+    committed, so a waiter that then reads the tasks sees it.
+
+    Cursors count the notifications this listener has received. Counting starts from a random point, so that a cursor
+    from another server process, or from before a restart, is recognized as unknown, and its waiter is told to re-read
+    the tasks at once.
+
+    This assumes one server process per database, as server.py runs it. With several processes behind a load
+    balancer, a client whose requests move between them is told about a change on every move, and so falls back to
+    polling: still correct, but without the long-poll's savings.
+
+    Only the latest `max_assignees` assignees with changes are tracked. A waiter for any other assignee is woken by a
+    change after its cursor to one that was dropped.
+    """
+
+    def __init__(self, db_uri: str, max_assignees: int = 10_000) -> None:
+        self._db_uri = db_uri
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._changed: asyncio.Condition | None = None
+        self._first_cursor = secrets.randbelow(1 << 40) << 12
+        self._cursor = self._first_cursor
+        # In order of each assignee's latest change, so that the first one is the one to drop.
+        self._cursor_by_assignee: dict[str, int] = {}
+        self._max_assignees = max_assignees
+        # The latest change of any assignee that has been dropped from _cursor_by_assignee.
+        self._dropped_through = self._first_cursor
+        # The cursor when the listener last (re)connected. Notifications sent while it wasn't listening are lost, so
+        # every waiter counts this as a change.
+        self._listening_since = self._first_cursor
+
+    def _ensure_listening(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._changed is None or self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._changed = asyncio.Condition()
+            self._task = loop.create_task(self._listen(self._changed))
+        return self._changed
+
+    async def _listen(self, changed: asyncio.Condition) -> None:
+        while True:
+            try:
+                async with await AsyncConnection.connect(self._db_uri, autocommit=True) as con:
+                    await con.execute(f"LISTEN {EVAL_TASK_CHANGES_CHANNEL}")
+                    async with changed:
+                        self._cursor += 1
+                        self._listening_since = self._cursor
+                        changed.notify_all()
+                    async for notify in con.notifies():
+                        change = json.loads(notify.payload)
+                        async with changed:
+                            self._cursor += 1
+                            if change["assignee"] is not None:
+                                self._record_assignee_change(change["assignee"])
+                            changed.notify_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Waiters time out as usual while the listener reconnects
+                logger.warning(f"Eval task change listener failed, reconnecting: {e}")
+                await asyncio.sleep(5)
+
+    def _record_assignee_change(self, assignee: str) -> None:
+        self._cursor_by_assignee.pop(assignee, None)
+        self._cursor_by_assignee[assignee] = self._cursor
+        if len(self._cursor_by_assignee) > self._max_assignees:
+            self._dropped_through = self._cursor_by_assignee.pop(next(iter(self._cursor_by_assignee)))
+
+    def _changed_since(self, since: int, assignee: str | None) -> bool:
+        if assignee is None:
+            latest = self._cursor
+        else:
+            latest = max(self._cursor_by_assignee.get(assignee, self._dropped_through), self._listening_since)
+        return latest > since
+
+    async def wait(self, since: int | None, assignee: str | None, timeout: float) -> tuple[int, bool]:
+        """
+        Waits up to `timeout` seconds for a change after cursor `since`. Returns the current cursor, and whether there
+        was a change (always, if `since` is None or unknown).
+        """
+        changed = self._ensure_listening()
+        async with changed:
+            if since is None or not self._first_cursor <= since <= self._cursor:
+                return self._cursor, True
+            try:
+                await asyncio.wait_for(changed.wait_for(lambda: self._changed_since(since, assignee)), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return self._cursor, self._changed_since(since, assignee)
+
+    def close(self) -> None:
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            self._task.cancel()
+        self._task = None
+
+
 class MettaRepo:
     def __init__(self, db_uri: str) -> None:
         self.db_uri = db_uri
         self._pool: AsyncConnectionPool | None = None
+        self._task_changes = EvalTaskChangeListener(db_uri)
         # Run migrations synchronously during initialization
         with Connection.connect(self.db_uri) as con:
             run_migrations(con, MIGRATIONS)
@@ -400,6 +669,7 @@ class MettaRepo:
             yield conn
 
     async def close(self) -> None:
+        self._task_changes.close()
         if self._pool:
             try:
                 await self._pool.close()
@@ -602,6 +872,8 @@ class MettaRepo:
                     rows,
                 )
 
+            await con.execute(ADD_TO_EVAL_AGGREGATES_QUERY, ([episode_internal_id],))
+
             # Add tags if provided
             if tags:
                 tag_rows = [(episode_id, tag) for tag in tags]
@@ -617,11 +889,108 @@ class MettaRepo:
 
             return episode_id
 
+    async def record_episodes(self, episodes: list[EpisodeRecord]) -> list[uuid.UUID]:
+        """
+        Record a batch of episodes in one transaction, returning their ids in order.
+
+        Episodes are inserted with one multi-row INSERT, and their agent policies, metrics and tags are COPYed in.
+        Episodes whose idempotency_key was already recorded (e.g. by an earlier attempt at the same batch) are left
+        as they were, and their existing ids are returned.
+        """
+        if not episodes:
+            return []
+
+        # Every episode needs a key to match it with its inserted row. Ones the client didn't key can't be retried
+        # safely anyway, so a fresh key does for them.
+        keys = [episode.idempotency_key or f"server:{uuid.uuid4()}" for episode in episodes]
+        if len(set(keys)) != len(keys):
+            raise ValueError("Episodes in a batch must have distinct idempotency keys")
+
+        async with self.connect() as con, con.transaction():
+            result = await con.execute(
+                """
+                INSERT INTO episodes (
+                    idempotency_key,
+                    replay_url,
+                    eval_name,
+                    simulation_suite,
+                    eval_category,
+                    env_name,
+                    primary_policy_id,
+                    stats_epoch,
+                    attributes,
+                    eval_task_id
+                )
+                SELECT * FROM unnest(
+                    %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+                    %s::uuid[], %s::uuid[], %s::jsonb[], %s::uuid[]
+                )
+                ON CONFLICT (idempotency_key) DO NOTHING
+                RETURNING idempotency_key, id, internal_id
+                """,
+                (
+                    keys,
+                    [episode.replay_url for episode in episodes],
+                    [episode.eval_name for episode in episodes],
+                    [episode.simulation_suite for episode in episodes],
+                    [episode.eval_name.split("/", 1)[0] if episode.eval_name else None for episode in episodes],
+                    [
+                        episode.eval_name.split("/", 1)[1] if episode.eval_name and "/" in episode.eval_name else None
+                        for episode in episodes
+                    ],
+                    [episode.primary_policy_id for episode in episodes],
+                    [episode.stats_epoch for episode in episodes],
+                    [Jsonb(episode.attributes) for episode in episodes],
+                    [episode.eval_task_id for episode in episodes],
+                ),
+            )
+            inserted = {key: (episode_id, internal_id) for key, episode_id, internal_id in await result.fetchall()}
+
+            ids: dict[str, uuid.UUID] = {key: episode_id for key, (episode_id, _) in inserted.items()}
+            already_recorded = [key for key in keys if key not in inserted]
+            if already_recorded:
+                result = await con.execute(
+                    "SELECT idempotency_key, id FROM episodes WHERE idempotency_key = ANY(%s)", (already_recorded,)
+                )
+                ids.update({key: episode_id for key, episode_id in await result.fetchall()})
+
+            new_episodes = [
+                (inserted[key], episode) for key, episode in zip(keys, episodes, strict=True) if key in inserted
+            ]
+            async with con.cursor() as cursor:
+                async with cursor.copy(
+                    "COPY episode_agent_policies (episode_id, policy_id, agent_id) FROM STDIN"
+                ) as copy:
+                    for (episode_id, _), episode in new_episodes:
+                        for agent_id, policy_id in episode.agent_policies.items():
+                            await copy.write_row((episode_id, policy_id, agent_id))
+
+                async with cursor.copy(
+                    "COPY episode_agent_metrics (episode_internal_id, agent_id, metric, value) FROM STDIN"
+                ) as copy:
+                    for (_, internal_id), episode in new_episodes:
+                        for agent_id, metrics in episode.agent_metrics.items():
+                            for metric_name, value in metrics.items():
+                                await copy.write_row((internal_id, agent_id, metric_name, value))
+
+                async with cursor.copy("COPY episode_tags (episode_id, tag) FROM STDIN") as copy:
+                    for (episode_id, _), episode in new_episodes:
+                        for tag in dict.fromkeys(episode.tags or []):
+                            await copy.write_row((episode_id, tag))
+
+            # Only newly inserted episodes count towards the aggregates, so a retried batch isn't counted twice
+            if new_episodes:
+                await con.execute(
+                    ADD_TO_EVAL_AGGREGATES_QUERY, ([internal_id for (_, internal_id), _ in new_episodes],)
+                )
+
+        return [ids[key] for key in keys]
+
     async def get_suites(self) -> list[str]:
         async with self.connect() as con:
             result = await con.execute("""
                 SELECT DISTINCT eval_category
-                FROM episodes
+                FROM policy_eval_metric_aggregates
                 WHERE eval_category IS NOT NULL AND env_name IS NOT NULL
                 ORDER BY eval_category
             """)
@@ -633,17 +1002,81 @@ class MettaRepo:
         async with self.connect() as con:
             result = await con.execute(
                 """
-                SELECT DISTINCT eam.metric
-                FROM episodes e
-                JOIN episode_agent_metrics eam ON e.internal_id = eam.episode_internal_id
-                WHERE e.eval_category = %s
-                ORDER BY eam.metric
+                SELECT DISTINCT metric
+                FROM policy_eval_metric_aggregates
+                WHERE eval_category = %s
+                ORDER BY metric
             """,
                 (suite,),
             )
             rows = await result.fetchall()
             return [row[0] for row in rows]
 
+    async def get_policy_eval_names(self, training_run_ids: list[str], policy_ids: list[str]) -> list[str]:
+        """Get the evals that policies of the given training runs, or the given run-free policies, were evaluated in."""
+        async with self.connect() as con:
+            result = await con.execute(
+                """
+                SELECT DISTINCT agg.eval_name
+                FROM policy_eval_metric_aggregates agg
+                JOIN policies p ON p.id = agg.policy_id
+                LEFT JOIN epochs ep ON p.epoch_id = ep.id
+                WHERE ep.run_id = ANY(%s) OR (ep.run_id IS NULL AND agg.policy_id = ANY(%s))
+                ORDER BY agg.eval_name
+            """,
+                (training_run_ids, policy_ids),
+            )
+            rows = await result.fetchall()
+            return [row[0] for row in rows]
+
+    async def get_policy_eval_metrics(
+        self, training_run_ids: list[str], policy_ids: list[str], eval_names: list[str]
+    ) -> list[str]:
+        """Get the metrics recorded for the given policies (as in get_policy_eval_names) in the given evals."""
+        async with self.connect() as con:
+            result = await con.execute(
+                """
+                SELECT DISTINCT agg.metric
+                FROM policy_eval_metric_aggregates agg
+                JOIN policies p ON p.id = agg.policy_id
+                LEFT JOIN epochs ep ON p.epoch_id = ep.id
+                WHERE (ep.run_id = ANY(%s) OR (ep.run_id IS NULL AND agg.policy_id = ANY(%s)))
+                AND agg.eval_name = ANY(%s)
+                ORDER BY agg.metric
+            """,
+                (training_run_ids, policy_ids, eval_names),
+            )
+            rows = await result.fetchall()
+            return [row[0] for row in rows]
+
+    async def get_policy_eval_aggregates(
+        self,
+        metric: str,
+        training_run_ids: list[str],
+        policy_ids: list[str],
+        eval_names: list[str] | None = None,
+        eval_category: str | None = None,
+    ) -> list[PolicyEvalAggregate]:
+        """
+        Get a metric's aggregates for every eval that policies of the given training runs, or the given run-free
+        policies, were evaluated in, optionally limited to some evals or to one eval category.
+
+        These are kept up to date as episodes are recorded, so reading them doesn't scan any episodes.
+        """
+        async with self.connect() as con:
+            async with con.cursor(row_factory=class_row(PolicyEvalAggregate)) as cursor:
+                await cursor.execute(
+                    POLICY_EVAL_AGGREGATES_QUERY,
+                    {
+                        "metric": metric,
+                        "training_run_ids": training_run_ids,
+                        "policy_ids": policy_ids,
+                        "eval_names": eval_names,
+                        "eval_category": eval_category,
+                    },
+                )
+                return await cursor.fetchall()
+
     async def get_group_ids(self, suite: str) -> list[str]:
         """Get all available group IDs for a given suite."""
         async with self.connect() as con:
@@ -1089,6 +1522,14 @@ class MettaRepo:
                 for row in rows
             ]
 
+    async def wait_for_task_changes(self, since: int | None, assignee: str | None, timeout: float) -> tuple[int, bool]:
+        """
+        Waits up to `timeout` seconds for eval tasks to change after cursor `since` (or for changes to tasks assigned
+        to `assignee`, if given). Returns the cursor to wait from next, and whether anything changed. Returns at once
+        if `since` is None.
+        """
+        return await self._task_changes.wait(since, assignee, timeout)
+
     async def update_task_statuses(
         self,
         updates: dict[uuid.UUID, TaskStatusUpdate],
@@ -81,6 +81,11 @@ class TasksResponse(BaseModel):
     tasks: list[TaskResponse]
 
 
+class TaskChangesResponse(BaseModel):
+    cursor: int  # Pass this as `since` to wait for the next change
+    changed: bool
+
+
 async def _get_latest_main_commit() -> str:
     async with httpx.AsyncClient() as client:
         response = await client.get(
@@ -150,6 +155,20 @@ def create_eval_task_router(stats_repo: MettaRepo) -> APIRouter:
         task_responses = [TaskResponse.from_db(task) for task in tasks]
         return TasksResponse(tasks=task_responses)
 
+    @router.get("/changes", response_model=TaskChangesResponse)
+    @timed_http_handler
+    async def wait_for_task_changes(
+        since: int | None = Query(None),
+        assignee: str | None = Query(None),
+        timeout: float = Query(default=30.0, ge=0, le=60),
+    ) -> TaskChangesResponse:
+        """
+        Long-polls for eval task changes after `since`: returns as soon as a task changes, or is assigned to
+        `assignee` if given, and otherwise after `timeout` seconds.
+        """
+        cursor, changed = await stats_repo.wait_for_task_changes(since=since, assignee=assignee, timeout=timeout)
+        return TaskChangesResponse(cursor=cursor, changed=changed)
+
     @router.get("/all", response_model=TasksResponse)
     @timed_http_handler
     async def get_all_tasks(
@@ -4,7 +4,6 @@ from typing import Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException
 from psycopg import AsyncConnection
-from psycopg.rows import class_row
 from pydantic import BaseModel, Field
 
 from metta.app_backend.metta_repo import MettaRepo
@@ -102,8 +101,8 @@ class PolicyEvaluationResult:
 
     policy_id: str
     policy_name: str
-    eval_category: str
-    env_name: str
+    eval_category: Optional[str]
+    env_name: Optional[str]
     replay_url: Optional[str]
     total_score: float
     num_agents: int
@@ -126,17 +125,26 @@ class PolicyEvaluationResult:
 # SQL Queries
 # ============================================================================
 
+# Policies are listed once they've been evaluated, and are dated by their first evaluation
 UNIFIED_POLICIES_QUERY = """
-    WITH unified_policies AS (
+    WITH evaluated_policies AS (
+        SELECT policy_id, MIN(first_episode_at) as first_episode_at
+        FROM policy_eval_metric_aggregates
+        GROUP BY policy_id
+    ),
+    unified_policies AS (
         SELECT
-          COALESCE(we.training_run_id, we.primary_policy_id) as id,
-          ANY_VALUE(CASE WHEN we.training_run_id IS NOT NULL THEN 'training_run' ELSE 'policy' END) as type,
-          ANY_VALUE(COALESCE(we.training_run_name, we.policy_name)) as name,
-          ANY_VALUE(we.training_run_user_id) as user_id,
-          ANY_VALUE(we.created_at) as created_at,
-          ANY_VALUE(we.training_run_tags) as tags
-        FROM wide_episodes we
-        GROUP BY COALESCE(we.training_run_id, we.primary_policy_id)
+          COALESCE(tr.id, p.id) as id,
+          ANY_VALUE(CASE WHEN tr.id IS NOT NULL THEN 'training_run' ELSE 'policy' END) as type,
+          ANY_VALUE(COALESCE(tr.name, p.name)) as name,
+          ANY_VALUE(tr.user_id) as user_id,
+          MIN(evp.first_episode_at) as created_at,
+          ANY_VALUE(tr.tags) as tags
+        FROM evaluated_policies evp
+        JOIN policies p ON p.id = evp.policy_id
+        LEFT JOIN epochs ep ON p.epoch_id = ep.id
+        LEFT JOIN training_runs tr ON ep.run_id = tr.id
+        GROUP BY COALESCE(tr.id, p.id)
     )
 """
 
@@ -157,27 +165,6 @@ COUNT_UNIFIED_POLICIES_QUERY = """
     {where_clause}
 """
 
-GET_EVALS_QUERY = """
-    SELECT DISTINCT eval_name
-    FROM wide_episodes
-    WHERE (
-        training_run_id = ANY(%s) OR  -- Policies from selected training runs
-        (training_run_id IS NULL AND primary_policy_id = ANY(%s))  -- Selected run-free policies
-    )
-"""
-
-GET_AVAILABLE_METRICS_QUERY = """
-    SELECT DISTINCT eam.metric
-    FROM episode_agent_metrics eam
-    JOIN wide_episodes we ON we.internal_id = eam.episode_internal_id
-    WHERE (
-        we.training_run_id = ANY(%s) OR  -- Policies from selected training runs
-        (we.training_run_id IS NULL AND we.primary_policy_id = ANY(%s))  -- Selected run-free policies
-    )
-    AND we.eval_name = ANY(%s)
-    ORDER BY eam.metric
-"""
-
 GET_POLICY_NAMES_BY_IDS_QUERY = """
     SELECT p.name
     FROM policies p
@@ -185,32 +172,6 @@ GET_POLICY_NAMES_BY_IDS_QUERY = """
     ORDER BY p.name
 """
 
-POLICY_HEATMAP_DATA_QUERY = """
-    SELECT
-        we.primary_policy_id as policy_id,
-        we.policy_name,
-        we.eval_category,
-        we.env_name,
-        ANY_VALUE(we.replay_url) as replay_url,
-        SUM(eam.value) as total_score,
-        COUNT(eam.*) as num_agents,
-        MAX(we.internal_id) as episode_id,
-        we.training_run_id::text as run_id,
-        we.epoch_end_training_epoch as epoch
-    FROM wide_episodes we
-    JOIN episode_agent_metrics eam ON we.internal_id = eam.episode_internal_id
-    WHERE (
-        we.training_run_id = ANY(%s) OR  -- Policies from selected training runs
-        (we.training_run_id IS NULL AND we.primary_policy_id = ANY(%s))  -- Selected run-free policies
-    )
-    AND eam.metric = %s
-    AND we.eval_name = ANY(%s)
-    GROUP BY we.primary_policy_id, we.policy_name, we.eval_category, we.env_name, we.training_run_id,
-        we.epoch_end_training_epoch
-    ORDER BY we.policy_name, we.eval_category, we.env_name
-"""
-
-
 # ============================================================================
 # Core Functions
 # ============================================================================
@@ -271,45 +232,32 @@ async def get_policies_and_training_runs(con: AsyncConnection, request: Policies
     )
 
 
-async def get_evals_for_selection(
-    con: AsyncConnection, training_run_ids: List[str], run_free_policy_ids: List[str]
-) -> List[str]:
-    """Get evaluation categories and environment names for selected training runs and policies."""
-    rows = await execute_query_and_log(
-        con, GET_EVALS_QUERY, (training_run_ids, run_free_policy_ids), "get_evals_for_selection"
-    )
-
-    return [row[0] for row in rows]
-
-
-async def get_available_metrics_for_selection(
-    con: AsyncConnection,
-    training_run_ids: List[str],
-    run_free_policy_ids: List[str],
-    eval_names: List[str],
-) -> List[str]:
-    """Get available metrics for the selected training runs, policies and evaluations."""
-    rows = await execute_query_and_log(
-        con,
-        GET_AVAILABLE_METRICS_QUERY,
-        (training_run_ids, run_free_policy_ids, eval_names),
-        "get_available_metrics_for_selection",
-    )
-
-    return [row[0] for row in rows]
-
-
 async def fetch_policy_heatmap_data(
-    con: AsyncConnection,
+    metta_repo: MettaRepo,
     training_run_ids: List[str],
     run_free_policy_ids: List[str],
     eval_names: List[str],
     metric: str,
 ) -> List[PolicyEvaluationResult]:
     """Fetch evaluation data for policy-based heatmap."""
-    async with con.cursor(row_factory=class_row(PolicyEvaluationResult)) as cursor:
-        await cursor.execute(POLICY_HEATMAP_DATA_QUERY, (training_run_ids, run_free_policy_ids, metric, eval_names))
-        return await cursor.fetchall()
+    aggregates = await metta_repo.get_policy_eval_aggregates(
+        metric, training_run_ids, run_free_policy_ids, eval_names=eval_names
+    )
+    return [
+        PolicyEvaluationResult(
+            policy_id=str(agg.policy_id),
+            policy_name=agg.policy_name,
+            eval_category=agg.eval_category,
+            env_name=agg.env_name,
+            replay_url=agg.latest_replay_url,
+            total_score=agg.total_value,
+            num_agents=agg.num_agents,
+            episode_id=agg.latest_episode_id,
+            run_id=str(agg.run_id) if agg.run_id else None,
+            epoch=agg.epoch,
+        )
+        for agg in aggregates
+    ]
 
 
 def select_policies_by_training_run_selector(
@@ -469,8 +417,7 @@ def create_policy_heatmap_router(metta_repo: MettaRepo) -> APIRouter:
         if not request.training_run_ids and not request.run_free_policy_ids:
             return []
 
-        async with metta_repo.connect() as con:
-            return await get_evals_for_selection(con, request.training_run_ids, request.run_free_policy_ids)
+        return await metta_repo.get_policy_eval_names(request.training_run_ids, request.run_free_policy_ids)
 
     @router.post("/metrics")
     @timed_route("get_available_metrics")
@@ -479,10 +426,9 @@ def create_policy_heatmap_router(metta_repo: MettaRepo) -> APIRouter:
         if (not request.training_run_ids and not request.run_free_policy_ids) or not request.eval_names:
             return []
 
-        async with metta_repo.connect() as con:
-            return await get_available_metrics_for_selection(
-                con, request.training_run_ids, request.run_free_policy_ids, request.eval_names
-            )
+        return await metta_repo.get_policy_eval_metrics(
+            request.training_run_ids, request.run_free_policy_ids, request.eval_names
+        )
 
     @router.post("/heatmap")
     @timed_route("generate_policy_heatmap")
@@ -495,28 +441,27 @@ def create_policy_heatmap_router(metta_repo: MettaRepo) -> APIRouter:
         ):
             raise HTTPException(status_code=400, detail="Missing required parameters")
 
-        async with metta_repo.connect() as con:
-            # Fetch evaluation data
-            evaluations = await fetch_policy_heatmap_data(
-                con, request.training_run_ids, request.run_free_policy_ids, request.eval_names, request.metric
-            )
+        # Fetch evaluation data
+        evaluations = await fetch_policy_heatmap_data(
+            metta_repo, request.training_run_ids, request.run_free_policy_ids, request.eval_names, request.metric
+        )
 
-            # Apply training run policy selector if we have evaluations
-            if evaluations:
-                selected_evaluations = select_policies_by_training_run_selector(
-                    evaluations, request.training_run_policy_selector, request.eval_names
-                )
-                # Build and return heatmap (includes all selected policies, even those without evaluations)
-                return build_policy_heatmap(selected_evaluations, request.eval_names)
-            else:
-                # No evaluations found at all - return empty heatmap
-                return HeatmapData(
-                    evalNames=[],
-                    policyNames=[],
-                    cells={},
-                    policyAverageScores={},
-                    evalAverageScores={},
-                    evalMaxScores={},
-                )
+        # Apply training run policy selector if we have evaluations
+        if evaluations:
+            selected_evaluations = select_policies_by_training_run_selector(
+                evaluations, request.training_run_policy_selector, request.eval_names
+            )
+            # Build and return heatmap (includes all selected policies, even those without evaluations)
+            return build_policy_heatmap(selected_evaluations, request.eval_names)
+        else:
+            # No evaluations found at all - return empty heatmap
+            return HeatmapData(
+                evalNames=[],
+                policyNames=[],
+                cells={},
+                policyAverageScores={},
+                evalAverageScores={},
+                evalMaxScores={},
+            )
 
     return router
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from metta.app_backend.auth import create_user_or_token_dependency
-from metta.app_backend.metta_repo import MettaRepo
+from metta.app_backend.metta_repo import EpisodeRecord, MettaRepo
 from metta.app_backend.route_logger import timed_route
 
 
@@ -58,12 +58,22 @@ class EpisodeCreate(BaseModel):
     attributes: Dict[str, Any] = Field(default_factory=dict)
     eval_task_id: Optional[str] = None
     tags: Optional[List[str]] = None
+    # Only used by the bulk endpoint: recording an episode with the same key again is a no-op
+    idempotency_key: Optional[str] = None
 
 
 class EpisodeResponse(BaseModel):
     id: str
 
 
+class EpisodeBatchCreate(BaseModel):
+    episodes: List[EpisodeCreate] = Field(max_length=10000)
+
+
+class EpisodeBatchResponse(BaseModel):
+    ids: List[str]
+
+
 def create_stats_router(stats_repo: MettaRepo) -> APIRouter:
     """Create a stats router with the given StatsRepo instance."""
     router = APIRouter(prefix="/stats", tags=["stats"])
@@ -166,4 +176,18 @@ def create_stats_router(stats_repo: MettaRepo) -> APIRouter:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to record episode: {str(e)}") from e
 
+    @router.post("/episodes/bulk", response_model=EpisodeBatchResponse)
+    @timed_route("record_episodes")
+    async def record_episodes(batch: EpisodeBatchCreate, user: str = user_or_token) -> EpisodeBatchResponse:
+        """Record a batch of episodes in one transaction. Episodes whose idempotency key was already recorded are
+        skipped, so a failed batch can be retried as is."""
+        try:
+            episodes = [EpisodeRecord.model_validate(episode.model_dump()) for episode in batch.episodes]
+            episode_ids = await stats_repo.record_episodes(episodes)
+            return EpisodeBatchResponse(ids=[str(episode_id) for episode_id in episode_ids])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid episode batch: {str(e)}") from e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to record episodes: {str(e)}") from e
+
     return router
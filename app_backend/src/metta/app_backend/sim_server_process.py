@@ -0,0 +1,174 @@
+"""
+Runs eval tasks in a long-lived tools/sim_server.py process, which keeps its imports and policy cache warm between
+tasks. The process is restarted after it crashes, after a task times out, and after a task runs out of memory.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import resource
+import signal
+import time
+import uuid
+from typing import Any
+
+from pydantic import BaseModel
+
+# Responses carry a task's full results on one line
+_STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class SimServerError(RuntimeError):
+    pass
+
+
+class SimServerStartError(SimServerError):
+    pass
+
+
+class SimTaskResult(BaseModel):
+    results: dict[str, Any]
+    timings: dict[str, float]
+
+
+async def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    # Kills the server along with any children, e.g. the Python process under `uv run`
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+class SimServerProcess:
+    def __init__(
+        self,
+        cmd: list[str],
+        task_timeout: float | None = None,
+        startup_timeout: float = 600.0,
+        memory_limit_mb: int | None = None,
+        logger: logging.Logger | None = None,
+    ):
+        self._cmd = cmd
+        self._task_timeout = task_timeout
+        self._startup_timeout = startup_timeout
+        self._memory_limit_mb = memory_limit_mb
+        self._logger = logger or logging.getLogger(__name__)
+        self._process: asyncio.subprocess.Process | None = None
+        self._startup_timings: dict[str, float] | None = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _limit_memory(self) -> None:
+        # Runs in the child before exec, so that a task that allocates too much fails there, not in the worker
+        if self._memory_limit_mb is not None:
+            limit = self._memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    async def _start(self) -> asyncio.subprocess.Process:
+        self._logger.info(f"Starting sim server: {' '.join(self._cmd)}")
+        start_time = time.time()
+        process = await asyncio.create_subprocess_exec(
+            *self._cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=_STREAM_LIMIT,
+            preexec_fn=self._limit_memory,
+            # The command may be a launcher like `uv run` that runs the server as its own child, so the server gets
+            # a process group that can be killed as a whole
+            start_new_session=True,
+        )
+        self._process = process
+        try:
+            ready = await self._read_response(self._startup_timeout)
+        except SimServerError as e:
+            await self._kill()
+            raise SimServerStartError(f"Sim server didn't start: {e}") from e
+        except BaseException:
+            await self._kill()
+            raise
+        if not ready.get("ready"):
+            await self._kill()
+            raise SimServerStartError(f"Sim server sent {ready} instead of its ready message")
+        self._startup_timings = {**ready.get("timings", {}), "spawn": time.time() - start_time}
+        self._logger.info(f"Sim server {process.pid} ready after {self._startup_timings['spawn']:.1f}s")
+        return process
+
+    async def _read_response(self, timeout: float | None) -> dict[str, Any]:
+        assert self._process is not None and self._process.stdout is not None
+        try:
+            line = await asyncio.wait_for(self._process.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            raise SimServerError(f"Sim server {self._process.pid} didn't respond within {timeout}s") from None
+        if not line:
+            returncode = await self._process.wait()
+            raise SimServerError(f"Sim server {self._process.pid} exited with code {returncode}")
+        return json.loads(line)
+
+    async def _kill(self) -> None:
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            self._logger.info(f"Stopping sim server {process.pid}")
+            await _kill_process_group(process)
+
+    async def run(self, overrides: list[str]) -> SimTaskResult:
+        """
+        Runs one tools/sim.py job, given its hydra overrides, in the server process, starting one if needed.
+
+        The first task run by each server process also reports the process's startup timings.
+
+        Raises:
+            SimServerStartError: If a server process is needed and doesn't start
+            SimServerError: If the task fails, times out, or the server process dies
+        """
+        process = self._process
+        if process is None or process.returncode is not None:
+            process = await self._start()
+        assert process.stdin is not None
+
+        request_id = str(uuid.uuid4())
+        try:
+            process.stdin.write((json.dumps({"id": request_id, "overrides": overrides}) + "\n").encode())
+            await process.stdin.drain()
+            response = await self._read_response(self._task_timeout)
+        except (SimServerError, ConnectionError) as e:
+            # The process is hung or gone, and its state can't be trusted, so the next task gets a fresh one
+            await self._kill()
+            raise SimServerError(f"Sim server failed: {e}") from e
+        except BaseException:
+            await self._kill()
+            raise
+
+        if response.get("id") != request_id:
+            await self._kill()
+            raise SimServerError(f"Sim server responded to {response.get('id')} instead of {request_id}")
+
+        if response.get("exiting"):
+            await self._kill()
+
+        timings = response.get("timings", {})
+        if self._startup_timings is not None:
+            timings = {**{f"startup_{name}": t for name, t in self._startup_timings.items()}, **timings}
+            self._startup_timings = None
+        self._logger.info(f"Sim task timings: {', '.join(f'{name}={t:.2f}s' for name, t in timings.items())}")
+
+        if not response["ok"]:
+            raise SimServerError(f"sim task failed: {response['error']}")
+        return SimTaskResult(results=response["results"], timings=timings)
+
+    async def close(self) -> None:
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        assert process.stdin is not None
+        # The server exits once its stdin closes
+        process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), 10.0)
+        except asyncio.TimeoutError:
+            await _kill_process_group(process)
@@ -1,3 +1,4 @@
+import time
 import uuid
 from typing import Any, Dict, List, Optional
 
@@ -5,6 +6,7 @@ import httpx
 from pydantic import BaseModel
 
 from metta.app_backend.routes.stats_routes import (
+    EpisodeBatchCreate,
     EpisodeCreate,
     EpochCreate,
     PolicyCreate,
@@ -267,3 +269,93 @@ class StatsClient:
         response_data = response.json()
         episode_id_uuid = uuid.UUID(response_data["id"])
         return ClientEpisodeResponse(id=episode_id_uuid)
+
+    def record_episodes(self, episodes: List[EpisodeCreate], max_retries: int = 3) -> List[uuid.UUID]:
+        """
+        Record a batch of episodes in one request.
+
+        Failed requests (connection errors and server errors) are retried up to max_retries times. Episodes carry
+        idempotency keys, so the server records each of them once however many times the batch is sent.
+
+        Returns:
+            The episodes' UUIDs, in order
+
+        Raises:
+            httpx.HTTPStatusError: If the request fails
+        """
+        data = EpisodeBatchCreate(episodes=episodes)
+        headers = {"X-Auth-Token": self.machine_token}
+        for attempt in range(max_retries + 1):
+            try:
+                response = self.http_client.post("/stats/episodes/bulk", json=data.model_dump(), headers=headers)
+                response.raise_for_status()
+                break
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500
+                if not retryable or attempt == max_retries:
+                    raise
+                time.sleep(0.5 * 2**attempt)
+
+        return [uuid.UUID(episode_id) for episode_id in response.json()["ids"]]
+
+
+class EpisodeBatcher:
+    """
+    Buffers episodes and records them with StatsClient.record_episodes, chunk_size at a time.
+
+    add() takes the same arguments as StatsClient.record_episode. Call flush() once all episodes are added.
+
+    A chunk whose request fails (after record_episodes' retries) is dropped, and add() or flush() raises the error,
+    so the buffer never holds more than one chunk and an unreachable server doesn't hold up the caller for longer
+    than one request per chunk.
+    """
+
+    def __init__(self, stats_client: StatsClient, chunk_size: int = 200):
+        self._stats_client = stats_client
+        self._chunk_size = chunk_size
+        self._buffer: List[EpisodeCreate] = []
+        self._episode_ids: List[uuid.UUID] = []
+
+    def add(
+        self,
+        agent_policies: Dict[int, uuid.UUID],
+        agent_metrics: Dict[int, Dict[str, float]],
+        primary_policy_id: uuid.UUID,
+        stats_epoch: Optional[uuid.UUID] = None,
+        eval_name: Optional[str] = None,
+        simulation_suite: Optional[str] = None,
+        replay_url: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        eval_task_id: Optional[uuid.UUID] = None,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+        self._buffer.append(
+            EpisodeCreate(
+                agent_policies={agent_id: str(policy_id) for agent_id, policy_id in agent_policies.items()},
+                agent_metrics=agent_metrics,
+                primary_policy_id=str(primary_policy_id),
+                stats_epoch=str(stats_epoch) if stats_epoch else None,
+                eval_name=eval_name,
+                simulation_suite=simulation_suite,
+                replay_url=replay_url,
+                attributes=attributes or {},
+                eval_task_id=str(eval_task_id) if eval_task_id else None,
+                tags=tags,
+                idempotency_key=str(uuid.uuid4()),
+            )
+        )
+        if len(self._buffer) >= self._chunk_size:
+            self._send()
+
+    def flush(self) -> List[uuid.UUID]:
+        """
+        Record any buffered episodes. Returns the UUIDs of every episode recorded so far, in the order added,
+        leaving out those of dropped chunks.
+        """
+        if self._buffer:
+            self._send()
+        return list(self._episode_ids)
+
+    def _send(self) -> None:
+        chunk, self._buffer = self._buffer, []
+        self._episode_ids.extend(self._stats_client.record_episodes(chunk))
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import uuid
 
 import pytest
@@ -6,7 +8,7 @@ from fastapi.testclient import TestClient
 from httpx import ASGITransport, AsyncClient
 
 from metta.app_backend.eval_task_client import EvalTaskClient
-from metta.app_backend.metta_repo import MettaRepo
+from metta.app_backend.metta_repo import EVAL_TASK_CHANGES_CHANNEL, EvalTaskChangeListener, MettaRepo
 from metta.app_backend.routes.eval_task_routes import (
     TaskClaimRequest,
     TaskCreateRequest,
@@ -390,3 +392,99 @@ class TestEvalTaskRoutes:
             assert row is not None, f"Task {task_id} not found in database"
             assert row[0] == "error"
             assert row[1]["error_reason"] == error_reason
+
+    async def _latest_cursor(self, eval_task_client: EvalTaskClient, assignee: str | None = None) -> int:
+        """Waits until tasks stop changing, and returns the latest change's number."""
+        changes = await eval_task_client.wait_for_task_changes(assignee=assignee)
+        while changes.changed:
+            changes = await eval_task_client.wait_for_task_changes(since=changes.cursor, assignee=assignee, timeout=0.5)
+        return changes.cursor
+
+    @pytest.mark.asyncio
+    async def test_wait_for_task_changes_wakes_on_new_task(
+        self, eval_task_client: EvalTaskClient, test_policy_id: uuid.UUID
+    ):
+        """Test that a long-poll for task changes returns once a task is created."""
+        cursor = await self._latest_cursor(eval_task_client)
+
+        waiter = asyncio.create_task(eval_task_client.wait_for_task_changes(since=cursor, timeout=20))
+        await asyncio.sleep(0.5)
+        assert not waiter.done()
+
+        await eval_task_client.create_task(TaskCreateRequest(policy_id=test_policy_id, git_hash="long_poll_hash"))
+        changes = await asyncio.wait_for(waiter, 10)
+        assert changes.changed
+        assert changes.cursor > cursor
+
+    @pytest.mark.asyncio
+    async def test_wait_for_task_changes_wakes_on_out_of_order_change(
+        self, eval_task_client: EvalTaskClient, stats_repo: MettaRepo
+    ):
+        """Test that a change committed after later changes were seen still wakes up waiters."""
+        cursor = await self._latest_cursor(eval_task_client)
+
+        waiter = asyncio.create_task(eval_task_client.wait_for_task_changes(since=cursor, timeout=20))
+        await asyncio.sleep(0.5)
+        assert not waiter.done()
+
+        # As sent by a transaction that made its change before every change seen so far, but committed after them
+        async with stats_repo.connect() as con:
+            await con.execute("SELECT pg_notify(%s, %s)", (EVAL_TASK_CHANGES_CHANNEL, json.dumps({"assignee": None})))
+        changes = await asyncio.wait_for(waiter, 10)
+        assert changes.changed
+
+    @pytest.mark.asyncio
+    async def test_wait_for_task_changes_with_unknown_cursor(self, eval_task_client: EvalTaskClient):
+        """Test that a cursor from another server process returns at once, with a cursor to wait from instead."""
+        cursor = await self._latest_cursor(eval_task_client)
+
+        changes = await eval_task_client.wait_for_task_changes(since=cursor + 1000, timeout=20)
+        assert changes.changed
+        assert changes.cursor == cursor
+
+    @pytest.mark.asyncio
+    async def test_wait_for_task_changes_times_out(self, eval_task_client: EvalTaskClient):
+        """Test that a long-poll with no task changes returns after its timeout."""
+        cursor = await self._latest_cursor(eval_task_client)
+
+        changes = await eval_task_client.wait_for_task_changes(since=cursor, timeout=0.5)
+        assert not changes.changed
+        assert changes.cursor == cursor
+
+    @pytest.mark.asyncio
+    async def test_wait_for_task_changes_by_assignee(self, eval_task_client: EvalTaskClient, test_policy_id: uuid.UUID):
+        """Test that a worker's long-poll only returns for tasks assigned to it."""
+        task = await eval_task_client.create_task(
+            TaskCreateRequest(policy_id=test_policy_id, git_hash="long_poll_assignee_hash")
+        )
+        cursor_a = await self._latest_cursor(eval_task_client, assignee="long_poll_worker_a")
+        cursor_b = await self._latest_cursor(eval_task_client, assignee="long_poll_worker_b")
+
+        waiter_a = asyncio.create_task(
+            eval_task_client.wait_for_task_changes(since=cursor_a, assignee="long_poll_worker_a", timeout=20)
+        )
+        waiter_b = asyncio.create_task(
+            eval_task_client.wait_for_task_changes(since=cursor_b, assignee="long_poll_worker_b", timeout=2)
+        )
+        await asyncio.sleep(0.5)
+
+        await eval_task_client.claim_tasks(TaskClaimRequest(tasks=[task.id], assignee="long_poll_worker_a"))
+        changes_a = await asyncio.wait_for(waiter_a, 10)
+        changes_b = await asyncio.wait_for(waiter_b, 10)
+        assert changes_a.changed
+        assert not changes_b.changed
+
+
+def test_task_change_listener_drops_oldest_assignees():
+    """Test that only the latest assignees are tracked, and that waiters for dropped ones still see their changes."""
+    listener = EvalTaskChangeListener("postgresql://unused", max_assignees=2)
+    since = listener._cursor
+    for assignee in ["worker_a", "worker_b", "worker_a", "worker_c"]:
+        listener._cursor += 1
+        listener._record_assignee_change(assignee)
+
+    assert list(listener._cursor_by_assignee) == ["worker_a", "worker_c"]
+    assert listener._changed_since(since, "worker_b")
+    assert not listener._changed_since(since + 2, "worker_b")
+    assert listener._changed_since(since + 2, "worker_a")
+    assert not listener._changed_since(since + 3, "worker_d")
@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 from testcontainers.postgres import PostgresContainer
 
 from metta.app_backend.metta_repo import MettaRepo
+from metta.app_backend.routes.stats_routes import EpisodeCreate
 from metta.app_backend.server import create_app
 from metta.app_backend.stats_client import StatsClient
 
@@ -2315,6 +2316,69 @@ class TestPolicyHeatmapRoutes:
         assert actual_avg > 200000.0  # Much larger than the other values
         assert actual_avg < 1000000.0  # But less than the max value
 
+    def test_heatmap_aggregates_follow_episode_ingestion(
+        self, test_client: TestClient, stats_client: StatsClient
+    ) -> None:
+        """Test that heatmap values are kept up to date as episodes are recorded, singly and in batches."""
+        test_data = self._create_test_data(stats_client, "incremental_aggregates", num_policies=1)
+        policy = test_data["policies"][0]
+        policy_name = test_data["policy_names"][0]
+        epoch = test_data["epochs"][0]
+        eval_name = f"incremental_suite_{int(time.time() * 1000000)}/env"
+
+        def get_cell() -> Dict[str, Any]:
+            response = test_client.post(
+                "/heatmap/heatmap",
+                json={
+                    "training_run_ids": [str(test_data["training_run"].id)],
+                    "run_free_policy_ids": [],
+                    "eval_names": [eval_name],
+                    "metric": "reward",
+                },
+            )
+            assert response.status_code == 200
+            return response.json()["cells"][policy_name][eval_name]
+
+        stats_client.record_episode(
+            agent_policies={0: policy.id},
+            agent_metrics={0: {"reward": 10.0}},
+            primary_policy_id=policy.id,
+            stats_epoch=epoch.id,
+            eval_name=eval_name,
+            replay_url="https://example.com/replay/first",
+        )
+        assert get_cell() == {"evalName": eval_name, "replayUrl": "https://example.com/replay/first", "value": 10.0}
+
+        # Two agents per episode: (10 + 20 + 20 + 30 + 30) / 5
+        episodes = [
+            EpisodeCreate(
+                agent_policies={0: str(policy.id), 1: str(policy.id)},
+                agent_metrics={0: {"reward": reward}, 1: {"reward": reward}},
+                primary_policy_id=str(policy.id),
+                stats_epoch=str(epoch.id),
+                eval_name=eval_name,
+                replay_url=f"https://example.com/replay/{reward}",
+                idempotency_key=f"{eval_name}/{reward}",
+            )
+            for reward in [20.0, 30.0]
+        ]
+        stats_client.record_episodes(episodes)
+        assert get_cell() == {"evalName": eval_name, "replayUrl": "https://example.com/replay/30.0", "value": 22.0}
+
+        # Episodes already recorded by a retried batch aren't counted again
+        stats_client.record_episodes(episodes)
+        assert get_cell()["value"] == 22.0
+
+        metrics_response = test_client.post(
+            "/heatmap/metrics",
+            json={
+                "training_run_ids": [str(test_data["training_run"].id)],
+                "run_free_policy_ids": [],
+                "eval_names": [eval_name],
+            },
+        )
+        assert metrics_response.json() == ["reward"]
+
 
 if __name__ == "__main__":
     # Simple test runner for debugging
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from metta.app_backend.sim_server_process import SimServerError, SimServerProcess, SimServerStartError
+
+# Stands in for tools/sim_server.py, and behaves according to each task's overrides
+FAKE_SIM_SERVER = textwrap.dedent(
+    """
+    import json
+    import os
+    import sys
+    import time
+
+    print(json.dumps({"ready": True, "timings": {"startup": 1.5}}), flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        overrides = request["overrides"]
+        if "crash" in overrides:
+            os._exit(3)
+        if "hang" in overrides:
+            time.sleep(60)
+        response = {"id": request["id"], "ok": True, "results": {"pid": os.getpid()}, "error": None}
+        if "fail" in overrides:
+            response.update(ok=False, results=None, error="ValueError: bad policy")
+        response.update(timings={"total": 0.5}, exiting=False)
+        print(json.dumps(response), flush=True)
+    """
+)
+
+
+@pytest.fixture
+def server_cmd(tmp_path: Path) -> list[str]:
+    script = tmp_path / "fake_sim_server.py"
+    script.write_text(FAKE_SIM_SERVER)
+    return [sys.executable, str(script)]
+
+
+def is_running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Killed processes whose parent has gone may be left as zombies until they're reaped
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+class TestSimServerProcess:
+    @pytest.mark.asyncio
+    async def test_tasks_share_one_process(self, server_cmd):
+        async with SimServerProcess(server_cmd, task_timeout=10) as server:
+            first = await server.run(["sim=navigation"])
+            second = await server.run(["sim=memory"])
+
+        assert first.results["pid"] == second.results["pid"]
+        # Only the first task includes the process's startup
+        assert set(first.timings) == {"startup_startup", "startup_spawn", "total"}
+        assert second.timings == {"total": 0.5}
+
+    @pytest.mark.asyncio
+    async def test_failed_task_keeps_the_process(self, server_cmd):
+        async with SimServerProcess(server_cmd, task_timeout=10) as server:
+            before = await server.run(["sim=navigation"])
+            with pytest.raises(SimServerError, match="bad policy"):
+                await server.run(["fail"])
+            after = await server.run(["sim=navigation"])
+
+        assert before.results["pid"] == after.results["pid"]
+
+    @pytest.mark.parametrize("overrides", [["crash"], ["hang"]])
+    @pytest.mark.asyncio
+    async def test_crashed_or_hung_process_is_replaced(self, server_cmd, overrides):
+        async with SimServerProcess(server_cmd, task_timeout=1) as server:
+            before = await server.run(["sim=navigation"])
+            with pytest.raises(SimServerError):
+                await server.run(overrides)
+            after = await server.run(["sim=navigation"])
+
+        assert before.results["pid"] != after.results["pid"]
+        assert "startup_spawn" in after.timings
+
+    @pytest.mark.asyncio
+    async def test_server_that_doesnt_start(self):
+        async with SimServerProcess([sys.executable, "-c", "import sys; sys.exit(1)"]) as server:
+            with pytest.raises(SimServerStartError):
+                await server.run(["sim=navigation"])
+
+    @pytest.mark.skipif(not os.path.exists("/proc"), reason="needs /proc to check for the server process")
+    @pytest.mark.asyncio
+    async def test_hung_process_is_killed_with_its_launcher(self, server_cmd):
+        # Like `uv run`, a launcher that runs the server as its own child
+        launcher = "import subprocess, sys; sys.exit(subprocess.call(sys.argv[1:]))"
+        async with SimServerProcess([sys.executable, "-c", launcher, *server_cmd], task_timeout=1) as server:
+            server_pid = (await server.run(["sim=navigation"])).results["pid"]
+            with pytest.raises(SimServerError):
+                await server.run(["hang"])
+
+        for _ in range(50):
+            if not is_running(server_pid):
+                break
+            await asyncio.sleep(0.1)
+        assert not is_running(server_pid)
@@ -1,10 +1,12 @@
 import uuid
-from typing import List
+from typing import Dict, List
 
 import pytest
 from fastapi.testclient import TestClient
+from httpx import HTTPStatusError
 
-from metta.app_backend.stats_client import StatsClient
+from metta.app_backend.routes.stats_routes import EpisodeCreate
+from metta.app_backend.stats_client import EpisodeBatcher, StatsClient
 
 
 class TestStatsServerSimple:
@@ -106,6 +108,109 @@ class TestStatsServerSimple:
         # Verify all episodes have different IDs
         assert len(set(episode_ids)) == 5
 
+    def test_record_episodes_batch_is_idempotent(
+        self, stats_client: StatsClient, test_client: TestClient, auth_headers: Dict[str, str]
+    ) -> None:
+        """Test that resending a batch of episodes doesn't record them twice."""
+        training_run = stats_client.create_training_run(name="bulk_episode_test")
+        epoch = stats_client.create_epoch(run_id=training_run.id, start_training_epoch=0, end_training_epoch=10)
+        policy = stats_client.create_policy(name="bulk_episode_policy", epoch_id=epoch.id)
+
+        episodes = [
+            EpisodeCreate(
+                agent_policies={0: str(policy.id), 1: str(policy.id)},
+                agent_metrics={0: {"reward": float(i)}, 1: {"reward": float(i), "steps": 10.0}},
+                primary_policy_id=str(policy.id),
+                stats_epoch=str(epoch.id),
+                eval_name="bulk_eval",
+                attributes={"index": i},
+                tags=["bulk", "bulk"],
+                idempotency_key=f"bulk_episode_{i}",
+            )
+            for i in range(3)
+        ]
+        episode_ids = stats_client.record_episodes(episodes)
+        assert len(set(episode_ids)) == 3
+
+        # A retried batch, with one episode already recorded, returns the same IDs in order
+        new_episode = episodes[0].model_copy(update={"idempotency_key": "bulk_episode_3"})
+        retried_ids = stats_client.record_episodes([*episodes, new_episode])
+        assert retried_ids[:3] == episode_ids
+        assert retried_ids[3] not in episode_ids
+
+        response = test_client.post(
+            "/sql/query",
+            json={
+                "query": f"""SELECT COUNT(*) FROM episode_agent_metrics eam
+                    JOIN episodes e ON e.internal_id = eam.episode_internal_id
+                    WHERE e.id = '{episode_ids[0]}'"""
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["rows"] == [[3]]
+
+    def test_record_episodes_rejects_duplicate_keys(self, stats_client: StatsClient) -> None:
+        """Test that a batch can't contain the same idempotency key twice."""
+        training_run = stats_client.create_training_run(name="duplicate_key_test")
+        epoch = stats_client.create_epoch(run_id=training_run.id, start_training_epoch=0, end_training_epoch=10)
+        policy = stats_client.create_policy(name="duplicate_key_policy", epoch_id=epoch.id)
+
+        episode = EpisodeCreate(
+            agent_policies={0: str(policy.id)},
+            agent_metrics={0: {"reward": 1.0}},
+            primary_policy_id=str(policy.id),
+            idempotency_key="duplicate_key",
+        )
+        with pytest.raises(HTTPStatusError):
+            stats_client.record_episodes([episode, episode])
+
+    def test_episode_batcher_records_in_chunks(self, stats_client: StatsClient) -> None:
+        """Test that the batcher records every episode added, a chunk at a time."""
+        training_run = stats_client.create_training_run(name="batcher_test")
+        epoch = stats_client.create_epoch(run_id=training_run.id, start_training_epoch=0, end_training_epoch=10)
+        policy = stats_client.create_policy(name="batcher_policy", epoch_id=epoch.id)
+
+        batcher = EpisodeBatcher(stats_client, chunk_size=2)
+        for i in range(5):
+            batcher.add(
+                agent_policies={0: policy.id},
+                agent_metrics={0: {"reward": float(i)}},
+                primary_policy_id=policy.id,
+                stats_epoch=epoch.id,
+                eval_name=f"batched_episode_{i}",
+            )
+        episode_ids = batcher.flush()
+        assert len(set(episode_ids)) == 5
+
+    def test_episode_batcher_drops_failed_chunks(self) -> None:
+        """Test that a chunk that fails to send is dropped, rather than resent with every later add()."""
+
+        class FlakyStatsClient:
+            def __init__(self) -> None:
+                self.sent: List[int] = []
+
+            def record_episodes(self, episodes: List[EpisodeCreate]) -> List[uuid.UUID]:
+                self.sent.append(len(episodes))
+                if len(self.sent) == 1:
+                    raise HTTPStatusError("server unavailable", request=None, response=None)  # type: ignore[arg-type]
+                return [uuid.uuid4() for _ in episodes]
+
+        stats_client = FlakyStatsClient()
+        batcher = EpisodeBatcher(stats_client, chunk_size=2)  # type: ignore[arg-type]
+        policy_id = uuid.uuid4()
+        for i in range(5):
+            try:
+                batcher.add(
+                    agent_policies={0: policy_id}, agent_metrics={0: {"reward": float(i)}}, primary_policy_id=policy_id
+                )
+            except HTTPStatusError:
+                assert i == 1
+        episode_ids = batcher.flush()
+
+        assert stats_client.sent == [2, 2, 1]
+        assert len(episode_ids) == 3
+
     def test_policy_id_lookup_empty(self, stats_client: StatsClient) -> None:
         """Test policy ID lookup with empty list."""
         policy_ids = stats_client.get_policy_ids([])
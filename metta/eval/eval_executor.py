@@ -0,0 +1,149 @@
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import torch
+from omegaconf import DictConfig, OmegaConf
+
+from metta.agent.policy_record import PolicyRecord
+from metta.agent.policy_store import PolicyStore
+from metta.common.util.stats_client_cfg import get_stats_client_direct
+from metta.eval.eval_request_config import EvalResults
+from metta.eval.eval_service import evaluate_policy
+from metta.sim.simulation_config import SimulationSuiteConfig
+
+logger = logging.getLogger("eval_executor")
+
+
+@dataclass
+class EvalJob:
+    """Everything a worker process needs to evaluate one saved policy."""
+
+    policy_uri: str
+    simulation_suite: SimulationSuiteConfig
+    cfg: dict[str, Any]
+    replay_dir: str | None
+    stats_server_uri: str | None
+    stats_epoch_id: uuid.UUID | None
+    wandb_policy_name: str | None
+
+
+@dataclass
+class PendingEval:
+    """An evaluation that was submitted at `epoch`, for the policy saved then."""
+
+    epoch: int
+    agent_step: int
+    policy_record: PolicyRecord
+    future: Future[EvalResults]
+
+
+def run_eval_job(job: EvalJob) -> EvalResults:
+    """Evaluates a saved policy on the CPU. Runs in a worker process."""
+    cfg = OmegaConf.create(job.cfg)
+    cfg.device = "cpu"
+    policy_store = PolicyStore(cfg, wandb_run=None)
+    stats_client = get_stats_client_direct(job.stats_server_uri, logger)
+    try:
+        return evaluate_policy(
+            policy_record=policy_store.policy_record(job.policy_uri),
+            simulation_suite=job.simulation_suite,
+            device=torch.device("cpu"),
+            # The worker's threads are its whole CPU budget, so it runs its envs in-process
+            vectorization="serial",
+            replay_dir=job.replay_dir,
+            stats_epoch_id=job.stats_epoch_id,
+            wandb_policy_name=job.wandb_policy_name,
+            policy_store=policy_store,
+            stats_client=stats_client,
+            logger=logger,
+        )
+    finally:
+        if stats_client is not None:
+            stats_client.close()
+
+
+def _init_worker(num_threads: int) -> None:
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    torch.set_num_threads(num_threads)
+    logging.basicConfig(level=logging.INFO)
+
+
+class EvalExecutor:
+    """
+    Evaluates saved policies in a pool of worker processes, so that the trainer keeps training while they run.
+
+    Each of the `num_workers` processes runs one evaluation at a time on the CPU, with `num_threads` torch threads,
+    so evaluations use at most num_workers * num_threads cores. The trainer polls completed() each epoch and handles
+    the results of evaluations that finished, in the order they were submitted, along with the epoch each was
+    submitted at.
+    """
+
+    def __init__(
+        self,
+        cfg: DictConfig,
+        num_workers: int = 1,
+        num_threads: int = 2,
+        run_job: Callable[[EvalJob], EvalResults] = run_eval_job,
+    ):
+        self._cfg = OmegaConf.to_container(cfg, resolve=True)
+        self._stats_server_uri = cfg.get("stats_server_uri", None)
+        self._run_job = run_job
+        # Workers are spawned rather than forked, since the trainer has CUDA and env threads running
+        self._pool = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(num_threads,),
+        )
+        self._pending: list[PendingEval] = []
+
+    def submit(
+        self,
+        *,
+        epoch: int,
+        agent_step: int,
+        policy_record: PolicyRecord,
+        simulation_suite: SimulationSuiteConfig,
+        replay_dir: str | None,
+        stats_epoch_id: uuid.UUID | None,
+        wandb_policy_name: str | None,
+    ) -> None:
+        """Start evaluating `policy_record`, which must already be saved to its URI."""
+        job = EvalJob(
+            policy_uri=policy_record.uri,
+            simulation_suite=simulation_suite,
+            cfg=self._cfg,  # type: ignore[arg-type]
+            replay_dir=replay_dir,
+            stats_server_uri=self._stats_server_uri,
+            stats_epoch_id=stats_epoch_id,
+            wandb_policy_name=wandb_policy_name,
+        )
+        future = self._pool.submit(self._run_job, job)
+        self._pending.append(PendingEval(epoch, agent_step, policy_record, future))
+        logger.info(f"Submitted evaluation of {policy_record.uri} ({len(self._pending)} pending)")
+
+    @property
+    def num_pending(self) -> int:
+        return len(self._pending)
+
+    def completed(self) -> list[PendingEval]:
+        """Evaluations that have finished since the last call, in submission order. Their futures are done."""
+        done = []
+        while self._pending and self._pending[0].future.done():
+            done.append(self._pending.pop(0))
+        return done
+
+    def wait(self) -> list[PendingEval]:
+        """Waits for every pending evaluation, and returns them."""
+        for pending in self._pending:
+            pending.future.exception()
+        return self.completed()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pending.clear()
@@ -95,7 +95,7 @@ class MapGen(LevelBuilder):
             )
             single_instance_scene = make_scene(self.root, single_instance_area, rng=self.rng)
             single_instance_scene.render_with_children()
-            single_instance_num_agents = int(np.count_nonzero(np.char.startswith(single_instance_grid, "agent")))
+            single_instance_num_agents = Level(single_instance_grid, []).count_agents()
             if self.num_agents % single_instance_num_agents != 0:
                 raise ValueError(
                     f"Number of agents {self.num_agents} is not divisible by number of agents in a single instance"
@@ -0,0 +1,126 @@
+import copy
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import torch
+from torch import nn
+
+logger = logging.getLogger("AsyncCheckpointer")
+
+T = TypeVar("T")
+
+
+class HostSnapshot:
+    """
+    Copies tensors off the device for a background write.
+
+    Device tensors are copied into pinned host memory without blocking, so taking a snapshot costs the training thread
+    about as much as launching the copies. wait() blocks until the copies are done, and is called by the writer thread
+    before it touches the snapshot.
+    """
+
+    def __init__(self):
+        self._ready: torch.cuda.Event | None = None
+
+    def tensor(self, tensor: torch.Tensor) -> torch.Tensor:
+        tensor = tensor.detach()
+        if tensor.device.type != "cuda":
+            return tensor.to("cpu", copy=True)
+        host = torch.empty_like(tensor, device="cpu", pin_memory=True)
+        host.copy_(tensor, non_blocking=True)
+        if self._ready is None:
+            self._ready = torch.cuda.Event()
+        return host
+
+    def state(self, state: T) -> T:
+        """A copy of a (nested dict/list/tuple) state dict with its tensors on the host."""
+        if isinstance(state, torch.Tensor):
+            return self.tensor(state)  # type: ignore[return-value]
+        if isinstance(state, dict):
+            return type(state)((key, self.state(value)) for key, value in state.items())  # type: ignore[return-value]
+        if isinstance(state, (list, tuple)):
+            return type(state)(self.state(value) for value in state)  # type: ignore[return-value]
+        return state
+
+    def module(self, module: nn.Module) -> nn.Module:
+        """A copy of `module` whose parameters and buffers are on the host. Gradients aren't copied."""
+        memo: dict[int, Any] = {}
+        for param in module.parameters():
+            memo[id(param)] = nn.Parameter(self.tensor(param), requires_grad=param.requires_grad)
+        for buffer in module.buffers():
+            memo[id(buffer)] = self.tensor(buffer)
+        return copy.deepcopy(module, memo)
+
+    def taken(self) -> "HostSnapshot":
+        """Marks the end of the snapshot's copies. Call this before handing the snapshot to another thread."""
+        if self._ready is not None:
+            self._ready.record()
+        return self
+
+    def wait(self) -> None:
+        if self._ready is not None:
+            self._ready.synchronize()
+
+
+class AsyncCheckpointer:
+    """
+    Runs checkpoint writes on a background thread, so that the training thread doesn't wait on the disk.
+
+    Writes run one at a time, in the order they were submitted, so a training state that points at a policy is never
+    on disk before that policy. At most `max_pending` writes are in flight; submitting another first waits for the
+    oldest. With max_pending=0 every write runs on the calling thread. A write that fails raises on the training
+    thread the next time a write is submitted or waited on.
+    """
+
+    def __init__(self, max_pending: int = 2):
+        self._max_pending = max_pending
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpointer") if max_pending > 0 else None
+        )
+        self._pending: deque[tuple[str, Future]] = deque()
+
+    def submit(self, name: str, snapshot: HostSnapshot, write: Callable[[], Any]) -> None:
+        """Write a checkpoint (described by `name`, for logging) once `snapshot`'s copies are done."""
+        snapshot.taken()
+
+        def run():
+            snapshot.wait()
+            write()
+
+        if self._executor is None:
+            run()
+            return
+
+        self._reap()
+        while len(self._pending) >= self._max_pending:
+            self._wait_oldest()
+        self._pending.append((name, self._executor.submit(run)))
+
+    def wait(self) -> None:
+        """Block until every submitted write is on disk."""
+        while self._pending:
+            self._wait_oldest()
+
+    @property
+    def num_pending(self) -> int:
+        self._reap()
+        return len(self._pending)
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+
+    def _wait_oldest(self) -> None:
+        name, future = self._pending.popleft()
+        if not future.done():
+            logger.info(f"Waiting for checkpoint write: {name}")
+        future.result()
+
+    def _reap(self) -> None:
+        while self._pending and self._pending[0][1].done():
+            self._wait_oldest()
@@ -1,38 +1,83 @@
+import torch
+from torch import Tensor
+
+# Loss terms tracked by Losses, in the order they're stored in its sums tensor.
+LOSS_NAMES = (
+    "policy_loss",
+    "value_loss",
+    "entropy",
+    "approx_kl",
+    "clipfrac",
+    "l2_reg_loss",
+    "l2_init_loss",
+    "ks_action_loss",
+    "ks_value_loss",
+    "importance",
+    "current_logprobs",
+)
+
+
+def _sum_property(index: int) -> property:
+    def get(self: "Losses") -> float:
+        return self._host_sums()[index]
+
+    def set(self: "Losses", value: float) -> None:
+        self._sums[index] = value
+        self._host = None
+
+    return property(get, set)
+
+
 class Losses:
+    """
+    Running sums of the loss terms over the minibatches of a training step.
+
+    The sums live in one tensor on the loss terms' device, so accumulate() never waits on the device. Reading a sum
+    (or stats()) copies them all to the host in a single sync, which is cached until the next accumulate().
+    """
+
     def __init__(self):
+        self._sums = torch.zeros(len(LOSS_NAMES), dtype=torch.float32)
         self.zero()
 
     def zero(self):
         """Reset all loss values to 0.0"""
-        self.policy_loss_sum = 0.0
-        self.value_loss_sum = 0.0
-        self.entropy_sum = 0.0
-        self.approx_kl_sum = 0.0
-        self.clipfrac_sum = 0.0
-        self.l2_reg_loss_sum = 0.0
-        self.l2_init_loss_sum = 0.0
-        self.ks_action_loss_sum = 0.0
-        self.ks_value_loss_sum = 0.0
-        self.importance_sum = 0.0
-        self.current_logprobs_sum = 0.0
+        self._sums.zero_()
+        self._host: list[float] | None = None
         self.explained_variance = 0.0
         self.minibatches_processed = 0
 
+    def accumulate(self, **terms: Tensor) -> None:
+        """Add one minibatch's loss terms (scalar tensors, keyed by LOSS_NAMES) to the sums, without syncing."""
+        values = [terms[name].detach().float().reshape(()) if name in terms else None for name in LOSS_NAMES]
+        device = next(value.device for value in values if value is not None)
+        if self._sums.device != device:
+            self._sums = self._sums.to(device)
+        zero = self._sums.new_zeros(())
+        self._sums += torch.stack([zero if value is None else value for value in values])
+        self._host = None
+        self.minibatches_processed += 1
+
+    def _host_sums(self) -> list[float]:
+        if self._host is None:
+            self._host = self._sums.tolist()
+        return self._host
+
+    policy_loss_sum = _sum_property(LOSS_NAMES.index("policy_loss"))
+    value_loss_sum = _sum_property(LOSS_NAMES.index("value_loss"))
+    entropy_sum = _sum_property(LOSS_NAMES.index("entropy"))
+    approx_kl_sum = _sum_property(LOSS_NAMES.index("approx_kl"))
+    clipfrac_sum = _sum_property(LOSS_NAMES.index("clipfrac"))
+    l2_reg_loss_sum = _sum_property(LOSS_NAMES.index("l2_reg_loss"))
+    l2_init_loss_sum = _sum_property(LOSS_NAMES.index("l2_init_loss"))
+    ks_action_loss_sum = _sum_property(LOSS_NAMES.index("ks_action_loss"))
+    ks_value_loss_sum = _sum_property(LOSS_NAMES.index("ks_value_loss"))
+    importance_sum = _sum_property(LOSS_NAMES.index("importance"))
+    current_logprobs_sum = _sum_property(LOSS_NAMES.index("current_logprobs"))
+
     def stats(self) -> dict[str, float]:
         """Convert losses to dictionary with proper averages"""
         n = max(1, self.minibatches_processed)
-
-        return {
-            "policy_loss": self.policy_loss_sum / n,
-            "value_loss": self.value_loss_sum / n,
-            "entropy": self.entropy_sum / n,
-            "approx_kl": self.approx_kl_sum / n,
-            "clipfrac": self.clipfrac_sum / n,
-            "l2_reg_loss": self.l2_reg_loss_sum / n,
-            "l2_init_loss": self.l2_init_loss_sum / n,
-            "ks_action_loss": self.ks_action_loss_sum / n,
-            "ks_value_loss": self.ks_value_loss_sum / n,
-            "importance": self.importance_sum / n,
-            "explained_variance": self.explained_variance,
-            "current_logprobs": self.current_logprobs_sum / n,
-        }
+        stats = {name: total / n for name, total in zip(LOSS_NAMES, self._host_sums(), strict=True)}
+        stats["explained_variance"] = self.explained_variance
+        return stats
@@ -25,11 +25,13 @@ from metta.common.util.fs import wait_for_file
 from metta.common.util.heartbeat import record_heartbeat
 from metta.common.util.system_monitor import SystemMonitor
 from metta.common.wandb.wandb_context import WandbRun
-from metta.eval.eval_request_config import EvalRewardSummary
+from metta.eval.eval_executor import EvalExecutor
+from metta.eval.eval_request_config import EvalResults, EvalRewardSummary
 from metta.eval.eval_service import evaluate_policy
 from metta.mettagrid.curriculum.util import curriculum_from_config_path
 from metta.mettagrid.mettagrid_config import PyPolicyGameConfig
 from metta.mettagrid.mettagrid_env import MettaGridEnv, dtype_actions
+from metta.rl.async_checkpointer import AsyncCheckpointer, HostSnapshot
 from metta.rl.experience import Experience
 from metta.rl.kickstarter import Kickstarter
 from metta.rl.losses import Losses
@@ -126,6 +128,14 @@ class MettaTrainer:
         self._minibatch_size = trainer_cfg.minibatch_size
 
         self.torch_profiler = TorchProfiler(self._master, trainer_cfg.profiler, wandb_run, cfg.run_dir)
+        self._checkpointer = AsyncCheckpointer(trainer_cfg.checkpoint.max_pending_saves)
+        self._eval_executor: EvalExecutor | None = None
+        if self._master and trainer_cfg.simulation.evaluate_async:
+            self._eval_executor = EvalExecutor(
+                cfg,
+                num_workers=trainer_cfg.simulation.eval_workers,
+                num_threads=trainer_cfg.simulation.eval_threads_per_worker,
+            )
         self.losses = Losses()
         self.stats = defaultdict(list)
         self.grad_stats = {}
@@ -386,6 +396,7 @@ class MettaTrainer:
             self._maybe_save_policy()
             self._maybe_save_training_state()
             wandb_policy_name = self._maybe_upload_policy_record_to_wandb()
+            self._collect_evaluations()
             self._maybe_evaluate_policy(wandb_policy_name)
             self._maybe_compute_grad_stats()
 
@@ -401,11 +412,16 @@ class MettaTrainer:
         # Force final saves
         self._maybe_save_policy(force=True)
         self._maybe_save_training_state(force=True)
+        self._checkpointer.wait()
+        # Synchronize all ranks so that none finishes before the final checkpoint is on disk
+        if torch.distributed.is_initialized():
+            torch.distributed.barrier()
         self._maybe_upload_policy_record_to_wandb(force=True)
 
         if self._stats_epoch_start < self.epoch:
             # If we have not just evaluated the latest policy, evaluate it
             self._maybe_evaluate_policy(force=True)
+        self._collect_evaluations(wait=True)
 
     def _on_train_step(self):
         pass
@@ -583,32 +599,30 @@ class MettaTrainer:
             if self.epoch % self.trainer_cfg.checkpoint.checkpoint_interval != 0:
                 return
 
-        # Now all ranks that should save are here
-        # Only master saves training state, but all ranks must participate in barrier
+        # Only master saves training state. Its write runs in the background, so the other ranks don't wait on it.
         if not self._master:
-            # Non-master ranks need to participate in the barrier below
-            if torch.distributed.is_initialized():
-                torch.distributed.barrier()
             return
 
         extra_args = {}
         if self.kickstarter.enabled and self.kickstarter.teacher_uri is not None:
             extra_args["teacher_pr_uri"] = self.kickstarter.teacher_uri
 
+        snapshot = HostSnapshot()
         checkpoint = TrainerCheckpoint(
             agent_step=self.agent_step,
             epoch=self.epoch,
-            optimizer_state_dict=self.optimizer.state_dict(),
+            optimizer_state_dict=snapshot.state(self.optimizer.state_dict()),
             stopwatch_state=self.timer.save_state(),
             policy_path=self.latest_saved_policy_uri,
             extra_args=extra_args,
         )
-        checkpoint.save(self.cfg.run_dir)
-        logger.info(f"Saved training state at epoch {self.epoch}")
+        epoch = self.epoch
 
-        # Synchronize all ranks to ensure the checkpoint is fully saved before continuing
-        if torch.distributed.is_initialized():
-            torch.distributed.barrier()
+        def write():
+            checkpoint.save(self.cfg.run_dir)
+            logger.info(f"Saved training state at epoch {epoch}")
+
+        self._checkpointer.submit(f"training state at epoch {epoch}", snapshot, write)
 
     def _maybe_save_policy(self, force=False):
         """Save policy locally if on checkpoint interval"""
@@ -617,12 +631,8 @@ class MettaTrainer:
             if self.epoch % self.trainer_cfg.checkpoint.checkpoint_interval != 0:
                 return
 
-        # Now all ranks that should save are here
-        # Only master saves policies, but all ranks must participate in barrier
+        # Only master saves policies. Its write runs in the background, so the other ranks don't wait on it.
         if not self._master:
-            # Non-master ranks need to participate in the barrier below
-            if torch.distributed.is_initialized():
-                torch.distributed.barrier()
             return
 
         name = self.policy_store.make_model_name(self.epoch)
@@ -663,22 +673,29 @@ class MettaTrainer:
                     f"Saving original_feature_mapping with {len(original_feature_mapping)} features to metadata"
                 )
 
-        # Create a policy record and assign our current policy to it
+        # Like the record PolicyStore.save() returns, the trainer's record doesn't hold the policy, so evaluations
+        # load their own copy from the file rather than using the policy being trained
         policy_record = self.policy_store.create_empty_policy_record(name)
         policy_record.metadata = metadata
-        policy_record.policy = policy_to_save
+        self.latest_saved_policy_record = policy_record
+        epoch = self.epoch
 
-        # Save the policy
-        self.latest_saved_policy_record = self.policy_store.save(policy_record)
-        logger.info(f"Successfully saved policy at epoch {self.epoch}")
+        # The file is written in the background while training continues, from a record of its own holding a host
+        # copy of the policy
+        snapshot = HostSnapshot()
+        snapshot_record = self.policy_store.create_empty_policy_record(name)
+        snapshot_record.metadata = metadata
+        snapshot_record.policy = snapshot.module(policy_to_save)
 
-        # Clean up old policies to prevent disk space issues
-        if self.epoch % 10 == 0:  # Clean up every 10 epochs
-            cleanup_old_policies(self.trainer_cfg.checkpoint.checkpoint_dir, keep_last_n=5)
+        def write():
+            self.policy_store.save(snapshot_record)
+            logger.info(f"Successfully saved policy at epoch {epoch}")
 
-        # Synchronize all ranks to ensure the policy is fully saved before continuing
-        if torch.distributed.is_initialized():
-            torch.distributed.barrier()
+            # Clean up old policies to prevent disk space issues
+            if epoch % 10 == 0:  # Clean up every 10 epochs
+                cleanup_old_policies(self.trainer_cfg.checkpoint.checkpoint_dir, keep_last_n=5)
+
+        self._checkpointer.submit(f"policy at epoch {epoch}", snapshot, write)
 
     def _maybe_upload_policy_record_to_wandb(self, force: bool = False) -> str | None:
         """Upload policy to wandb if on wandb interval"""
@@ -696,6 +713,8 @@ class MettaTrainer:
             logger.warning("No wandb run name was provided")
             return
 
+        # The upload reads the policy file, so its write has to have finished
+        self._checkpointer.wait()
         result = self.policy_store.add_to_wandb_run(self.wandb_run.name, self.latest_saved_policy_record)
         logger.info(f"Uploaded policy to wandb at epoch {self.epoch}")
         return result
@@ -718,6 +737,9 @@ class MettaTrainer:
 
     @with_instance_timer("_evaluate_policy", log_level=logging.INFO)
     def _evaluate_policy(self, wandb_policy_name: str | None = None):
+        # The simulations load the policy from its file, so its write has to have finished
+        self._checkpointer.wait()
+
         if self._stats_run_id is not None and self._stats_client is not None:
             self._stats_epoch_id = self._stats_client.create_epoch(
                 run_id=self._stats_run_id,
@@ -726,6 +748,19 @@ class MettaTrainer:
                 attributes={},
             ).id
 
+        if self._eval_executor is not None:
+            logger.info(f"Submitting policy for background evaluation: {self.latest_saved_policy_uri}")
+            self._eval_executor.submit(
+                epoch=self.epoch,
+                agent_step=self.agent_step,
+                policy_record=self.latest_saved_policy_record,
+                simulation_suite=self._sim_suite_config,
+                replay_dir=self.trainer_cfg.simulation.replay_dir,
+                stats_epoch_id=self._stats_epoch_id,
+                wandb_policy_name=wandb_policy_name,
+            )
+            return
+
         logger.info(f"Simulating policy: {self.latest_saved_policy_uri} with extended config including training task")
         evaluation_results = evaluate_policy(
             policy_record=self.latest_saved_policy_record,
@@ -740,6 +775,35 @@ class MettaTrainer:
             logger=logger,
         )
         logger.info("Simulation complete")
+        self._on_evaluation_complete(
+            self.epoch, self.agent_step, self.latest_saved_policy_record, evaluation_results, background=False
+        )
+
+    def _collect_evaluations(self, wait: bool = False):
+        """Handle the results of background evaluations that have finished (or, with wait, of all of them)"""
+        if self._eval_executor is None:
+            return
+
+        completed = self._eval_executor.wait() if wait else self._eval_executor.completed()
+        for pending in completed:
+            try:
+                evaluation_results = pending.future.result()
+            except Exception as e:
+                logger.error(f"Error evaluating policy from epoch {pending.epoch}: {e}")
+                continue
+            logger.info(f"Background evaluation of policy from epoch {pending.epoch} complete")
+            self._on_evaluation_complete(
+                pending.epoch, pending.agent_step, pending.policy_record, evaluation_results, background=True
+            )
+
+    def _on_evaluation_complete(
+        self,
+        epoch: int,
+        agent_step: int,
+        policy_record: PolicyRecord | None,
+        evaluation_results: EvalResults,
+        background: bool,
+    ):
         self.evals = evaluation_results.scores
 
         # Get target metric (for logging) from sweep config
@@ -747,18 +811,29 @@ class MettaTrainer:
         # In sweep_eval, we use the "score" entry in the policy metadata to select the best policy
         target_metric = getattr(self.cfg, "sweep", {}).get("metric", "reward")  # fallback to reward
         category_scores = list(self.evals.category_scores.values())
-        if category_scores and self.latest_saved_policy_record:
-            self.latest_saved_policy_record.metadata["score"] = float(np.mean(category_scores))
-            logger.info(
-                f"Set policy metadata score to "
-                f"{self.latest_saved_policy_record.metadata['score']} using {target_metric} metric"
-            )
+        if category_scores and policy_record:
+            policy_record.metadata["score"] = float(np.mean(category_scores))
+            logger.info(f"Set policy metadata score to {policy_record.metadata['score']} using {target_metric} metric")
+
+        if self.wandb_run is not None:
+            if background:
+                # Background evaluations finish epochs after the policy was saved, and wandb steps can't go back, so
+                # the scores are logged now along with the epoch and agent step of the policy they belong to.
+                # Synchronous scores are logged with the epoch's other stats instead.
+                self.wandb_run.log(
+                    {
+                        **{f"eval_{k}": v for k, v in self.evals.to_wandb_metrics_format().items()},
+                        "metric/eval_epoch": epoch,
+                        "metric/eval_agent_step": agent_step * self._world_size,
+                    },
+                    step=self.agent_step,
+                )
 
-        # Generate and upload replay HTML if we have wandb
-        if self.wandb_run is not None and evaluation_results.replay_urls:
-            self._upload_replay_html(evaluation_results.replay_urls)
+            # Generate and upload replay HTML
+            if evaluation_results.replay_urls:
+                self._upload_replay_html(evaluation_results.replay_urls, epoch)
 
-    def _upload_replay_html(self, replay_urls: dict[str, list[str]]):
+    def _upload_replay_html(self, replay_urls: dict[str, list[str]], epoch: int):
         """Upload replay HTML to wandb"""
         # Create unified HTML with all replay links on a single line
         if replay_urls:
@@ -794,9 +869,9 @@ class MettaTrainer:
                     links.append(f"{name} [{' '.join(episode_links)}]")
 
             # Join all links with " | " separator and add epoch prefix
-            html_content = f"epoch {self.epoch}: " + " | ".join(links)
+            html_content = f"epoch {epoch}: " + " | ".join(links)
         else:
-            html_content = f"epoch {self.epoch}: No replays available."
+            html_content = f"epoch {epoch}: No replays available."
 
         # Log the unified HTML with step parameter for wandb's epoch slider
         link_summary = {"replays/all_links": wandb.Html(html_content)}
@@ -806,9 +881,7 @@ class MettaTrainer:
         if "eval/training_task" in replay_urls and replay_urls["eval/training_task"]:
             training_url = replay_urls["eval/training_task"][0]  # Use first URL for backward compatibility
             player_url = "https://metta-ai.github.io/metta/?replayUrl=" + training_url
-            link_summary = {
-                "replays/link": wandb.Html(f'<a href="{player_url}">MetaScope Replay (Epoch {self.epoch})</a>')
-            }
+            link_summary = {"replays/link": wandb.Html(f'<a href="{player_url}">MetaScope Replay (Epoch {epoch})</a>')}
             self.wandb_run.log(link_summary, step=self.agent_step)
 
     @with_instance_timer("_process_stats")
@@ -891,6 +964,9 @@ class MettaTrainer:
         self.grad_stats.clear()
 
     def close(self):
+        self._checkpointer.close()
+        if self._eval_executor is not None:
+            self._eval_executor.close()
         self.vecenv.close()
         if self._master:
             self._memory_monitor.clear()
@@ -1015,6 +1091,7 @@ class MettaTrainer:
             zero_copy=trainer_cfg.zero_copy,
             is_training=True,
             run_dir=self.cfg.run_dir,
+            double_buffered=trainer_cfg.double_buffered_rollout,
         )
 
         if self.cfg.seed is None:
@@ -64,6 +64,9 @@ class CheckpointConfig(BaseModelWithForbidExtra):
     # W&B every 5 min: Less frequent due to network overhead and storage costs
     wandb_checkpoint_interval: int = Field(default=300, ge=0)  # 0 to disable
     checkpoint_dir: str = Field(default="")
+    # Checkpoints are written by a background thread. At most this many can be in flight before the training thread
+    # waits for the oldest; 0 writes them on the training thread
+    max_pending_saves: int = Field(default=2, ge=0)
 
     @model_validator(mode="after")
     def validate_fields(self) -> "CheckpointConfig":
@@ -75,6 +78,11 @@ class SimulationConfig(BaseModelWithForbidExtra):
     # Interval at which to evaluate and generate replays: Type 2 arbitrary default
     evaluate_interval: int = Field(default=300, ge=0)  # 0 to disable
     replay_dir: str = Field(default="")
+    # Evaluate in background worker processes on the CPU, instead of pausing training for the evaluation
+    evaluate_async: bool = False
+    # Background evaluation's CPU budget: worker processes, and torch threads per worker
+    eval_workers: int = Field(default=1, gt=0)
+    eval_threads_per_worker: int = Field(default=2, gt=0)
 
     @model_validator(mode="after")
     def validate_fields(self) -> "SimulationConfig":
@@ -188,6 +196,9 @@ class TrainerConfig(BaseModelWithForbidExtra):
     # Async factor 2: Type 2 default chosen arbitrarily, overlaps computation and communication for efficiency
     #   (default assumes multiprocessing)
     async_factor: int = Field(default=2, gt=0)
+    # Double-buffered rollout off by default: splits envs into two groups and steps one while the policy runs on
+    #   the other. Mostly helps serial vectorization, where envs otherwise only step while the policy waits
+    double_buffered_rollout: bool = False
 
     # scheduler registry
     hyperparameter_scheduler: HyperparameterSchedulerConfig = Field(default_factory=HyperparameterSchedulerConfig)
@@ -124,17 +124,18 @@ def process_minibatch_update(
     # Update values in experience buffer
     experience.update_values(minibatch["indices"], newvalue.view(minibatch["values"].shape))
 
-    # Update loss tracking
-    losses.policy_loss_sum += pg_loss.item()
-    losses.value_loss_sum += v_loss.item()
-    losses.entropy_sum += entropy_loss.item()
-    losses.approx_kl_sum += approx_kl.item()
-    losses.clipfrac_sum += clipfrac.item()
-    losses.l2_init_loss_sum += l2_init_loss.item() if torch.is_tensor(l2_init_loss) else l2_init_loss
-    losses.ks_action_loss_sum += ks_action_loss.item()
-    losses.ks_value_loss_sum += ks_value_loss.item()
-    losses.importance_sum += importance_sampling_ratio.mean().item()
-    losses.minibatches_processed += 1
-    losses.current_logprobs_sum += new_logprobs.mean().item()
+    # Update loss tracking. These stay on the device, so the training loop doesn't sync on every minibatch.
+    losses.accumulate(
+        policy_loss=pg_loss,
+        value_loss=v_loss,
+        entropy=entropy_loss,
+        approx_kl=approx_kl,
+        clipfrac=clipfrac,
+        l2_init_loss=l2_init_loss,
+        ks_action_loss=ks_action_loss,
+        ks_value_loss=ks_value_loss,
+        importance=importance_sampling_ratio.mean(),
+        current_logprobs=new_logprobs.mean(),
+    )
 
     return loss
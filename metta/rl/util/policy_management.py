@@ -8,6 +8,7 @@ from typing import Any, Optional, Tuple
 import torch
 
 from metta.agent.metta_agent import DistributedMettaAgent, MettaAgent
+from metta.agent.policy_store import sidecar_path
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ def cleanup_old_policies(checkpoint_dir: str, keep_last_n: int = 5) -> None:
             for file_path in files_to_remove:
                 try:
                     file_path.unlink()
+                    Path(sidecar_path(str(file_path))).unlink(missing_ok=True)
                 except Exception as e:
                     logger.warning(f"Failed to remove old policy file {file_path}: {e}")
 
@@ -1,6 +1,8 @@
 import logging
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
 
+import numpy as np
 import pufferlib
 import pufferlib.vector
 from pydantic import validate_call
@@ -60,8 +62,34 @@ def make_vecenv(
     replay_writer: Optional[ReplayWriter] = None,
     is_training: bool = False,
     run_dir: str | None = None,
+    double_buffered: bool = False,
     **kwargs,
 ):
+    if double_buffered:
+        batch_size = batch_size or num_envs
+        if num_envs % 2 != 0 or batch_size % 2 != 0:
+            raise ValueError(
+                f"Double-buffered vecenvs split envs into two groups, so num_envs ({num_envs}) and "
+                f"batch_size ({batch_size}) must be even"
+            )
+        groups = [
+            make_vecenv(
+                curriculum,
+                vectorization,
+                num_envs=num_envs // 2,
+                batch_size=batch_size // 2,
+                num_workers=max(1, num_workers // 2),
+                render_mode=render_mode,
+                stats_writer=stats_writer,
+                replay_writer=replay_writer,
+                is_training=is_training,
+                run_dir=run_dir,
+                **kwargs,
+            )
+            for _ in range(2)
+        ]
+        return DoubleBufferedVecEnv(groups, envs_per_group=num_envs // 2)
+
     # Determine the vectorization class
     is_serial = vectorization == "serial" or num_workers == 1
 
@@ -84,6 +112,8 @@ def make_vecenv(
         "stats_writer": stats_writer,
         "replay_writer": replay_writer,
         "is_training": is_training,
+        # Training resets envs constantly, so build the next level while the current episode runs.
+        "prefetch_levels": is_training,
         "is_serial": is_serial,
         "run_dir": run_dir,
     }
@@ -101,3 +131,59 @@ def make_vecenv(
     )
 
     return vecenv
+
+
+class DoubleBufferedVecEnv:
+    """
+    Steps two groups of envs in turn, so that one group steps while the policy runs on the other.
+
+    Looks like a pufferlib vecenv whose recv() alternates between the groups. send() hands the actions to a
+    background thread, which steps that group and waits for its next observations, and returns straight away. The
+    caller can then recv() the other group, which stepped while it was busy with this one. Agent ids of the second
+    group are offset past the first, so Experience keeps separate rows and LSTM state for each group.
+
+    Only one group steps at a time. Envs in a group share a process (and curriculum) with the other group's envs when
+    they're serial, so stepping them concurrently wouldn't be safe, and the point is to overlap stepping with
+    inference rather than with more stepping.
+    """
+
+    def __init__(self, groups: list[Any], envs_per_group: int):
+        self.groups = groups
+        self.envs_per_group = envs_per_group
+        self.driver_env = groups[0].driver_env
+        self.single_observation_space = groups[0].single_observation_space
+        self.single_action_space = groups[0].single_action_space
+        self.num_agents = sum(group.num_agents for group in groups)
+        self.agents_per_batch = getattr(groups[0], "agents_per_batch", groups[0].num_agents)
+
+        self._agent_offsets = np.cumsum([0] + [group.num_agents for group in groups[:-1]])
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vecenv_step")
+        self._pending: list[Future | None] = [None] * len(groups)
+        self._current = len(groups) - 1
+
+    def async_reset(self, seed: int = 0) -> None:
+        for i, group in enumerate(self.groups):
+            group.async_reset(seed + i * self.envs_per_group)
+            self._pending[i] = self._executor.submit(group.recv)
+        self._current = len(self.groups) - 1
+
+    def _step(self, group: Any, actions: np.ndarray):
+        group.send(actions)
+        return group.recv()
+
+    def recv(self):
+        self._current = (self._current + 1) % len(self.groups)
+        pending = self._pending[self._current]
+        assert pending is not None, "recv() called twice without a send()"
+        self._pending[self._current] = None
+        o, r, d, t, info, env_id, mask = pending.result()
+        return o, r, d, t, info, np.asarray(env_id) + self._agent_offsets[self._current], mask
+
+    def send(self, actions: np.ndarray) -> None:
+        group = self.groups[self._current]
+        self._pending[self._current] = self._executor.submit(self._step, group, actions)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for group in self.groups:
+            group.close()
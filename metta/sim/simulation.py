@@ -26,7 +26,7 @@ from omegaconf import OmegaConf
 from metta.agent.policy_record import PolicyRecord
 from metta.agent.policy_state import PolicyState
 from metta.agent.policy_store import PolicyStore
-from metta.app_backend.stats_client import StatsClient
+from metta.app_backend.stats_client import EpisodeBatcher, StatsClient
 from metta.interface.environment import PreBuiltConfigCurriculum, curriculum_from_config_path
 from metta.mettagrid.mettagrid_env import MettaGridEnv, dtype_actions
 from metta.mettagrid.replay_writer import ReplayWriter
@@ -424,8 +424,9 @@ class Simulation:
                 for idx in self._npc_idxs:
                     agent_map[int(idx.item())] = policy_ids[self._npc_pr.run_name]
 
-            # Get all episodes from the database
+            # Get all episodes from the database, and record them remotely in batches
             episodes_df = stats_db.query("SELECT * FROM episodes")
+            batcher = EpisodeBatcher(self._stats_client)
 
             for _, episode_row in episodes_df.iterrows():
                 episode_id = episode_row["id"]
@@ -452,10 +453,9 @@ class Simulation:
                     attr_value = attr_row["value"]
                     attributes[attr_name] = attr_value
 
-                # Record the episode remotely
                 episode_tags = self._episode_tags if self._episode_tags else None
                 try:
-                    self._stats_client.record_episode(
+                    batcher.add(
                         agent_policies=agent_map,
                         agent_metrics=agent_metrics,
                         primary_policy_id=policy_ids[policy_name],
@@ -468,8 +468,13 @@ class Simulation:
                         tags=episode_tags,
                     )
                 except Exception as e:
-                    logger.error(f"Failed to record episode {episode_id} remotely: {e}")
-                    # Continue with other episodes even if one fails
+                    logger.error(f"Failed to record a batch of episodes remotely, dropping it: {e}")
+                    # Continue with the other episodes even if one batch fails
+
+            try:
+                batcher.flush()
+            except Exception as e:
+                logger.error(f"Failed to record episodes remotely: {e}")
 
     def get_replays(self) -> dict:
         """Get all replays for this simulation."""
@@ -2,7 +2,7 @@
 
 from typing import Dict, Optional
 
-from pydantic import model_validator
+from pydantic import Field, model_validator
 
 from metta.common.util.config import Config
 
@@ -36,6 +36,9 @@ class SimulationSuiteConfig(SimulationConfig):
     name: str
     simulations: Dict[str, SingleEnvSimulationConfig]
     episode_tags: list[str] = []
+    # Simulations to run at once, each in a worker process with its own copy of the policy. 1 runs them one after
+    # another in the calling process
+    num_workers: int = Field(default=1, gt=0)
 
     @model_validator(mode="before")
     @classmethod
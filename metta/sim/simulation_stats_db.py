@@ -230,12 +230,10 @@ class SimulationStatsDB(EpisodeStatsDB):
             [(sim_id, eid) for eid in episode_ids],
         )
 
-    def merge_in(self, other: "SimulationStatsDB") -> None:
+    def merge_in(self, other: "SimulationStatsDB | Path") -> None:
+        """Merge another DB into **self**. Passing a closed DB's path avoids attaching a file that's still open."""
         logger = logging.getLogger(__name__)
-        if isinstance(other.path, str):
-            other_path = Path(other.path)
-        else:
-            other_path = other.path
+        other_path = Path(other.path if isinstance(other, SimulationStatsDB) else other)
 
         if Path(self.path).samefile(other_path):
             return
@@ -247,7 +245,7 @@ class SimulationStatsDB(EpisodeStatsDB):
 
         # Merge
         logger.debug(f"Before merge: {select_count()} episodes")
-        self._merge_db(other.path)
+        self._merge_db(other_path)
         logger.debug(f"After merge: {select_count()} episodes")
         logger.debug(f"Merged {other_path} into {self.path}")
 
@@ -1,8 +1,16 @@
+import copy
+import functools
 import logging
+import multiprocessing
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterator
 
+import httpx
+import hydra
 import torch
+from hydra.core.global_hydra import GlobalHydra
 
 from metta.agent.policy_record import PolicyRecord
 from metta.agent.policy_store import PolicyStore
@@ -45,6 +53,16 @@ class SimulationSuite:
         self._wandb_policy_name = wandb_policy_name
         self._eval_task_id = eval_task_id
 
+    def __getstate__(self) -> dict:
+        # The copies sent to worker processes get their own stats client, and load their own copy of the policy
+        # from its URI (see _init_worker), rather than being sent the policy's tensors
+        state = self.__dict__.copy()
+        state["_stats_client"] = None
+        policy_pr = copy.copy(self._policy_pr)
+        policy_pr._cached_policy = None
+        state["_policy_pr"] = policy_pr
+        return state
+
     def simulate(self) -> SimulationResults:
         """Run every simulation, merge their DBs/replay dicts, and return a single `SimulationResults`."""
         logger = logging.getLogger(__name__)
@@ -54,41 +72,9 @@ class SimulationSuite:
         successful_simulations = 0
         replay_urls: dict[str, list[str]] = {}
 
-        for name, sim_config in self._config.simulations.items():
+        for name, result in self._simulation_results():
             try:
-                # merge global simulation suite overrides with simulation-specific overrides
-                sim_config.env_overrides = {**self._config.env_overrides, **sim_config.env_overrides}
-                sim = Simulation(
-                    name,
-                    sim_config,
-                    self._policy_pr,
-                    self._policy_store,
-                    device=self._device,
-                    vectorization=self._vectorization,
-                    sim_suite_name=self.name,
-                    stats_dir=self._stats_dir,
-                    replay_dir=self._replay_dir,
-                    stats_client=self._stats_client,
-                    stats_epoch_id=self._stats_epoch_id,
-                    wandb_policy_name=self._wandb_policy_name,
-                    eval_task_id=self._eval_task_id,
-                    episode_tags=self._config.episode_tags,
-                )
-                logger.info("=== Simulation '%s' ===", name)
-                sim_result = sim.simulate()
-                merged_db.merge_in(sim_result.stats_db)
-
-                # Collect replay URLs if available
-                if self._replay_dir is not None:
-                    key, version = sim_result.stats_db.key_and_version(self._policy_pr)
-                    sim_replay_urls = sim_result.stats_db.get_replay_urls(key, version)
-                    if sim_replay_urls:
-                        replay_urls[name] = sim_replay_urls  # Store all URLs, not just the first
-                        logger.info(f"Collected {len(sim_replay_urls)} replay URL(s) for simulation '{name}'")
-
-                sim_result.stats_db.close()
-                successful_simulations += 1
-
+                stats_db_path, sim_replay_urls = result()
             except SimulationCompatibilityError as e:
                 # Only skip for NPC-related compatibility issues
                 error_msg = str(e).lower()
@@ -100,8 +86,121 @@ class SimulationSuite:
                     logger.error("Critical compatibility error in simulation '%s': %s", name, str(e))
                     raise
 
+            merged_db.merge_in(stats_db_path)
+
+            # Collect replay URLs if available
+            if sim_replay_urls:
+                replay_urls[name] = sim_replay_urls  # Store all URLs, not just the first
+                logger.info(f"Collected {len(sim_replay_urls)} replay URL(s) for simulation '{name}'")
+
+            successful_simulations += 1
+
         if successful_simulations == 0:
             raise RuntimeError("No simulations could be run successfully")
 
         logger.info("Completed %d/%d simulations successfully", successful_simulations, len(self._config.simulations))
         return SimulationResults(merged_db, replay_urls=replay_urls if replay_urls else None)
+
+    def _simulation_results(self) -> Iterator[tuple[str, Callable[[], tuple[Path, list[str]]]]]:
+        """
+        Yields each simulation's name, in config order, with a function that returns its result (or raises its error).
+
+        With num_workers > 1 the simulations are packed onto a pool of worker processes, which all start at once and
+        each run a simulation at a time. Every worker gets a copy of this suite when it starts, and loads the policy
+        once for all the simulations it runs. Each worker is one core of the suite's budget, so its simulations step
+        their envs serially rather than starting env processes of their own. The policy still runs on the suite's
+        device, so on CUDA every worker opens a CUDA context of its own.
+        """
+        names = list(self._config.simulations.keys())
+        num_workers = min(self._config.num_workers, len(names))
+        if num_workers <= 1:
+            for name in names:
+                yield name, functools.partial(self._run_simulation, name)
+            return
+
+        stats_server = None
+        if self._stats_client is not None:
+            stats_server = (str(self._stats_client.http_client.base_url), self._stats_client.machine_token)
+        pool = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self, stats_server, _hydra_config_dir()),
+        )
+        try:
+            futures = [pool.submit(_run_simulation_in_worker, name) for name in names]
+            for name, future in zip(names, futures, strict=True):
+                yield name, future.result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _run_simulation(self, name: str) -> tuple[Path, list[str]]:
+        """Run one simulation. Returns the path of its stats DB, and its replay URLs."""
+        logger = logging.getLogger(__name__)
+        sim_config = self._config.simulations[name]
+        # merge global simulation suite overrides with simulation-specific overrides
+        sim_config.env_overrides = {**self._config.env_overrides, **sim_config.env_overrides}
+        sim = Simulation(
+            name,
+            sim_config,
+            self._policy_pr,
+            self._policy_store,
+            device=self._device,
+            vectorization=self._vectorization,
+            sim_suite_name=self.name,
+            stats_dir=self._stats_dir,
+            replay_dir=self._replay_dir,
+            stats_client=self._stats_client,
+            stats_epoch_id=self._stats_epoch_id,
+            wandb_policy_name=self._wandb_policy_name,
+            eval_task_id=self._eval_task_id,
+            episode_tags=self._config.episode_tags,
+        )
+        logger.info("=== Simulation '%s' ===", name)
+        sim_result = sim.simulate()
+
+        replay_urls: list[str] = []
+        if self._replay_dir is not None:
+            key, version = sim_result.stats_db.key_and_version(self._policy_pr)
+            replay_urls = sim_result.stats_db.get_replay_urls(key, version)
+
+        sim_result.stats_db.close()
+        return Path(sim_result.stats_db.path), replay_urls
+
+
+# The suite that a worker process runs simulations for
+_worker_suite: SimulationSuite | None = None
+
+
+def _hydra_config_dir() -> str | None:
+    """The config directory Hydra was initialized with, which spawned workers need to load env configs from."""
+    if not GlobalHydra.instance().is_initialized():
+        return None
+    for source in GlobalHydra.instance().config_loader().get_sources():
+        if source.provider == "main" and source.scheme() == "file":
+            return source.path
+    return None
+
+
+def _init_worker(suite: SimulationSuite, stats_server: tuple[str, str] | None, config_dir: str | None) -> None:
+    global _worker_suite
+    # Each worker is one core of the suite's budget. Simulations size their vecenvs by the machine's CPU count, so
+    # their envs are stepped here rather than in env processes of their own, whatever the suite's vectorization.
+    torch.set_num_threads(1)
+    suite._vectorization = "serial"
+    if config_dir is not None:
+        hydra.initialize_config_dir(config_dir=config_dir, version_base=None)
+    if stats_server is not None:
+        base_url, machine_token = stats_server
+        suite._stats_client = StatsClient(http_client=httpx.Client(base_url=base_url), machine_token=machine_token)
+    device = torch.device(suite._device)
+    if device.type == "cuda":
+        torch.cuda.set_device(device)
+    # Load the policy from its URI now, so that every simulation this worker runs reuses it
+    _ = suite._policy_pr.policy
+    _worker_suite = suite
+
+
+def _run_simulation_in_worker(name: str) -> tuple[Path, list[str]]:
+    assert _worker_suite is not None, "Worker process wasn't initialized"
+    return _worker_suite._run_simulation(name)
@@ -1,10 +1,14 @@
 import random
 
+import hydra
 import numpy as np
 import pytest
 from omegaconf import OmegaConf
 
 from metta.mettagrid.curriculum.core import SingleTaskCurriculum
+from metta.mettagrid.level_builder import Level
+from metta.mettagrid.mettagrid_c import MettaGrid
+from metta.mettagrid.mettagrid_c_config import from_mettagrid_config
 from metta.mettagrid.mettagrid_env import MettaGridEnv
 from metta.mettagrid.util.actions import generate_valid_random_actions
 from metta.mettagrid.util.hydra import get_cfg
@@ -180,3 +184,36 @@ def test_create_env_performance(benchmark, cfg):
 
     # Report KPIs
     benchmark.extra_info.update({"env_rate": env_rate})
+
+
+@pytest.mark.parametrize("map_form", ["strings", "encoded"])
+def test_load_level_performance(benchmark, cfg, map_form):
+    """
+    Benchmark the map part of a reset on a ~200x200 level: counting its agents and building the C++ env from it.
+
+    "strings" passes the grid as a list of lists of cell names. "encoded" passes Level.encode()'s integer grid.
+    """
+    cfg.game.map_builder.room.width = 100
+    cfg.game.map_builder.room.height = 100
+    level = hydra.utils.instantiate(cfg.game.map_builder).build()
+    game_config = OmegaConf.to_container(cfg.game)
+    del game_config["map_builder"]
+    c_cfg = from_mettagrid_config(game_config)
+
+    def load_level():
+        # A fresh Level each time, since a level caches its encoding
+        fresh_level = Level(level.grid, level.labels)
+        if map_form == "strings":
+            num_agents = np.count_nonzero(np.char.startswith(fresh_level.grid, "agent"))
+            c_env = MettaGrid(c_cfg, fresh_level.grid.tolist(), 0)
+        else:
+            num_agents = fresh_level.count_agents()
+            map_ids, map_names = fresh_level.encode()
+            c_env = MettaGrid(c_cfg, map_ids, map_names, 0)
+        assert num_agents == c_env.num_agents == cfg.game.num_agents
+
+    benchmark.pedantic(load_level, iterations=5, rounds=10, warmup_rounds=1)
+
+    print(
+        f"\nLoad level ({map_form}, {level.grid.shape[0]}x{level.grid.shape[1]}): {benchmark.stats['mean']:.6f} seconds"
+    )
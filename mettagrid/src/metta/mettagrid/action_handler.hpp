@@ -1,6 +1,7 @@
 #ifndef ACTION_HANDLER_HPP_
 #define ACTION_HANDLER_HPP_
 
+#include <algorithm>
 #include <map>
 #include <string>
 #include <vector>
@@ -22,12 +23,60 @@ struct ActionConfig {
   virtual ~ActionConfig() {}
 };
 
-struct ActionTrackingState {
-  std::string last_action_name;
-  unsigned int consecutive_count = 0;
-  unsigned int total_count = 0;
-  bool last_success = false;
-  unsigned int current_step = 0;
+// Per-agent action history for one environment, keyed by action id (the handler's index in the env's action list).
+// Each env owns its own tracker, so envs in the same process (or on different threads) don't share any state.
+class ActionTracker {
+public:
+  static constexpr ActionType NoAction = -1;
+
+  explicit ActionTracker(size_t num_actions = 0) : _num_actions(num_actions) {}
+
+  // The last action this agent completed successfully, or NoAction.
+  ActionType last_action(size_t agent_id) const {
+    return agent_id < _last_action.size() ? _last_action[agent_id] : NoAction;
+  }
+
+  // How many times in a row the agent has successfully taken last_action(agent_id).
+  unsigned int consecutive_count(size_t agent_id) const {
+    return agent_id < _consecutive_count.size() ? _consecutive_count[agent_id] : 0;
+  }
+
+  // How many times the agent has successfully taken `action` this episode.
+  unsigned int total_count(size_t agent_id, ActionType action) const {
+    size_t idx = agent_id * _num_actions + static_cast<size_t>(action);
+    return idx < _total_count.size() ? _total_count[idx] : 0;
+  }
+
+  void record(size_t agent_id, ActionType action, bool success) {
+    if (agent_id >= _last_action.size()) {
+      _last_action.resize(agent_id + 1, NoAction);
+      _consecutive_count.resize(agent_id + 1, 0);
+      _total_count.resize((agent_id + 1) * _num_actions, 0);
+    }
+    if (!success) {
+      return;
+    }
+    if (_last_action[agent_id] == action) {
+      _consecutive_count[agent_id]++;
+    } else {
+      _last_action[agent_id] = action;
+      _consecutive_count[agent_id] = 1;
+    }
+    _total_count[agent_id * _num_actions + static_cast<size_t>(action)]++;
+  }
+
+  void clear() {
+    std::fill(_last_action.begin(), _last_action.end(), NoAction);
+    std::fill(_consecutive_count.begin(), _consecutive_count.end(), 0);
+    std::fill(_total_count.begin(), _total_count.end(), 0);
+  }
+
+private:
+  size_t _num_actions;
+  std::vector<ActionType> _last_action;
+  std::vector<unsigned int> _consecutive_count;
+  // Indexed by agent_id * num_actions + action
+  std::vector<unsigned int> _total_count;
 };
 
 class ActionHandler {
@@ -39,7 +88,9 @@ public:
       : priority(0),
         _action_name(action_name),
         _required_resources(cfg.required_resources),
-        _consumed_resources(cfg.consumed_resources) {
+        _consumed_resources(cfg.consumed_resources),
+        _success_stat("action." + action_name + ".success"),
+        _failed_stat("action." + action_name + ".failed") {
     for (const auto& [item, amount] : _required_resources) {
       if (amount < _consumed_resources[item]) {
         throw std::runtime_error("Required resources must be greater than or equal to consumed resources");
@@ -49,17 +100,24 @@ public:
 
   virtual ~ActionHandler() {}
 
-  void init(Grid* grid) {
+  // `tracker` and `action_id` are optional, so handlers can be used on a bare grid (e.g. in tests). Without a
+  // tracker, nothing is recorded and last_action() is always NoAction.
+  void init(Grid* grid, ActionTracker* tracker = nullptr, ActionType action_id = 0) {
     this->_grid = grid;
+    this->_tracker = tracker;
+    this->_action_id = action_id;
   }
 
   bool handle_action(GridObjectId actor_object_id, ActionArg arg) {
     Agent* actor = static_cast<Agent*>(_grid->object(actor_object_id));
+    // Nearly every action changes something the actor observes about itself (frozen ticks, orientation,
+    // inventory, ...), so always re-encode it.
+    actor->mark_obs_dirty();
 
     // Handle frozen status
     if (actor->frozen != 0) {
-      actor->stats.incr("status.frozen.ticks");
-      actor->stats.incr("status.frozen.ticks." + actor->group_name);
+      actor->stats.incr(_frozen_ticks_stat);
+      actor->stats.incr(_frozen_ticks_group_stat(*actor));
       if (actor->frozen > 0) {
         actor->frozen -= 1;
       }
@@ -78,11 +136,13 @@ public:
     bool success = has_needed_resources && _handle_action(actor, arg);
 
     // Update tracking for this agent
-    update_tracking(actor->agent_id, success);
+    if (_tracker) {
+      _tracker->record(actor->agent_id, _action_id, success);
+    }
 
     // Track success/failure
     if (success) {
-      actor->stats.incr("action." + _action_name + ".success");
+      actor->stats.incr(_success_stat);
       for (const auto& [item, amount] : _consumed_resources) {
         InventoryDelta delta = actor->update_inventory(item, -static_cast<InventoryDelta>(amount));
         // We consume resources after the action succeeds, but in the future
@@ -91,8 +151,8 @@ public:
         assert(delta == -amount);
       }
     } else {
-      actor->stats.incr("action." + _action_name + ".failed");
-      actor->stats.incr("action.failure_penalty");
+      actor->stats.incr(_failed_stat);
+      actor->stats.incr(_failure_penalty_stat);
       *actor->reward -= actor->action_failure_penalty;
     }
 
@@ -107,26 +167,8 @@ public:
     return _action_name;
   }
 
-  // Get tracking state for a specific agent
-  const ActionTrackingState* get_agent_tracking(size_t agent_id) const {
-    auto it = _agent_tracking.find(agent_id);
-    return it != _agent_tracking.end() ? &it->second : nullptr;
-  }
-
-  // Get the last action name for an agent across all handlers
-  static std::string get_last_action_name(size_t agent_id) {
-    auto it = _global_last_actions.find(agent_id);
-    return it != _global_last_actions.end() ? it->second : "";
-  }
-
-  // Clear all tracking data (useful for reset)
-  static void clear_all_tracking() {
-    _global_last_actions.clear();
-  }
-
-  // Clear tracking for this handler
-  void clear_tracking() {
-    _agent_tracking.clear();
+  ActionType action_id() const {
+    return _action_id;
   }
 
 protected:
@@ -135,34 +177,28 @@ protected:
   std::string _action_name;
   std::map<InventoryItem, InventoryQuantity> _required_resources;
   std::map<InventoryItem, InventoryQuantity> _consumed_resources;
+  ActionTracker* _tracker = nullptr;
+  ActionType _action_id = 0;
 
-  // Per-agent tracking state for this handler
-  std::map<size_t, ActionTrackingState> _agent_tracking;
-
-  // Global tracking of last action names across all handlers
-  static std::map<size_t, std::string> _global_last_actions;
+  // The last action this agent completed successfully (before the current one), or ActionTracker::NoAction.
+  ActionType last_action(const Agent& actor) const {
+    return _tracker ? _tracker->last_action(actor.agent_id) : ActionTracker::NoAction;
+  }
 
 private:
-  void update_tracking(size_t agent_id, bool success) {
-    auto& state = _agent_tracking[agent_id];
-
-    // Check if this is consecutive
-    if (_global_last_actions[agent_id] == _action_name && success) {
-      state.consecutive_count++;
-    } else {
-      state.consecutive_count = success ? 1 : 0;
-    }
-
-    state.last_action_name = _action_name;
-    state.last_success = success;
-    if (success) {
-      state.total_count++;
-    }
-
-    // Update global tracking
-    if (success) {
-      _global_last_actions[agent_id] = _action_name;
+  // Stat names are resolved to ids once per name table, so handle_action doesn't build or hash strings.
+  StatKey _success_stat;
+  StatKey _failed_stat;
+  StatKey _failure_penalty_stat{"action.failure_penalty"};
+  StatKey _frozen_ticks_stat{"status.frozen.ticks"};
+  std::map<ObservationType, StatKey> _frozen_ticks_by_group;
+
+  const StatKey& _frozen_ticks_group_stat(const Agent& actor) {
+    auto it = _frozen_ticks_by_group.find(actor.group);
+    if (it == _frozen_ticks_by_group.end()) {
+      it = _frozen_ticks_by_group.emplace(actor.group, StatKey("status.frozen.ticks." + actor.group_name)).first;
     }
+    return it->second;
   }
 };
 
@@ -91,6 +91,7 @@ protected:
 
     // Attack succeeds
     target.frozen = target.freeze_duration;
+    target.mark_obs_dirty();
 
     if (!was_already_frozen) {
       _steal_resources(actor, target);
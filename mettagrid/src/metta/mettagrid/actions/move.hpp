@@ -12,7 +12,12 @@
 class Move : public ActionHandler {
 public:
   explicit Move(const ActionConfig& cfg, bool track_movement_metrics = false)
-      : ActionHandler(cfg, "move"), _track_movement_metrics(track_movement_metrics) {}
+      : ActionHandler(cfg, "move"),
+        _track_movement_metrics(track_movement_metrics),
+        _direction_stats{StatKey(std::string("movement.direction.") + OrientationNames[Orientation::Up]),
+                         StatKey(std::string("movement.direction.") + OrientationNames[Orientation::Down]),
+                         StatKey(std::string("movement.direction.") + OrientationNames[Orientation::Left]),
+                         StatKey(std::string("movement.direction.") + OrientationNames[Orientation::Right])} {}
 
   unsigned char max_arg() const override {
     return 1;  // 0 = move forward, 1 = move backward
@@ -42,7 +47,7 @@ protected:
 
     // Track movement direction on success (only if tracking enabled)
     if (success && _track_movement_metrics) {
-      actor->stats.add(std::string("movement.direction.") + OrientationNames[static_cast<int>(move_direction)], 1);
+      actor->stats.incr(_direction_stats[static_cast<int>(move_direction)]);
     }
 
     return success;
@@ -50,6 +55,8 @@ protected:
 
 private:
   bool _track_movement_metrics;
+  // Indexed by Orientation
+  StatKey _direction_stats[4];
 
   // Get the opposite direction (for backward movement)
   static Orientation get_opposite_direction(Orientation orientation) {
@@ -43,7 +43,7 @@ protected:
         if (resources_put > 0) {
           InventoryDelta delta = actor->update_inventory(item, -resources_put);
           assert(delta == -resources_put);
-          actor->stats.add(actor->stats.inventory_item_name(item) + ".put", static_cast<float>(resources_put));
+          actor->stats.add(item, ItemStat::Put, static_cast<float>(resources_put));
           success = true;
         }
       }
@@ -11,7 +11,12 @@
 class Rotate : public ActionHandler {
 public:
   explicit Rotate(const ActionConfig& cfg, bool track_movement_metrics = false)
-      : ActionHandler(cfg, "rotate"), _track_movement_metrics(track_movement_metrics) {}
+      : ActionHandler(cfg, "rotate"),
+        _track_movement_metrics(track_movement_metrics),
+        _rotation_stats{StatKey(std::string("movement.rotation.to_") + OrientationNames[Orientation::Up]),
+                        StatKey(std::string("movement.rotation.to_") + OrientationNames[Orientation::Down]),
+                        StatKey(std::string("movement.rotation.to_") + OrientationNames[Orientation::Left]),
+                        StatKey(std::string("movement.rotation.to_") + OrientationNames[Orientation::Right])} {}
 
   unsigned char max_arg() const override {
     return 3;
@@ -25,11 +30,11 @@ protected:
 
     // Track which orientation the agent rotated to (only if tracking enabled)
     if (_track_movement_metrics) {
-      actor->stats.add(std::string("movement.rotation.to_") + OrientationNames[static_cast<int>(orientation)], 1);
+      actor->stats.incr(_rotation_stats[static_cast<int>(orientation)]);
 
       // Check if last action was also a rotation for sequential tracking
-      if (ActionHandler::get_last_action_name(actor->agent_id) == "rotate") {
-        actor->stats.add("movement.sequential_rotations", 1);
+      if (last_action(*actor) == _action_id) {
+        actor->stats.incr(_sequential_rotations_stat);
       }
     }
 
@@ -38,6 +43,9 @@ protected:
 
 private:
   bool _track_movement_metrics;
+  // Indexed by Orientation
+  StatKey _rotation_stats[4];
+  StatKey _sequential_rotations_stat{"movement.sequential_rotations"};
 };
 
 #endif  // ACTIONS_ROTATE_HPP_
@@ -368,10 +368,8 @@ class MettaGridEnv(ABC):
                 agent_metrics[agent_idx][k] = float(v)
 
         # Get agent groups
-        grid_objects = self._core_env.grid_objects()
-        agent_groups: Dict[int, int] = {
-            v["agent_id"]: v["agent:group"] for v in grid_objects.values() if v["type"] == 0
-        }
+        agents = self.grid_snapshot["agents"]
+        agent_groups: Dict[int, int] = dict(zip(agents["agent_id"].tolist(), agents["group"].tolist(), strict=True))
 
         # Record episode
         self._stats_writer.record_episode(
@@ -573,3 +571,17 @@ class MettaGridEnv(ABC):
         if self._core_env is None:
             raise RuntimeError("Environment not initialized")
         return self._core_env.grid_objects()
+
+    @property
+    def grid_occupancy(self) -> np.ndarray:
+        """Get a read-only (height, width, layers) view of object ids on the grid (0 = empty)."""
+        if self._core_env is None:
+            raise RuntimeError("Environment not initialized")
+        return self._core_env.grid_occupancy()
+
+    @property
+    def grid_snapshot(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Get per-kind column arrays for all objects. The arrays are reused, so copy them to keep them."""
+        if self._core_env is None:
+            raise RuntimeError("Environment not initialized")
+        return self._core_env.grid_snapshot()
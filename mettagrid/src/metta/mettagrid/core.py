@@ -233,6 +233,14 @@ class MettaGridCore:
         """Get information about all grid objects."""
         return self._c_env.grid_objects()
 
+    def grid_occupancy(self) -> np.ndarray:
+        """Get a read-only (height, width, layers) view of object ids on the grid (0 = empty)."""
+        return self._c_env.grid_occupancy()
+
+    def grid_snapshot(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Get per-kind column arrays for all objects. The arrays are reused, so copy them to keep them."""
+        return self._c_env.grid_snapshot()
+
     @property
     def action_success(self) -> List[bool]:
         action_success_array = self._c_env.action_success()
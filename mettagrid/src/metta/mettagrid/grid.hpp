@@ -11,7 +11,8 @@
 using std::max;
 using std::unique_ptr;
 using std::vector;
-using GridType = std::vector<std::vector<std::vector<GridObjectId>>>;
+// Object ids for every (row, col, layer), stored row-major in a single contiguous array. See Grid::cell_index.
+using GridType = std::vector<GridObjectId>;
 
 class Grid {
 public:
@@ -24,8 +25,7 @@ private:
 
 public:
   Grid(GridCoord height, GridCoord width) : height(height), width(width) {
-    grid.resize(height,
-                std::vector<std::vector<GridObjectId>>(width, std::vector<GridObjectId>(GridLayer::GridLayerCount, 0)));
+    grid.resize(static_cast<size_t>(height) * static_cast<size_t>(width) * GridLayer::GridLayerCount, 0);
 
     // Reserve space for objects to avoid frequent reallocations
     // Assume ~50% of grid cells will contain objects
@@ -46,6 +46,21 @@ public:
 
   ~Grid() = default;
 
+  // Index of (r, c, layer) in the flat id array.
+  inline size_t cell_index(GridCoord r, GridCoord c, Layer layer) const {
+    return (static_cast<size_t>(r) * static_cast<size_t>(width) + static_cast<size_t>(c)) * GridLayer::GridLayerCount +
+           static_cast<size_t>(layer);
+  }
+
+  inline size_t cell_index(const GridLocation& loc) const {
+    return cell_index(loc.r, loc.c, loc.layer);
+  }
+
+  // The flat (height, width, GridLayerCount) array of object ids, with 0 meaning empty.
+  inline const GridObjectId* data() const {
+    return grid.data();
+  }
+
   inline bool is_valid_location(const GridLocation& loc) const {
     return loc.r < height && loc.c < width && loc.layer < GridLayer::GridLayerCount;
   }
@@ -54,13 +69,13 @@ public:
     if (!is_valid_location(obj->location)) {
       return false;
     }
-    if (this->grid[obj->location.r][obj->location.c][obj->location.layer] != 0) {
+    if (this->grid[cell_index(obj->location)] != 0) {
       return false;
     }
 
     obj->id = static_cast<GridObjectId>(this->objects.size());
     this->objects.push_back(std::unique_ptr<GridObject>(obj));
-    this->grid[obj->location.r][obj->location.c][obj->location.layer] = obj->id;
+    this->grid[cell_index(obj->location)] = obj->id;
     return true;
   }
 
@@ -68,7 +83,7 @@ public:
   // Since the caller is now the owner, this can make the raw pointer invalid, if the
   // returned unique_ptr is destroyed.
   inline unique_ptr<GridObject> remove_object(GridObject* obj) {
-    this->grid[obj->location.r][obj->location.c][obj->location.layer] = 0;
+    this->grid[cell_index(obj->location)] = 0;
     auto obj_ptr = this->objects[obj->id].release();
     this->objects[obj->id] = nullptr;
     return std::unique_ptr<GridObject>(obj_ptr);
@@ -79,13 +94,13 @@ public:
       return false;
     }
 
-    if (grid[loc.r][loc.c][loc.layer] != 0) {
+    if (grid[cell_index(loc)] != 0) {
       return false;
     }
 
     GridObject* obj = object(id);
-    grid[loc.r][loc.c][loc.layer] = id;
-    grid[obj->location.r][obj->location.c][obj->location.layer] = 0;
+    grid[cell_index(loc)] = id;
+    grid[cell_index(obj->location)] = 0;
     obj->location = loc;
     return true;
   }
@@ -99,16 +114,16 @@ public:
     GridLocation loc2 = obj2->location;
 
     // Clear the objects from their original positions in the grid.
-    grid[loc1.r][loc1.c][loc1.layer] = 0;
-    grid[loc2.r][loc2.c][loc2.layer] = 0;
+    grid[cell_index(loc1)] = 0;
+    grid[cell_index(loc2)] = 0;
 
     // Update the location property of each object, preserving their original layers.
     obj1->location = {loc2.r, loc2.c, loc1.layer};
     obj2->location = {loc1.r, loc1.c, loc2.layer};
 
     // Place the objects in their new positions in the grid.
-    grid[obj1->location.r][obj1->location.c][obj1->location.layer] = id1;
-    grid[obj2->location.r][obj2->location.c][obj2->location.layer] = id2;
+    grid[cell_index(obj1->location)] = id1;
+    grid[cell_index(obj2->location)] = id2;
   }
 
   inline GridObject* object(GridObjectId obj_id) const {
@@ -120,10 +135,11 @@ public:
     if (!is_valid_location(loc)) {
       return nullptr;
     }
-    if (grid[loc.r][loc.c][loc.layer] == 0) {
+    GridObjectId id = grid[cell_index(loc)];
+    if (id == 0) {
       return nullptr;
     }
-    return object(grid[loc.r][loc.c][loc.layer]);
+    return object(id);
   }
 
   /**
@@ -174,8 +190,9 @@ public:
   }
 
   inline bool is_empty(GridCoord row, GridCoord col) const {
-    for (const auto& layer_objects : grid[row][col]) {
-      if (layer_objects != 0) return false;
+    size_t cell = cell_index(row, col, 0);
+    for (Layer layer = 0; layer < GridLayer::GridLayerCount; layer++) {
+      if (grid[cell + layer] != 0) return false;
     }
     return true;
   }
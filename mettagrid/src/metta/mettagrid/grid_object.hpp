@@ -75,6 +75,33 @@ public:
   virtual std::vector<PartialObservationToken> obs_features() const {
     return {};  // Default: no observable features
   }
+
+  // obs_features(), cached until the object is marked dirty. Objects are observed by every agent that
+  // can see them, so this avoids rebuilding the same features once per observer. Anything that changes
+  // what obs_features() returns must call mark_obs_dirty().
+  const std::vector<PartialObservationToken>& cached_obs_features() const {
+    if (_obs_features_dirty) {
+      refresh_obs_features();
+    }
+    return _obs_features;
+  }
+
+  void refresh_obs_features() const {
+    _obs_features = obs_features();
+    _obs_features_dirty = false;
+  }
+
+  void mark_obs_dirty() {
+    _obs_features_dirty = true;
+  }
+
+  bool obs_dirty() const {
+    return _obs_features_dirty;
+  }
+
+private:
+  mutable std::vector<PartialObservationToken> _obs_features;
+  mutable bool _obs_features_dirty = true;
 };
 
 #endif  // GRID_OBJECT_HPP_
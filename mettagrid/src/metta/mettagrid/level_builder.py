@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import numpy as np
 import numpy.typing as npt
 
+from metta.mettagrid.mettagrid_c import encode_grid
+
 
 @dataclass
 class Level:
@@ -21,6 +23,34 @@ class Level:
     # List of labels. These will be used for `rewards/map:...` episode stats.
     labels: list[str]
 
+    # Cached by encode().
+    _encoding: tuple[npt.NDArray[np.unsignedinteger], list[str]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def encode(self) -> tuple[npt.NDArray[np.unsignedinteger], list[str]]:
+        """
+        Encode the grid as an integer array of indices into a table of cell names.
+
+        Returns a (height, width) uint8 array (uint16 if there are more than 256 distinct names) and the names, in
+        order of first appearance. This is the form MettaGrid takes directly, so it doesn't need to convert every cell
+        from Python. The result is computed once per level, so callers must not modify the grid after encoding it.
+        """
+        if self._encoding is None:
+            # encode_grid reads the array's buffer directly, which is much faster than np.unique (which sorts the
+            # grid's strings) or looking up every cell in Python.
+            self._encoding = encode_grid(np.asarray(self.grid, dtype=np.str_))
+        return self._encoding
+
+    def count_agents(self) -> int:
+        return count_agents(*self.encode())
+
+
+def count_agents(ids: npt.NDArray[np.unsignedinteger], names: list[str]) -> int:
+    """Number of agent cells (cells whose name starts with "agent") in an encoded grid. See Level.encode."""
+    counts = np.bincount(ids.ravel(), minlength=len(names))
+    return sum(int(count) for name, count in zip(names, counts, strict=True) if name.startswith("agent"))
+
 
 class LevelBuilder(ABC):
     """
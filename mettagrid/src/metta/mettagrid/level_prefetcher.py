@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from metta.mettagrid.curriculum.core import Task
+from metta.mettagrid.level_builder import Level
+
+# One pool per process, shared by every env in it. Vecenv workers run several envs each, and their prefetches queue
+# up behind each other here rather than each env starting its own threads.
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _reset_executor_after_fork() -> None:
+    # A forked child (e.g. a multiprocessing vecenv worker forked after the driver env was built) inherits the pool
+    # but not its threads, so anything submitted to it would never run. It starts its own pool instead.
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+def _shared_executor(num_threads: int) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="level_prefetch")
+        return _executor
+
+
+def _build_level(task: Task) -> Level:
+    level = task.env_cfg().game.map_builder.build()
+    # Encoding is part of getting a level ready for the env, so do it here rather than in reset()
+    level.encode()
+    return level
+
+
+class LevelPrefetcher:
+    """
+    Builds the level for an env's next task in the background, so that reset() doesn't wait on map generation.
+
+    The env samples its next task as soon as an episode starts and calls prefetch() with it. When that task comes up,
+    get() returns the level built in the meantime: a hit if it was ready, a wait if the build was still running, and
+    a miss (built on the calling thread) if that task was never prefetched. Each env holds at most one pending build.
+    """
+
+    def __init__(self, num_threads: int = 1):
+        self._num_threads = num_threads
+        # The pending task, its build, and the pid it was submitted from. A build pending when the process forked
+        # never finishes in the child.
+        self._pending: tuple[Task, Future[Level], int] | None = None
+        self._hits = 0
+        self._waits = 0
+        self._misses = 0
+        self._wait_time = 0.0
+
+    def prefetch(self, task: Task) -> None:
+        """Start building `task`'s level, replacing any pending build."""
+        self.cancel()
+        self._pending = (task, _shared_executor(self._num_threads).submit(_build_level, task), os.getpid())
+
+    def get(self, task: Task) -> Level:
+        """Returns `task`'s level, waiting for its prefetch if it's still being built."""
+        if self._pending is None or self._pending[0] is not task or self._pending[2] != os.getpid():
+            self.cancel()
+            self._misses += 1
+            return _build_level(task)
+
+        _, future, _ = self._pending
+        self._pending = None
+        if future.done():
+            self._hits += 1
+            return future.result()
+
+        self._waits += 1
+        start = time.monotonic()
+        level = future.result()
+        self._wait_time += time.monotonic() - start
+        return level
+
+    def cancel(self) -> None:
+        """Drop the pending build, if any."""
+        if self._pending is not None:
+            self._pending[1].cancel()
+            self._pending = None
+
+    def stats(self) -> dict[str, float]:
+        """Counters since the last call, for timing_per_epoch."""
+        stats = {
+            "level_prefetch/hits": self._hits,
+            "level_prefetch/waits": self._waits,
+            "level_prefetch/misses": self._misses,
+            "level_prefetch/wait_msec": self._wait_time * 1000,
+        }
+        self._hits = self._waits = self._misses = 0
+        self._wait_time = 0.0
+        return stats
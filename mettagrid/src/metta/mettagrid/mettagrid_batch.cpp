@@ -0,0 +1,186 @@
+#include "mettagrid_batch.hpp"
+
+#include <algorithm>
+#include <stdexcept>
+#include <string>
+
+#include "thread_pool.hpp"
+
+MettaGridBatch::MettaGridBatch(const GameConfig& cfg, const py::list& maps, unsigned int seed, unsigned int num_threads)
+    : _cfg(cfg), _seed(seed), _agents_per_env(cfg.num_agents), _episodes_started(0) {
+  size_t num_envs = py::len(maps);
+  if (num_envs == 0) {
+    throw std::runtime_error("MettaGridBatch needs at least one map");
+  }
+
+  size_t num_agents = num_envs * _agents_per_env;
+  std::vector<ssize_t> shape = {
+      static_cast<ssize_t>(num_agents), static_cast<ssize_t>(cfg.num_observation_tokens), static_cast<ssize_t>(3)};
+  _observations = py::array_t<ObservationType, py::array::c_style>(shape);
+  _terminals = py::array_t<TerminalType, py::array::c_style>(static_cast<ssize_t>(num_agents));
+  _truncations = py::array_t<TruncationType, py::array::c_style>(static_cast<ssize_t>(num_agents));
+  _rewards = py::array_t<RewardType, py::array::c_style>(static_cast<ssize_t>(num_agents));
+
+  for (size_t env_idx = 0; env_idx < num_envs; env_idx++) {
+    py::list map = maps[env_idx].cast<py::list>();
+    _envs.push_back(_make_env(map));
+    _env_maps.push_back(map);
+    _env_actions.emplace_back();
+    _attach_buffers(env_idx);
+  }
+
+  _step_pool = std::make_unique<ThreadPool>(std::min(static_cast<size_t>(std::max(num_threads, 1u)), num_envs));
+}
+
+MettaGridBatch::~MettaGridBatch() = default;
+
+std::unique_ptr<MettaGrid> MettaGridBatch::_make_env(const py::list& map) {
+  auto env = std::make_unique<MettaGrid>(_cfg, map, _seed + _episodes_started);
+  _episodes_started++;
+  if (env->num_agents() != _agents_per_env) {
+    throw std::runtime_error("Map has " + std::to_string(env->num_agents()) + " agents but the config expects " +
+                             std::to_string(_agents_per_env));
+  }
+  return env;
+}
+
+void MettaGridBatch::_attach_buffers(size_t env_idx) {
+  // Each env writes into its own rows of the batch buffers. These are views, not copies.
+  _envs[env_idx]->set_buffers(_env_rows(_observations, env_idx),
+                              _env_rows(_terminals, env_idx),
+                              _env_rows(_truncations, env_idx),
+                              _env_rows(_rewards, env_idx));
+}
+
+py::tuple MettaGridBatch::reset() {
+  for (auto& env : _envs) {
+    env->reset();
+  }
+  return py::make_tuple(_observations, py::dict());
+}
+
+py::tuple MettaGridBatch::step(const py::array_t<ActionType, py::array::c_style>& actions) {
+  if (actions.ndim() != 2 || static_cast<size_t>(actions.shape(0)) != num_agents() || actions.shape(1) != 2) {
+    throw std::runtime_error("actions must have shape (" + std::to_string(num_agents()) + ", 2)");
+  }
+  for (size_t env_idx = 0; env_idx < _envs.size(); env_idx++) {
+    _env_actions[env_idx] = _env_rows(actions, env_idx);
+  }
+
+  // MettaGrid only ever sets dones, relying on reset() to clear them. Dones from the previous step belong to
+  // episodes that have already been restarted, so clear them here.
+  std::fill(_terminals.mutable_data(), _terminals.mutable_data() + _terminals.size(), 0);
+  std::fill(_truncations.mutable_data(), _truncations.mutable_data() + _truncations.size(), 0);
+
+  _step_envs();
+
+  py::list episodes;
+  for (size_t env_idx = 0; env_idx < _envs.size(); env_idx++) {
+    if (_is_done(env_idx)) {
+      episodes.append(_restart_env(env_idx));
+    }
+  }
+
+  py::dict infos;
+  infos["episodes"] = episodes;
+  return py::make_tuple(_observations, _rewards, _terminals, _truncations, infos);
+}
+
+void MettaGridBatch::_step_envs() {
+  size_t num_envs = _envs.size();
+  size_t num_threads = _step_pool->num_threads();
+
+  auto step_range = [this](size_t begin, size_t end) {
+    for (size_t env_idx = begin; env_idx < end; env_idx++) {
+      _envs[env_idx]->_step(_env_actions[env_idx]);
+      _envs[env_idx]->_apply_group_rewards();
+    }
+  };
+
+  if (num_threads <= 1) {
+    step_range(0, num_envs);
+    return;
+  }
+
+  // Envs don't share any state, and _step doesn't call into Python, so we can release the GIL and step
+  // contiguous chunks of envs on the pool's threads. The pool rethrows any exception from a chunk here, once every
+  // chunk has finished.
+  size_t chunk_size = (num_envs + num_threads - 1) / num_threads;
+  py::gil_scoped_release release;
+  _step_pool->run([&](size_t chunk) {
+    size_t begin = std::min(chunk * chunk_size, num_envs);
+    step_range(begin, std::min(begin + chunk_size, num_envs));
+  });
+}
+
+bool MettaGridBatch::_is_done(size_t env_idx) const {
+  const TerminalType* terminals = _terminals.data() + env_idx * _agents_per_env;
+  const TruncationType* truncations = _truncations.data() + env_idx * _agents_per_env;
+  for (size_t i = 0; i < _agents_per_env; i++) {
+    if (!terminals[i] && !truncations[i]) {
+      return false;
+    }
+  }
+  return true;
+}
+
+py::dict MettaGridBatch::_restart_env(size_t env_idx) {
+  auto& env = _envs[env_idx];
+
+  py::dict episode;
+  episode["env_idx"] = env_idx;
+  episode["episode_rewards"] = env->get_episode_rewards();
+  episode["episode_stats"] = env->get_episode_stats();
+  episode["steps"] = env->current_step;
+
+  if (!_queued_maps.empty()) {
+    _env_maps[env_idx] = _queued_maps.front();
+    _queued_maps.pop_front();
+  }
+  // Reload the map into the existing env rather than replacing it, so that references handed out by env() stay
+  // valid across episodes. The env keeps writing into its rows of the batch buffers.
+  env->load_map(_env_maps[env_idx], _seed + _episodes_started);
+  _episodes_started++;
+
+  // reset() clears this env's rewards and dones, but callers still need to see how the finished episode
+  // ended. Keep them, and let the observations be the first ones of the new episode.
+  size_t begin = env_idx * _agents_per_env;
+  std::vector<RewardType> rewards(_rewards.data() + begin, _rewards.data() + begin + _agents_per_env);
+  std::vector<TerminalType> terminals(_terminals.data() + begin, _terminals.data() + begin + _agents_per_env);
+  std::vector<TruncationType> truncations(_truncations.data() + begin, _truncations.data() + begin + _agents_per_env);
+  env->reset();
+  std::copy(rewards.begin(), rewards.end(), _rewards.mutable_data() + begin);
+  std::copy(terminals.begin(), terminals.end(), _terminals.mutable_data() + begin);
+  std::copy(truncations.begin(), truncations.end(), _truncations.mutable_data() + begin);
+
+  return episode;
+}
+
+void MettaGridBatch::add_maps(const py::list& maps) {
+  for (const auto& map : maps) {
+    _queued_maps.push_back(map.cast<py::list>());
+  }
+}
+
+size_t MettaGridBatch::num_queued_maps() const {
+  return _queued_maps.size();
+}
+
+size_t MettaGridBatch::num_envs() const {
+  return _envs.size();
+}
+
+size_t MettaGridBatch::agents_per_env() const {
+  return _agents_per_env;
+}
+
+size_t MettaGridBatch::num_agents() const {
+  return _envs.size() * _agents_per_env;
+}
+
+MettaGrid& MettaGridBatch::env(size_t env_idx) {
+  if (env_idx >= _envs.size()) {
+    throw std::out_of_range("env_idx out of range");
+  }
+  return *_envs[env_idx];
+}
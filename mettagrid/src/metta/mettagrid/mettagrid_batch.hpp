@@ -0,0 +1,78 @@
+#ifndef METTAGRID_BATCH_HPP_
+#define METTAGRID_BATCH_HPP_
+
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+
+#include <deque>
+#include <memory>
+#include <vector>
+
+#include "mettagrid_c.hpp"
+#include "types.hpp"
+
+namespace py = pybind11;
+
+class ThreadPool;
+
+// Owns N MettaGrid envs that share a GameConfig, and steps them all with a single call from Python.
+//
+// Observations, rewards, terminals and truncations for every env live in one contiguous buffer each, with env
+// `i` owning rows [i * agents_per_env, (i + 1) * agents_per_env). Envs can be stepped across a persistent pool of
+// threads.
+// When an env finishes an episode the next queued map (or its previous map, if the queue is empty) is loaded into
+// it and it is reset in place, so callers never need to reset individual envs.
+class METTAGRID_API MettaGridBatch {
+public:
+  MettaGridBatch(const GameConfig& cfg, const py::list& maps, unsigned int seed, unsigned int num_threads = 1);
+  ~MettaGridBatch();
+
+  py::tuple reset();
+  // `actions` has shape (num_envs * agents_per_env, 2).
+  py::tuple step(const py::array_t<ActionType, py::array::c_style>& actions);
+
+  // Queue maps to use for the next episodes of finished envs.
+  void add_maps(const py::list& maps);
+  size_t num_queued_maps() const;
+
+  size_t num_envs() const;
+  size_t agents_per_env() const;
+  size_t num_agents() const;
+  // Access to an individual env, e.g. for grid_objects(). The batch keeps ownership, and the env stays the same
+  // object across episodes.
+  MettaGrid& env(size_t env_idx);
+
+private:
+  GameConfig _cfg;
+  unsigned int _seed;
+  size_t _agents_per_env;
+  unsigned int _episodes_started;
+
+  std::vector<std::unique_ptr<MettaGrid>> _envs;
+  std::vector<py::list> _env_maps;
+  std::deque<py::list> _queued_maps;
+  std::vector<py::array_t<ActionType, py::array::c_style>> _env_actions;
+
+  py::array_t<ObservationType, py::array::c_style> _observations;
+  py::array_t<TerminalType, py::array::c_style> _terminals;
+  py::array_t<TruncationType, py::array::c_style> _truncations;
+  py::array_t<RewardType, py::array::c_style> _rewards;
+
+  // Steps contiguous chunks of envs, one per thread.
+  std::unique_ptr<ThreadPool> _step_pool;
+
+  std::unique_ptr<MettaGrid> _make_env(const py::list& map);
+  void _attach_buffers(size_t env_idx);
+  void _step_envs();
+  bool _is_done(size_t env_idx) const;
+  py::dict _restart_env(size_t env_idx);
+
+  template <typename T>
+  py::array_t<T, py::array::c_style> _env_rows(const py::array_t<T, py::array::c_style>& buffer, size_t env_idx) {
+    ssize_t begin = static_cast<ssize_t>(env_idx * _agents_per_env);
+    ssize_t end = begin + static_cast<ssize_t>(_agents_per_env);
+    return py::array_t<T, py::array::c_style>(buffer[py::slice(begin, end, 1)]);
+  }
+};
+
+#endif  // METTAGRID_BATCH_HPP_
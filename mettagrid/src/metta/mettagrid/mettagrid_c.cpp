@@ -5,8 +5,11 @@
 
 #include <algorithm>
 #include <cmath>
+#include <limits>
 #include <numeric>
 #include <random>
+#include <string_view>
+#include <unordered_map>
 
 #include "action_handler.hpp"
 #include "actions/attack.hpp"
@@ -21,6 +24,7 @@
 #include "event.hpp"
 #include "grid.hpp"
 #include "hash.hpp"
+#include "mettagrid_batch.hpp"
 #include "objects/agent.hpp"
 #include "objects/constants.hpp"
 #include "objects/converter.hpp"
@@ -29,14 +33,107 @@
 #include "observation_encoder.hpp"
 #include "packed_coordinate.hpp"
 #include "stats_tracker.hpp"
+#include "thread_pool.hpp"
 #include "types.hpp"
 
 namespace py = pybind11;
 
-// Static member definition for ActionHandler
-std::map<size_t, std::string> ActionHandler::_global_last_actions;
+MapCells MapCells::from_list(const py::list& map) {
+  MapCells cells;
+  cells.height = static_cast<GridCoord>(py::len(map));
+  cells.width = static_cast<GridCoord>(py::len(map[0]));
+  cells.ids.reserve(static_cast<size_t>(cells.height) * cells.width);
+
+  std::map<std::string, uint16_t> name_ids;
+  for (GridCoord r = 0; r < cells.height; r++) {
+    py::list row = map[r].cast<py::list>();
+    for (GridCoord c = 0; c < cells.width; c++) {
+      std::string name = row[c].cast<std::string>();
+      auto [it, inserted] = name_ids.try_emplace(name, static_cast<uint16_t>(cells.names.size()));
+      if (inserted) {
+        cells.names.push_back(name);
+      }
+      cells.ids.push_back(it->second);
+    }
+  }
+  return cells;
+}
+
+py::tuple encode_grid(const py::array& grid) {
+  // numpy str arrays hold fixed-width UTF-32, padded with zeros.
+  if (grid.ndim() != 2 || grid.dtype().kind() != 'U') {
+    throw std::runtime_error("grid must be a 2d array of str");
+  }
+  py::array cells_array = py::array::ensure(grid, py::array::c_style);
+  size_t width = static_cast<size_t>(cells_array.itemsize()) / sizeof(char32_t);
+  size_t num_cells = static_cast<size_t>(cells_array.size());
+  const char32_t* cells = static_cast<const char32_t*>(cells_array.data());
+
+  // Keys are views into the array's buffer, which outlives this map.
+  std::unordered_map<std::u32string_view, uint16_t> name_ids;
+  std::vector<std::u32string_view> names;
+  std::vector<uint16_t> ids(num_cells);
+  std::u32string_view previous;
+  uint16_t previous_id = 0;
+  for (size_t i = 0; i < num_cells; i++) {
+    const char32_t* cell = cells + i * width;
+    size_t length = 0;
+    while (length < width && cell[length] != 0) {
+      length++;
+    }
+    std::u32string_view name(cell, length);
+    // Neighbouring cells often match (rows of walls or empty space), so skip the hash lookup for them.
+    if (i == 0 || name != previous) {
+      auto [it, inserted] = name_ids.try_emplace(name, static_cast<uint16_t>(names.size()));
+      if (inserted) {
+        if (names.size() > std::numeric_limits<uint16_t>::max()) {
+          throw std::runtime_error("grid has too many distinct cell names");
+        }
+        names.push_back(name);
+      }
+      previous = name;
+      previous_id = it->second;
+    }
+    ids[i] = previous_id;
+  }
+
+  py::list names_py;
+  for (const auto& name : names) {
+    py::object name_py = py::reinterpret_steal<py::object>(
+        PyUnicode_FromKindAndData(PyUnicode_4BYTE_KIND, name.data(), static_cast<py::ssize_t>(name.size())));
+    if (!name_py) {
+      throw py::error_already_set();
+    }
+    names_py.append(name_py);
+  }
+
+  std::vector<ssize_t> shape = {cells_array.shape(0), cells_array.shape(1)};
+  if (names.size() <= 256) {
+    py::array_t<uint8_t, py::array::c_style> ids_py(shape);
+    std::copy(ids.begin(), ids.end(), ids_py.mutable_data());
+    return py::make_tuple(ids_py, names_py);
+  }
+  py::array_t<uint16_t, py::array::c_style> ids_py(shape);
+  std::copy(ids.begin(), ids.end(), ids_py.mutable_data());
+  return py::make_tuple(ids_py, names_py);
+}
+
+MettaGrid::MettaGrid(const GameConfig& cfg, const py::list& map, unsigned int seed)
+    : MettaGrid(cfg, MapCells::from_list(map), seed) {}
 
-MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int seed)
+MettaGrid::MettaGrid(const GameConfig& cfg,
+                     const py::array_t<uint8_t, py::array::c_style>& map,
+                     const std::vector<std::string>& names,
+                     unsigned int seed)
+    : MettaGrid(cfg, MapCells::from_ids(map, names), seed) {}
+
+MettaGrid::MettaGrid(const GameConfig& cfg,
+                     const py::array_t<uint16_t, py::array::c_style | py::array::forcecast>& map,
+                     const std::vector<std::string>& names,
+                     unsigned int seed)
+    : MettaGrid(cfg, MapCells::from_ids(map, names), seed) {}
+
+MettaGrid::MettaGrid(const GameConfig& cfg, const MapCells& map, unsigned int seed)
     : obs_width(cfg.obs_width),
       obs_height(cfg.obs_height),
       max_steps(cfg.max_steps),
@@ -48,8 +145,6 @@ MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int see
   _seed = seed;
   _rng = std::mt19937(seed);
 
-  // `map` is a list of lists of strings, which are the map cells.
-
   unsigned int num_agents = cfg.num_agents;
 
   current_step = 0;
@@ -61,21 +156,25 @@ MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int see
                              std::to_string(obs_height) + ") exceeds maximum packable size");
   }
 
-  GridCoord height = static_cast<GridCoord>(py::len(map));
-  GridCoord width = static_cast<GridCoord>(py::len(map[0]));
+  _observation_offsets = PackedCoordinate::observation_offsets(obs_height, obs_width);
+
+  // Every map loaded into this env has the same number of agents, so the pool is sized once, here.
+  _observation_pool = std::make_unique<ThreadPool>(
+      std::min(static_cast<size_t>(std::max(cfg.observation_threads, 1u)), static_cast<size_t>(num_agents)));
 
-  _grid = std::make_unique<Grid>(height, width);
   _obs_encoder = std::make_unique<ObservationEncoder>(inventory_item_names, cfg.recipe_details_obs);
   _feature_normalizations = _obs_encoder->feature_normalizations();
 
-  _event_manager = std::make_unique<EventManager>();
+  _stat_names = std::make_shared<StatNameTable>(inventory_item_names);
   _stats = std::make_unique<StatsTracker>();
   _stats->set_environment(this);
+  _tokens_written_stat = _stat_names->intern("tokens_written");
+  _tokens_dropped_stat = _stat_names->intern("tokens_dropped");
+  _tokens_free_space_stat = _stat_names->intern("tokens_free_space");
+  _invalid_type_stat = _stat_names->intern("action.invalid_type");
+  _invalid_arg_stat = _stat_names->intern("action.invalid_arg");
 
-  _event_manager->init(_grid.get());
-  _event_manager->event_handlers.insert(
-      {EventType::FinishConverting, std::make_unique<ProductionHandler>(_event_manager.get())});
-  _event_manager->event_handlers.insert({EventType::CoolDown, std::make_unique<CoolDownHandler>(_event_manager.get())});
+  _init_grid(map.height, map.width);
 
   _action_success.resize(num_agents);
 
@@ -116,6 +215,7 @@ MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int see
 
   init_action_handlers();
 
+  _object_configs = cfg.objects;
   object_type_names.resize(cfg.objects.size());
 
   for (const auto& [key, object_cfg] : cfg.objects) {
@@ -140,35 +240,87 @@ MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int see
     }
   }
 
-  // Initialize objects from map
+  _populate_map(map);
+
+  // Initialize buffers. The buffers are likely to be re-set by the user anyways,
+  // so nothing above should depend on them before this point.
+  std::vector<ssize_t> shape;
+  shape = {static_cast<ssize_t>(num_agents), static_cast<ssize_t>(_num_observation_tokens), static_cast<ssize_t>(3)};
+  auto observations = py::array_t<ObservationType, py::array::c_style>(shape);
+  auto terminals =
+      py::array_t<TerminalType, py::array::c_style>({static_cast<ssize_t>(num_agents)}, {sizeof(TerminalType)});
+  auto truncations =
+      py::array_t<TruncationType, py::array::c_style>({static_cast<ssize_t>(num_agents)}, {sizeof(TruncationType)});
+  auto rewards = py::array_t<RewardType, py::array::c_style>({static_cast<ssize_t>(num_agents)}, {sizeof(RewardType)});
+
+  set_buffers(observations, terminals, truncations, rewards);
+}
+
+MettaGrid::~MettaGrid() = default;
+
+void MettaGrid::_init_grid(GridCoord height, GridCoord width) {
+  _grid = std::make_shared<Grid>(height, width);
+
+  // Pending events refer to objects on the previous grid, so start with a fresh event manager.
+  _event_manager = std::make_unique<EventManager>();
+  _event_manager->init(_grid.get());
+  _event_manager->event_handlers.insert(
+      {EventType::FinishConverting, std::make_unique<ProductionHandler>(_event_manager.get())});
+  _event_manager->event_handlers.insert({EventType::CoolDown, std::make_unique<CoolDownHandler>(_event_manager.get())});
+}
+
+// Creates the objects in `map` on the current grid.
+void MettaGrid::_populate_map(const MapCells& map) {
+  GridCoord height = _grid->height;
+  GridCoord width = _grid->width;
+
+  // Look each name up once, rather than once per cell. Empty cells and unknown names map to nullptr; unknown names
+  // are only an error if a cell uses them.
+  std::vector<const GridObjectConfig*> name_configs(map.names.size(), nullptr);
+  for (size_t i = 0; i < map.names.size(); i++) {
+    auto it = _object_configs.find(map.names[i]);
+    if (it != _object_configs.end()) {
+      name_configs[i] = it->second.get();
+    }
+  }
+
   std::string grid_hash_data;                                        // String to accumulate grid data for hashing
   grid_hash_data.reserve(static_cast<size_t>(height * width * 20));  // Pre-allocate for efficiency
 
   for (GridCoord r = 0; r < height; r++) {
     for (GridCoord c = 0; c < width; c++) {
-      auto py_cell = map[r].cast<py::list>()[c].cast<py::str>();
-      auto cell = py_cell.cast<std::string>();
+      size_t name_id = map.ids[static_cast<size_t>(r) * width + c];
+      if (name_id >= map.names.size()) {
+        throw std::runtime_error("Cell name id " + std::to_string(name_id) + " at (" + std::to_string(r) + ", " +
+                                 std::to_string(c) + ") is out of range");
+      }
+      const std::string& cell = map.names[name_id];
 
       // Add cell position and type to hash data
-      grid_hash_data += std::to_string(r) + "," + std::to_string(c) + ":" + cell + ";";
+      grid_hash_data += std::to_string(r);
+      grid_hash_data += ',';
+      grid_hash_data += std::to_string(c);
+      grid_hash_data += ':';
+      grid_hash_data += cell;
+      grid_hash_data += ';';
 
       // #HardCodedConfig
       if (cell == "empty" || cell == "." || cell == " ") {
         continue;
       }
 
-      if (!cfg.objects.contains(cell)) {
+      const GridObjectConfig* object_cfg = name_configs[name_id];
+      if (!object_cfg) {
         throw std::runtime_error("Unknown object type: " + cell);
       }
 
-      const GridObjectConfig* object_cfg = cfg.objects.at(cell).get();
-
       // TODO: replace the dynamic casts with virtual dispatch
 
       const WallConfig* wall_config = dynamic_cast<const WallConfig*>(object_cfg);
       if (wall_config) {
         Wall* wall = new Wall(r, c, *wall_config);
         _grid->add_object(wall);
+        _walls.push_back(wall);
         _stats->incr("objects." + cell);
         continue;
       }
@@ -182,9 +334,12 @@ MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int see
 
         Converter* converter = new Converter(r, c, config_with_offsets);
         _grid->add_object(converter);
+        _converters.push_back(converter);
         _stats->incr("objects." + cell);
-        converter->set_event_manager(_event_manager.get());
+        // Attach the environment first, so any stats recorded while the converter starts up use the
+        // shared name table and real inventory item names.
         converter->stats.set_environment(this);
+        converter->set_event_manager(_event_manager.get());
         continue;
       }
 
@@ -232,32 +387,79 @@ MettaGrid::MettaGrid(const GameConfig& cfg, const py::list map, unsigned int see
 
     _resource_rewards[agent_idx] = packed;
   }
+}
 
-  // Initialize buffers. The buffers are likely to be re-set by the user anyways,
-  // so nothing above should depend on them before this point.
-  std::vector<ssize_t> shape;
-  shape = {static_cast<ssize_t>(num_agents), static_cast<ssize_t>(_num_observation_tokens), static_cast<ssize_t>(3)};
-  auto observations = py::array_t<ObservationType, py::array::c_style>(shape);
-  auto terminals =
-      py::array_t<TerminalType, py::array::c_style>({static_cast<ssize_t>(num_agents)}, {sizeof(TerminalType)});
-  auto truncations =
-      py::array_t<TruncationType, py::array::c_style>({static_cast<ssize_t>(num_agents)}, {sizeof(TruncationType)});
-  auto rewards = py::array_t<RewardType, py::array::c_style>({static_cast<ssize_t>(num_agents)}, {sizeof(RewardType)});
+void MettaGrid::load_map(const py::list& map, unsigned int seed) {
+  _load_map(MapCells::from_list(map), seed);
+}
 
-  set_buffers(observations, terminals, truncations, rewards);
+void MettaGrid::load_map(const py::array_t<uint8_t, py::array::c_style>& map,
+                         const std::vector<std::string>& names,
+                         unsigned int seed) {
+  _load_map(MapCells::from_ids(map, names), seed);
 }
 
-MettaGrid::~MettaGrid() = default;
+void MettaGrid::load_map(const py::array_t<uint16_t, py::array::c_style | py::array::forcecast>& map,
+                         const std::vector<std::string>& names,
+                         unsigned int seed) {
+  _load_map(MapCells::from_ids(map, names), seed);
+}
+
+void MettaGrid::_load_map(const MapCells& map, unsigned int seed) {
+  // Check the agent count before touching any state, so that a map with the wrong number of agents leaves this env
+  // as it was.
+  std::vector<size_t> name_counts(map.names.size(), 0);
+  for (uint16_t name_id : map.ids) {
+    if (name_id < name_counts.size()) {
+      name_counts[name_id]++;
+    }
+  }
+  size_t num_agents = 0;
+  for (size_t i = 0; i < map.names.size(); i++) {
+    auto it = _object_configs.find(map.names[i]);
+    if (it != _object_configs.end() && dynamic_cast<const AgentConfig*>(it->second.get())) {
+      num_agents += name_counts[i];
+    }
+  }
+  if (num_agents != static_cast<size_t>(_rewards.shape(0))) {
+    throw std::runtime_error("Map has " + std::to_string(num_agents) + " agents but the environment has " +
+                             std::to_string(_rewards.shape(0)));
+  }
+
+  // Everything below refers to objects owned by the previous grid, so drop it before replacing the grid.
+  _agents.clear();
+  _converters.clear();
+  _walls.clear();
+  _snapshot = py::dict();
+  for (auto& [group_id, group_size] : _group_sizes) {
+    group_size = 0;
+  }
+
+  _init_grid(map.height, map.width);
+  for (size_t i = 0; i < _action_handlers.size(); i++) {
+    _action_handlers[i]->init(_grid.get(), _action_tracker.get(), static_cast<ActionType>(i));
+  }
+  _stats = std::make_unique<StatsTracker>();
+  _stats->set_environment(this);
+
+  _populate_map(map);
+
+  _seed = seed;
+  _rng = std::mt19937(seed);
+  current_step = 0;
+  std::fill(_action_success.begin(), _action_success.end(), false);
+}
 
 void MettaGrid::init_action_handlers() {
   _num_action_handlers = _action_handlers.size();
+  _action_tracker = std::make_unique<ActionTracker>(_num_action_handlers);
   _max_action_priority = 0;
   _max_action_arg = 0;
   _max_action_args.resize(_action_handlers.size());
 
   for (size_t i = 0; i < _action_handlers.size(); i++) {
     auto& handler = _action_handlers[i];
-    handler->init(_grid.get());
+    handler->init(_grid.get(), _action_tracker.get(), static_cast<ActionType>(i));
     if (handler->priority > _max_action_priority) {
       _max_action_priority = handler->priority;
     }
@@ -279,7 +481,8 @@ void MettaGrid::_compute_observation(GridCoord observer_row,
                                      ObservationCoord observable_height,
                                      size_t agent_idx,
                                      ActionType action,
-                                     ActionArg action_arg) {
+                                     ActionArg action_arg,
+                                     ObservationTokenStats& token_stats) {
   // Calculate observation boundaries
   ObservationCoord obs_width_radius = observable_width >> 1;
   ObservationCoord obs_height_radius = observable_height >> 1;
@@ -339,8 +542,15 @@ void MettaGrid::_compute_observation(GridCoord observer_row,
       _obs_encoder->append_tokens_if_room_available(agent_obs_tokens, global_tokens, global_location);
   tokens_written = std::min(attempted_tokens_written, static_cast<size_t>(observation_view.shape(1)));
 
-  // Process locations in increasing manhattan distance order
-  for (const auto& [r_offset, c_offset] : PackedCoordinate::ObservationPattern{observable_height, observable_width}) {
+  // Process locations in increasing manhattan distance order. The env's own window size uses the offsets
+  // computed at construction.
+  std::vector<std::pair<int, int>> other_window_offsets;
+  const std::vector<std::pair<int, int>>* offsets = &_observation_offsets;
+  if (observable_height != obs_height || observable_width != obs_width) {
+    other_window_offsets = PackedCoordinate::observation_offsets(observable_height, observable_width);
+    offsets = &other_window_offsets;
+  }
+  for (const auto& [r_offset, c_offset] : *offsets) {
     int r = static_cast<int>(observer_row) + r_offset;
     int c = static_cast<int>(observer_col) + c_offset;
 
@@ -372,41 +582,91 @@ void MettaGrid::_compute_observation(GridCoord observer_row,
     }
   }
 
-  _stats->add("tokens_written", static_cast<float>(tokens_written));
-  _stats->add("tokens_dropped", static_cast<float>(attempted_tokens_written - tokens_written));
-  _stats->add("tokens_free_space",
-              static_cast<float>(static_cast<size_t>(observation_view.shape(1)) - static_cast<size_t>(tokens_written)));
+  token_stats.tokens_written += tokens_written;
+  token_stats.tokens_dropped += attempted_tokens_written - tokens_written;
+  token_stats.tokens_free_space += static_cast<size_t>(observation_view.shape(1)) - tokens_written;
 }
 
-void MettaGrid::_compute_observations(const py::array_t<ActionType, py::array::c_style> actions) {
+void MettaGrid::_compute_observations(const py::array_t<ActionType, py::array::c_style>& actions) {
   auto actions_view = actions.unchecked<2>();
-  // auto observation_view = _observations.mutable_unchecked<3>();
+  size_t num_agents = _agents.size();
+
+  auto compute_range = [&](size_t begin, size_t end, ObservationTokenStats& token_stats) {
+    for (size_t idx = begin; idx < end; idx++) {
+      auto& agent = _agents[idx];
+      _compute_observation(agent->location.r,
+                           agent->location.c,
+                           obs_width,
+                           obs_height,
+                           idx,
+                           actions_view(idx, 0),
+                           actions_view(idx, 1),
+                           token_stats);
+    }
+  };
+
+  size_t num_threads = _observation_pool->num_threads();
+  std::vector<ObservationTokenStats> thread_stats(num_threads);
+
+  if (num_threads <= 1) {
+    compute_range(0, num_agents, thread_stats[0]);
+  } else {
+    // Refresh cached object features up front, so that worker threads only read them.
+    for (const auto& obj : _grid->objects) {
+      if (obj && obj->obs_dirty()) {
+        obj->refresh_obs_features();
+      }
+    }
+
+    // Each agent writes only its own row of the observation buffer, and the grid is read-only while
+    // observations are computed, so agents can be split across threads. Stats are accumulated per
+    // thread and merged below, since StatsTracker isn't thread-safe. Worker threads don't touch any
+    // Python objects, so the GIL can stay with the calling thread. The pool rethrows any exception
+    // from a worker here, once every chunk has finished.
+    size_t chunk_size = (num_agents + num_threads - 1) / num_threads;
+    _observation_pool->run([&](size_t t) {
+      size_t begin = std::min(t * chunk_size, num_agents);
+      size_t end = std::min(begin + chunk_size, num_agents);
+      compute_range(begin, end, thread_stats[t]);
+    });
+  }
 
-  for (size_t idx = 0; idx < _agents.size(); idx++) {
-    auto& agent = _agents[idx];
-    _compute_observation(
-        agent->location.r, agent->location.c, obs_width, obs_height, idx, actions_view(idx, 0), actions_view(idx, 1));
+  ObservationTokenStats total;
+  for (const auto& token_stats : thread_stats) {
+    total.tokens_written += token_stats.tokens_written;
+    total.tokens_dropped += token_stats.tokens_dropped;
+    total.tokens_free_space += token_stats.tokens_free_space;
   }
+  _stats->add(_tokens_written_stat, static_cast<float>(total.tokens_written));
+  _stats->add(_tokens_dropped_stat, static_cast<float>(total.tokens_dropped));
+  _stats->add(_tokens_free_space_stat, static_cast<float>(total.tokens_free_space));
 }
 
-void MettaGrid::_handle_invalid_action(size_t agent_idx, const std::string& stat, ActionType type, ActionArg arg) {
+void MettaGrid::_handle_invalid_action(size_t agent_idx, StatId stat, ActionType type, ActionArg arg) {
   auto& agent = _agents[agent_idx];
+  auto detail_key = std::make_tuple(stat, type, arg);
+  auto detail_it = _invalid_action_detail_stats.find(detail_key);
+  if (detail_it == _invalid_action_detail_stats.end()) {
+    StatId detail_stat =
+        _stat_names->intern(_stat_names->name(stat) + "." + std::to_string(type) + "." + std::to_string(arg));
+    detail_it = _invalid_action_detail_stats.emplace(detail_key, detail_stat).first;
+  }
   agent->stats.incr(stat);
-  agent->stats.incr(stat + "." + std::to_string(type) + "." + std::to_string(arg));
+  agent->stats.incr(detail_it->second);
   _action_success[agent_idx] = false;
   *agent->reward -= agent->action_failure_penalty;
 }
 
-void MettaGrid::_step(py::array_t<ActionType, py::array::c_style> actions) {
+// _step only touches the buffers' memory (no Python API calls), so it can run without the GIL. See MettaGridBatch.
+void MettaGrid::_step(const py::array_t<ActionType, py::array::c_style>& actions) {
   auto actions_view = actions.unchecked<2>();
 
   // Reset rewards and observations
   auto rewards_view = _rewards.mutable_unchecked<1>();
 
-  std::fill(
-      static_cast<float*>(_rewards.request().ptr), static_cast<float*>(_rewards.request().ptr) + _rewards.size(), 0);
+  std::fill(_rewards.mutable_data(), _rewards.mutable_data() + _rewards.size(), 0);
 
-  auto obs_ptr = static_cast<ObservationType*>(_observations.request().ptr);
+  auto obs_ptr = _observations.mutable_data();
   auto obs_size = _observations.size();
   std::fill(obs_ptr, obs_ptr + obs_size, EmptyTokenByte);
 
@@ -430,7 +690,7 @@ void MettaGrid::_step(py::array_t<ActionType, py::array::c_style> actions) {
       ActionArg arg = actions_view(agent_idx, 1);
 
       if (action < 0 || static_cast<size_t>(action) >= _num_action_handlers) {
-        _handle_invalid_action(agent_idx, "action.invalid_type", action, arg);
+        _handle_invalid_action(agent_idx, _invalid_type_stat, action, arg);
         continue;
       }
       size_t action_idx = static_cast<size_t>(action);
@@ -442,7 +702,7 @@ void MettaGrid::_step(py::array_t<ActionType, py::array::c_style> actions) {
 
       // Tolerate invalid action arguments
       if (arg > _max_action_args[action_idx]) {
-        _handle_invalid_action(agent_idx, "action.invalid_arg", action, arg);
+        _handle_invalid_action(agent_idx, _invalid_arg_stat, action, arg);
         continue;
       }
 
@@ -470,13 +730,9 @@ void MettaGrid::_step(py::array_t<ActionType, py::array::c_style> actions) {
   // Check for truncation
   if (max_steps > 0 && current_step >= max_steps) {
     if (episode_truncates) {
-      std::fill(static_cast<bool*>(_truncations.request().ptr),
-                static_cast<bool*>(_truncations.request().ptr) + _truncations.size(),
-                1);
+      std::fill(_truncations.mutable_data(), _truncations.mutable_data() + _truncations.size(), 1);
     } else {
-      std::fill(static_cast<bool*>(_terminals.request().ptr),
-                static_cast<bool*>(_terminals.request().ptr) + _terminals.size(),
-                1);
+      std::fill(_terminals.mutable_data(), _terminals.mutable_data() + _terminals.size(), 1);
     }
   }
 }
@@ -487,10 +743,7 @@ py::tuple MettaGrid::reset() {
   }
 
   // Clear action tracking from previous episodes
-  ActionHandler::clear_all_tracking();
-  for (auto& handler : _action_handlers) {
-    handler->clear_tracking();
-  }
+  _action_tracker->clear();
 
   // Reset all buffers
   // Views are created only for validating types; actual clearing is done via
@@ -584,8 +837,17 @@ void MettaGrid::set_buffers(const py::array_t<uint8_t, py::array::c_style>& obse
 }
 
 py::tuple MettaGrid::step(const py::array_t<ActionType, py::array::c_style> actions) {
-  _step(actions);
+  {
+    // Neither call touches Python objects, so let other threads (e.g. a double-buffered rollout's policy) run.
+    py::gil_scoped_release release;
+    _step(actions);
+    _apply_group_rewards();
+  }
+
+  return py::make_tuple(_observations, _rewards, _terminals, _truncations, py::dict());
+}
 
+void MettaGrid::_apply_group_rewards() {
   auto rewards_view = _rewards.mutable_unchecked<1>();
 
   // Clear group rewards from previous step
@@ -614,8 +876,181 @@ py::tuple MettaGrid::step(const py::array_t<ActionType, py::array::c_style> acti
       rewards_view(agent_idx) += _group_rewards[group_id];
     }
   }
+}
 
-  return py::make_tuple(_observations, _rewards, _terminals, _truncations, py::dict());
+// A read-only (height, width, layers) view of the grid's object ids, with 0 meaning empty. The view shares
+// memory with the grid, so it stays up to date as the env steps, and it keeps the env alive while in use.
+py::array_t<GridObjectId> MettaGrid::grid_occupancy() {
+  std::vector<ssize_t> shape = {static_cast<ssize_t>(_grid->height),
+                                static_cast<ssize_t>(_grid->width),
+                                static_cast<ssize_t>(GridLayer::GridLayerCount)};
+  std::vector<ssize_t> strides = {static_cast<ssize_t>(sizeof(GridObjectId) * _grid->width * GridLayer::GridLayerCount),
+                                  static_cast<ssize_t>(sizeof(GridObjectId) * GridLayer::GridLayerCount),
+                                  static_cast<ssize_t>(sizeof(GridObjectId))};
+  // The view keeps its grid alive, so it stays valid (but stops updating) if load_map replaces the grid.
+  auto* owner = new std::shared_ptr<Grid>(_grid);
+  py::capsule base(owner, [](void* ptr) { delete static_cast<std::shared_ptr<Grid>*>(ptr); });
+  py::array_t<GridObjectId> occupancy(shape, strides, _grid->data(), base);
+  occupancy.attr("flags").attr("writeable") = false;
+  return occupancy;
+}
+
+namespace {
+
+template <typename T>
+py::array_t<T> snapshot_column(py::dict& table, const char* name, size_t rows) {
+  auto column = py::array_t<T>(static_cast<ssize_t>(rows));
+  std::fill(column.mutable_data(), column.mutable_data() + rows, T{});
+  table[name] = column;
+  return column;
+}
+
+template <typename T>
+T* snapshot_data(py::dict& table, const char* name) {
+  return table[name].cast<py::array_t<T>>().mutable_data();
+}
+
+// Columns shared by every object kind.
+void add_location_columns(py::dict& table, size_t rows) {
+  snapshot_column<GridObjectId>(table, "id", rows);
+  snapshot_column<TypeId>(table, "type_id", rows);
+  snapshot_column<GridCoord>(table, "r", rows);
+  snapshot_column<GridCoord>(table, "c", rows);
+  snapshot_column<Layer>(table, "layer", rows);
+}
+
+// Pointers into a kind's location columns, looked up once per snapshot rather than once per object.
+struct LocationColumns {
+  GridObjectId* ids;
+  TypeId* type_ids;
+  GridCoord* rs;
+  GridCoord* cs;
+  Layer* layers;
+
+  explicit LocationColumns(py::dict& table)
+      : ids(snapshot_data<GridObjectId>(table, "id")),
+        type_ids(snapshot_data<TypeId>(table, "type_id")),
+        rs(snapshot_data<GridCoord>(table, "r")),
+        cs(snapshot_data<GridCoord>(table, "c")),
+        layers(snapshot_data<Layer>(table, "layer")) {}
+
+  void fill(size_t row, const GridObject& obj) {
+    ids[row] = obj.id;
+    type_ids[row] = obj.type_id;
+    rs[row] = obj.location.r;
+    cs[row] = obj.location.c;
+    layers[row] = obj.location.layer;
+  }
+};
+
+py::array_t<InventoryQuantity> inventory_matrix(size_t rows, size_t items) {
+  std::vector<ssize_t> shape = {static_cast<ssize_t>(rows), static_cast<ssize_t>(items)};
+  auto matrix = py::array_t<InventoryQuantity>(shape);
+  std::fill(matrix.mutable_data(), matrix.mutable_data() + matrix.size(), 0);
+  return matrix;
+}
+
+void fill_inventory_row(InventoryQuantity* matrix,
+                        size_t row,
+                        size_t items,
+                        const std::map<InventoryItem, InventoryQuantity>& inventory) {
+  InventoryQuantity* inventory_row = matrix + row * items;
+  std::fill(inventory_row, inventory_row + items, 0);
+  for (const auto& [item, amount] : inventory) {
+    if (item < items) {
+      inventory_row[item] = amount;
+    }
+  }
+}
+
+}  // namespace
+
+void MettaGrid::_allocate_snapshot() {
+  size_t num_items = inventory_item_names.size();
+
+  py::dict agents;
+  add_location_columns(agents, _agents.size());
+  snapshot_column<GridObjectId>(agents, "agent_id", _agents.size());
+  snapshot_column<ObservationType>(agents, "group", _agents.size());
+  snapshot_column<uint8_t>(agents, "orientation", _agents.size());
+  snapshot_column<ObservationType>(agents, "color", _agents.size());
+  snapshot_column<ObservationType>(agents, "glyph", _agents.size());
+  snapshot_column<int16_t>(agents, "frozen", _agents.size());
+  agents["inventory"] = inventory_matrix(_agents.size(), num_items);
+
+  py::dict converters;
+  add_location_columns(converters, _converters.size());
+  snapshot_column<ObservationType>(converters, "color", _converters.size());
+  snapshot_column<bool>(converters, "converting", _converters.size());
+  snapshot_column<bool>(converters, "cooling_down", _converters.size());
+  converters["inventory"] = inventory_matrix(_converters.size(), num_items);
+
+  py::dict walls;
+  add_location_columns(walls, _walls.size());
+  snapshot_column<bool>(walls, "swappable", _walls.size());
+
+  _snapshot["agents"] = agents;
+  _snapshot["converters"] = converters;
+  _snapshot["walls"] = walls;
+}
+
+// Columnar snapshot of every object, grouped by kind ("agents", "converters", "walls"). Each kind maps column
+// names to 1-d arrays with one row per object, plus an (objects, inventory items) "inventory" matrix for agents
+// and converters. Agents are ordered by agent_id.
+//
+// The arrays are allocated once and refilled in place on every call, so this doesn't build any per-object
+// Python objects. Callers that keep a snapshot across steps need to copy it.
+py::dict MettaGrid::grid_snapshot() {
+  if (_snapshot.empty()) {
+    _allocate_snapshot();
+  }
+  size_t num_items = inventory_item_names.size();
+
+  py::dict agents = _snapshot["agents"];
+  LocationColumns agent_locations(agents);
+  auto* agent_ids = snapshot_data<GridObjectId>(agents, "agent_id");
+  auto* groups = snapshot_data<ObservationType>(agents, "group");
+  auto* orientations = snapshot_data<uint8_t>(agents, "orientation");
+  auto* agent_colors = snapshot_data<ObservationType>(agents, "color");
+  auto* glyphs = snapshot_data<ObservationType>(agents, "glyph");
+  auto* frozen = snapshot_data<int16_t>(agents, "frozen");
+  auto* agent_inventory = agents["inventory"].cast<py::array_t<InventoryQuantity>>().mutable_data();
+  for (size_t row = 0; row < _agents.size(); row++) {
+    const Agent& agent = *_agents[row];
+    agent_locations.fill(row, agent);
+    agent_ids[row] = agent.agent_id;
+    groups[row] = agent.group;
+    orientations[row] = static_cast<uint8_t>(agent.orientation);
+    agent_colors[row] = agent.color;
+    glyphs[row] = agent.glyph;
+    frozen[row] = agent.frozen;
+    fill_inventory_row(agent_inventory, row, num_items, agent.inventory);
+  }
+
+  py::dict converters = _snapshot["converters"];
+  LocationColumns converter_locations(converters);
+  auto* converter_colors = snapshot_data<ObservationType>(converters, "color");
+  auto* converting = snapshot_data<bool>(converters, "converting");
+  auto* cooling_down = snapshot_data<bool>(converters, "cooling_down");
+  auto* converter_inventory = converters["inventory"].cast<py::array_t<InventoryQuantity>>().mutable_data();
+  for (size_t row = 0; row < _converters.size(); row++) {
+    const Converter& converter = *_converters[row];
+    converter_locations.fill(row, converter);
+    converter_colors[row] = converter.color;
+    converting[row] = converter.converting;
+    cooling_down[row] = converter.cooling_down;
+    fill_inventory_row(converter_inventory, row, num_items, converter.inventory);
+  }
+
+  py::dict walls = _snapshot["walls"];
+  LocationColumns wall_locations(walls);
+  auto* swappable = snapshot_data<bool>(walls, "swappable");
+  for (size_t row = 0; row < _walls.size(); row++) {
+    wall_locations.fill(row, *_walls[row]);
+    swappable[row] = _walls[row]->swappable();
+  }
+
+  return _snapshot;
 }
 
 py::dict MettaGrid::grid_objects() {
@@ -827,9 +1262,9 @@ unsigned int StatsTracker::get_current_step() const {
   return static_cast<MettaGrid*>(_env)->current_step;
 }
 
-const std::string& StatsTracker::inventory_item_name(InventoryItem item) const {
-  if (!_env) return StatsTracker::NO_ENV_INVENTORY_ITEM_NAME;
-  return _env->inventory_item_names[item];
+std::shared_ptr<StatNameTable> StatsTracker::env_name_table() const {
+  if (!_env) return nullptr;
+  return static_cast<MettaGrid*>(_env)->stat_names();
 }
 
 // Pybind11 module definition
@@ -858,9 +1293,29 @@ PYBIND11_MODULE(mettagrid_c, m) {
 
   pc_m.def("is_empty", &PackedCoordinate::is_empty, py::arg("packed"));
 
+  m.def("encode_grid", &encode_grid, py::arg("grid"));
+
   // MettaGrid class bindings
   py::class_<MettaGrid>(m, "MettaGrid")
       .def(py::init<const GameConfig&, const py::list&, unsigned int>())
+      // uint8 maps are registered first, so that pybind11 takes them as they are. Maps of any other integer type
+      // are converted to uint16.
+      .def(py::init<const GameConfig&,
+                    const py::array_t<uint8_t, py::array::c_style>&,
+                    const std::vector<std::string>&,
+                    unsigned int>(),
+           py::arg("cfg"),
+           py::arg("map"),
+           py::arg("names"),
+           py::arg("seed"))
+      .def(py::init<const GameConfig&,
+                    const py::array_t<uint16_t, py::array::c_style | py::array::forcecast>&,
+                    const std::vector<std::string>&,
+                    unsigned int>(),
+           py::arg("cfg"),
+           py::arg("map"),
+           py::arg("names"),
+           py::arg("seed"))
       .def("reset", &MettaGrid::reset)
       .def("step", &MettaGrid::step, py::arg("actions").noconvert())
       .def("set_buffers",
@@ -870,6 +1325,26 @@ PYBIND11_MODULE(mettagrid_c, m) {
            py::arg("truncations").noconvert(),
            py::arg("rewards").noconvert())
       .def("grid_objects", &MettaGrid::grid_objects)
+      .def("grid_occupancy", &MettaGrid::grid_occupancy)
+      .def("grid_snapshot", &MettaGrid::grid_snapshot)
+      .def("load_map",
+           py::overload_cast<const py::list&, unsigned int>(&MettaGrid::load_map),
+           py::arg("map"),
+           py::arg("seed"))
+      .def("load_map",
+           py::overload_cast<const py::array_t<uint8_t, py::array::c_style>&,
+                             const std::vector<std::string>&,
+                             unsigned int>(&MettaGrid::load_map),
+           py::arg("map"),
+           py::arg("names"),
+           py::arg("seed"))
+      .def("load_map",
+           py::overload_cast<const py::array_t<uint16_t, py::array::c_style | py::array::forcecast>&,
+                             const std::vector<std::string>&,
+                             unsigned int>(&MettaGrid::load_map),
+           py::arg("map"),
+           py::arg("names"),
+           py::arg("seed"))
       .def("action_names", &MettaGrid::action_names)
       .def_property_readonly("map_width", &MettaGrid::map_width)
       .def_property_readonly("map_height", &MettaGrid::map_height)
@@ -890,6 +1365,21 @@ PYBIND11_MODULE(mettagrid_c, m) {
       .def("inventory_item_names", &MettaGrid::inventory_item_names_py)
       .def_readonly("initial_grid_hash", &MettaGrid::initial_grid_hash);
 
+  py::class_<MettaGridBatch>(m, "MettaGridBatch")
+      .def(py::init<const GameConfig&, const py::list&, unsigned int, unsigned int>(),
+           py::arg("env_cfg"),
+           py::arg("maps"),
+           py::arg("seed"),
+           py::arg("num_threads") = 1)
+      .def("reset", &MettaGridBatch::reset)
+      .def("step", &MettaGridBatch::step, py::arg("actions").noconvert())
+      .def("add_maps", &MettaGridBatch::add_maps, py::arg("maps"))
+      .def("env", &MettaGridBatch::env, py::arg("env_idx"), py::return_value_policy::reference_internal)
+      .def_property_readonly("num_queued_maps", &MettaGridBatch::num_queued_maps)
+      .def_property_readonly("num_envs", &MettaGridBatch::num_envs)
+      .def_property_readonly("agents_per_env", &MettaGridBatch::agents_per_env)
+      .def_property_readonly("num_agents", &MettaGridBatch::num_agents);
+
   // Expose this so we can cast python WallConfig / AgentConfig / ConverterConfig to a common GridConfig cpp object.
   py::class_<GridObjectConfig, std::shared_ptr<GridObjectConfig>>(m, "GridObjectConfig");
 
@@ -1028,7 +1518,8 @@ PYBIND11_MODULE(mettagrid_c, m) {
                     const std::map<std::string, std::shared_ptr<ActionConfig>>&,
                     const std::map<std::string, std::shared_ptr<GridObjectConfig>>&,
                     bool,
-                    bool>(),
+                    bool,
+                    unsigned int>(),
            py::arg("num_agents"),
            py::arg("max_steps"),
            py::arg("episode_truncates"),
@@ -1040,7 +1531,8 @@ PYBIND11_MODULE(mettagrid_c, m) {
            py::arg("actions"),
            py::arg("objects"),
            py::arg("track_movement_metrics"),
-           py::arg("recipe_details_obs") = false)
+           py::arg("recipe_details_obs") = false,
+           py::arg("observation_threads") = 1)
       .def_readwrite("num_agents", &GameConfig::num_agents)
       .def_readwrite("max_steps", &GameConfig::max_steps)
       .def_readwrite("episode_truncates", &GameConfig::episode_truncates)
@@ -1050,7 +1542,8 @@ PYBIND11_MODULE(mettagrid_c, m) {
       .def_readwrite("num_observation_tokens", &GameConfig::num_observation_tokens)
       .def_readwrite("global_obs", &GameConfig::global_obs)
       .def_readwrite("track_movement_metrics", &GameConfig::track_movement_metrics)
-      .def_readwrite("recipe_details_obs", &GameConfig::recipe_details_obs);
+      .def_readwrite("recipe_details_obs", &GameConfig::recipe_details_obs)
+      .def_readwrite("observation_threads", &GameConfig::observation_threads);
   // We don't expose these since they're copied on read, and this means that mutations
   // to the dictionaries don't impact the underlying cpp objects. This is confusing!
   // This can be fixed, but until we do that, we're not exposing these.
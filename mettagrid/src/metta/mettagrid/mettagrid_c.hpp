@@ -16,21 +16,27 @@
 #include <map>
 #include <memory>
 #include <random>
+#include <stdexcept>
 #include <string>
+#include <tuple>
 #include <vector>
 
 #include "grid_object.hpp"
 #include "packed_coordinate.hpp"
+#include "stats_tracker.hpp"
 #include "types.hpp"
 
 // Forward declarations of existing C++ classes
 class Grid;
 class EventManager;
-class StatsTracker;
 class ActionHandler;
+class ActionTracker;
 class Agent;
+class Converter;
+class Wall;
 class ObservationEncoder;
 class GridObject;
+class ThreadPool;
 
 struct GridObjectConfig;
 struct ConverterConfig;
@@ -63,11 +69,59 @@ struct GameConfig {
   std::map<std::string, std::shared_ptr<GridObjectConfig>> objects;
   bool track_movement_metrics;
   bool recipe_details_obs = false;
+  // Number of threads used to compute observations. Agents are split into contiguous chunks, one per
+  // thread, and the threads are kept for the env's lifetime. 1 (the default) computes observations serially
+  // on the calling thread.
+  unsigned int observation_threads = 1;
 };
 
+// A map as one id per cell, row-major, into a table of cell names like "wall", "agent.red" or "empty".
+struct MapCells {
+  GridCoord height = 0;
+  GridCoord width = 0;
+  std::vector<uint16_t> ids;
+  std::vector<std::string> names;
+
+  // From a list of lists of cell names.
+  static MapCells from_list(const py::list& map);
+  // From a (height, width) array of indices into `names`. Called with the array's own id type, so that uint8 grids
+  // (what Level.encode() produces for up to 256 names) are read as they are rather than converted to uint16 first.
+  template <typename Id, int ExtraFlags>
+  static MapCells from_ids(const py::array_t<Id, ExtraFlags>& ids, const std::vector<std::string>& names) {
+    if (ids.ndim() != 2) {
+      throw std::runtime_error("map must be a 2d array of cell name ids");
+    }
+    MapCells cells;
+    cells.height = static_cast<GridCoord>(ids.shape(0));
+    cells.width = static_cast<GridCoord>(ids.shape(1));
+    cells.ids.assign(ids.data(), ids.data() + ids.size());
+    cells.names = names;
+    return cells;
+  }
+};
+
+// Encodes a (height, width) numpy array of cell names (dtype str) as a uint8 array of indices into a list of names,
+// in order of first appearance, or uint16 if there are more than 256 names. Reads the array's buffer directly,
+// rather than converting every cell to a Python string.
+py::tuple encode_grid(const py::array& grid);
+
 class METTAGRID_API MettaGrid {
+  // Steps envs through _step directly, so that it can do so without holding the GIL.
+  friend class MettaGridBatch;
+
 public:
-  MettaGrid(const GameConfig& cfg, py::list map, unsigned int seed);
+  // `map` is a list of lists of cell names.
+  MettaGrid(const GameConfig& cfg, const py::list& map, unsigned int seed);
+  // `map` is a (height, width) array of indices into `names`, which avoids converting every cell from Python.
+  MettaGrid(const GameConfig& cfg,
+            const py::array_t<uint8_t, py::array::c_style>& map,
+            const std::vector<std::string>& names,
+            unsigned int seed);
+  MettaGrid(const GameConfig& cfg,
+            const py::array_t<uint16_t, py::array::c_style | py::array::forcecast>& map,
+            const std::vector<std::string>& names,
+            unsigned int seed);
+  MettaGrid(const GameConfig& cfg, const MapCells& map, unsigned int seed);
   ~MettaGrid();
 
   ObservationCoord obs_width;
@@ -82,6 +136,15 @@ public:
 
   // Python API methods
   py::tuple reset();
+  // Replace the map with `map`, reusing this env's config, action handlers, observation encoder and buffers.
+  // The map must have the same number of agents. Call reset() afterwards to start the episode.
+  void load_map(const py::list& map, unsigned int seed);
+  void load_map(const py::array_t<uint8_t, py::array::c_style>& map,
+                const std::vector<std::string>& names,
+                unsigned int seed);
+  void load_map(const py::array_t<uint16_t, py::array::c_style | py::array::forcecast>& map,
+                const std::vector<std::string>& names,
+                unsigned int seed);
   // In general, these types need to match what puffer wants to use.
   py::tuple step(py::array_t<ActionType, py::array::c_style> actions);
   void set_buffers(const py::array_t<ObservationType, py::array::c_style>& observations,
@@ -90,6 +153,8 @@ public:
                    const py::array_t<RewardType, py::array::c_style>& rewards);
   void validate_buffers();
   py::dict grid_objects();
+  py::array_t<GridObjectId> grid_occupancy();
+  py::dict grid_snapshot();
   py::list action_names();
 
   GridCoord map_width();
@@ -106,6 +171,11 @@ public:
   py::list object_type_names_py();
   py::list inventory_item_names_py();
 
+  // Stat names shared by every StatsTracker in this environment.
+  std::shared_ptr<StatNameTable> stat_names() const {
+    return _stat_names;
+  }
+
   uint64_t initial_grid_hash;
 
 private:
@@ -116,23 +186,43 @@ private:
   std::map<unsigned int, unsigned int> _group_sizes;
   std::vector<RewardType> _group_rewards;
 
-  std::unique_ptr<Grid> _grid;
+  // Shared so that grid_occupancy() views can keep a grid alive after load_map() replaces it.
+  std::shared_ptr<Grid> _grid;
   std::unique_ptr<EventManager> _event_manager;
+  std::map<std::string, std::shared_ptr<GridObjectConfig>> _object_configs;
 
   std::vector<std::unique_ptr<ActionHandler>> _action_handlers;
+  std::unique_ptr<ActionTracker> _action_tracker;
   size_t _num_action_handlers;
   std::vector<unsigned char> _max_action_args;
   unsigned char _max_action_arg;
   unsigned char _max_action_priority;
 
   std::unique_ptr<ObservationEncoder> _obs_encoder;
+  std::shared_ptr<StatNameTable> _stat_names;
   std::unique_ptr<StatsTracker> _stats;
 
+  // Ids for stats updated every step, registered once at construction.
+  StatId _tokens_written_stat;
+  StatId _tokens_dropped_stat;
+  StatId _tokens_free_space_stat;
+  StatId _invalid_type_stat;
+  StatId _invalid_arg_stat;
+  // "<invalid stat>.<type>.<arg>" ids, keyed by (invalid stat, type, arg), so repeated invalid actions
+  // don't rebuild the name.
+  std::map<std::tuple<StatId, ActionType, ActionArg>, StatId> _invalid_action_detail_stats;
+
   size_t _num_observation_tokens;
 
   // TODO: currently these are owned and destroyed by the grid, but we should
   // probably move ownership here.
   std::vector<Agent*> _agents;
+  std::vector<Converter*> _converters;
+  std::vector<Wall*> _walls;
+
+  // Column buffers returned by grid_snapshot(), allocated on first use and refilled in place on every call.
+  py::dict _snapshot;
+  void _allocate_snapshot();
 
   // We'd prefer to store these as more raw c-style arrays, but we need to both
   // operate on the memory directly and return them to python.
@@ -152,7 +242,25 @@ private:
   // Movement tracking
   bool _track_movement_metrics;
 
+  // Computes observations for contiguous chunks of agents in parallel. Has a single thread (the caller's) unless
+  // GameConfig::observation_threads is more than 1.
+  std::unique_ptr<ThreadPool> _observation_pool;
+
+  // Observation window offsets in increasing manhattan distance order, for (obs_height, obs_width).
+  std::vector<std::pair<int, int>> _observation_offsets;
+
+  // Observation token stats, accumulated per thread while computing observations and merged into
+  // _stats once per step.
+  struct ObservationTokenStats {
+    size_t tokens_written = 0;
+    size_t tokens_dropped = 0;
+    size_t tokens_free_space = 0;
+  };
+
   void init_action_handlers();
+  void _init_grid(GridCoord height, GridCoord width);
+  void _populate_map(const MapCells& map);
+  void _load_map(const MapCells& map, unsigned int seed);
   void add_agent(Agent* agent);
   void _compute_observation(GridCoord observer_r,
                             GridCoord observer_c,
@@ -160,11 +268,13 @@ private:
                             ObservationCoord obs_height,
                             size_t agent_idx,
                             ActionType action,
-                            ActionArg action_arg);
-  void _compute_observations(py::array_t<ActionType, py::array::c_style> actions);
-  void _step(py::array_t<ActionType, py::array::c_style> actions);
+                            ActionArg action_arg,
+                            ObservationTokenStats& token_stats);
+  void _compute_observations(const py::array_t<ActionType, py::array::c_style>& actions);
+  void _step(const py::array_t<ActionType, py::array::c_style>& actions);
+  void _apply_group_rewards();
 
-  void _handle_invalid_action(size_t agent_idx, const std::string& stat, ActionType type, ActionArg arg);
+  void _handle_invalid_action(size_t agent_idx, StatId stat, ActionType type, ActionArg arg);
   AgentConfig _create_agent_config(const py::dict& agent_group_cfg_py);
   ConverterConfig _create_converter_config(const py::dict& converter_cfg_py);
   WallConfig _create_wall_config(const py::dict& wall_cfg_py);
@@ -1,4 +1,4 @@
-from typing import Optional, Tuple, TypeAlias, TypedDict
+from typing import Optional, Tuple, TypeAlias, TypedDict, overload
 
 import gymnasium as gym
 import numpy as np
@@ -46,6 +46,13 @@ class PackedCoordinate:
         """Check if packed value represents empty location."""
         ...
 
+def encode_grid(grid: np.ndarray) -> Tuple[np.ndarray, list[str]]:
+    """Encode a 2d array of cell names as (ids, names).
+    ids is a uint8 array (uint16 if there are more than 256 names) of indices into names, which lists the
+    distinct cell names in order of first appearance.
+    """
+    ...
+
 class GridObjectConfig: ...
 
 class WallConfig(GridObjectConfig):
@@ -136,13 +143,22 @@ class MettaGrid:
     observation_space: gym.spaces.Box
     initial_grid_hash: int
 
+    @overload
     def __init__(self, env_cfg: GameConfig, map: list, seed: int) -> None: ...
+    @overload
+    def __init__(self, env_cfg: GameConfig, map: np.ndarray, names: list[str], seed: int) -> None: ...
     def reset(self) -> Tuple[np.ndarray, dict]: ...
     def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]: ...
     def set_buffers(
         self, observations: np.ndarray, terminals: np.ndarray, truncations: np.ndarray, rewards: np.ndarray
     ) -> None: ...
     def grid_objects(self) -> dict[int, dict]: ...
+    def grid_occupancy(self) -> np.ndarray: ...
+    def grid_snapshot(self) -> dict[str, dict[str, np.ndarray]]: ...
+    @overload
+    def load_map(self, map: list, seed: int) -> None: ...
+    @overload
+    def load_map(self, map: np.ndarray, names: list[str], seed: int) -> None: ...
     def action_names(self) -> list[str]: ...
     def get_episode_rewards(self) -> np.ndarray: ...
     def get_episode_stats(self) -> EpisodeStats: ...
@@ -152,3 +168,31 @@ class MettaGrid:
     def inventory_item_names(self) -> list[str]: ...
     def feature_normalizations(self) -> dict[int, float]: ...
     def feature_spec(self) -> dict[str, dict[str, float | int]]: ...
+
+class BatchEpisode(TypedDict):
+    env_idx: int
+    episode_rewards: np.ndarray
+    episode_stats: EpisodeStats
+    steps: int
+
+class MettaGridBatch:
+    """Steps several MettaGrid envs with one call, writing into shared contiguous buffers.
+
+    Agent rows are grouped by env: env i owns rows [i * agents_per_env, (i + 1) * agents_per_env). Envs that finish
+    an episode are rebuilt from the next queued map (or their previous map) and reset automatically. The step that
+    finishes an episode reports its rewards and dones, the observations of the new episode, and the finished
+    episode under infos["episodes"].
+    """
+
+    num_envs: int
+    agents_per_env: int
+    num_agents: int
+    num_queued_maps: int
+
+    def __init__(self, env_cfg: GameConfig, maps: list[list], seed: int, num_threads: int = 1) -> None: ...
+    def reset(self) -> Tuple[np.ndarray, dict]: ...
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict[str, list[BatchEpisode]]]: ...
+    def add_maps(self, maps: list[list]) -> None: ...
+    def env(self, env_idx: int) -> MettaGrid: ...
@@ -205,6 +205,10 @@ class PyGameConfig(BaseModelWithForbidExtra):
         default=False, description="Enable movement metrics tracking (sequential rotations)"
     )
 
+    observation_threads: int = Field(
+        default=1, ge=1, description="Number of threads used to compute observations (1 means serial)"
+    )
+
 
 class PyPolicyGameConfig(PyGameConfig):
     obs_width: Literal[11]
@@ -15,9 +15,10 @@ from pydantic import validate_call
 from typing_extensions import override
 
 from metta.common.profiling.stopwatch import Stopwatch, with_instance_timer
-from metta.mettagrid.curriculum.core import Curriculum
-from metta.mettagrid.level_builder import Level
-from metta.mettagrid.mettagrid_c import MettaGrid
+from metta.mettagrid.curriculum.core import Curriculum, Task
+from metta.mettagrid.level_builder import Level, count_agents
+from metta.mettagrid.level_prefetcher import LevelPrefetcher
+from metta.mettagrid.mettagrid_c import GameConfig, MettaGrid
 from metta.mettagrid.mettagrid_c_config import from_mettagrid_config
 from metta.mettagrid.replay_writer import ReplayWriter
 from metta.mettagrid.stats_writer import StatsWriter
@@ -67,6 +68,7 @@ class MettaGridEnv(PufferEnv, GymEnv):
         stats_writer: Optional[StatsWriter] = None,
         replay_writer: Optional[ReplayWriter] = None,
         is_training: bool = False,
+        prefetch_levels: bool = False,
         **kwargs,
     ):
         self.timer = Stopwatch(logger)
@@ -92,7 +94,21 @@ class MettaGridEnv(PufferEnv, GymEnv):
 
         self._is_training = is_training
 
+        # With prefetching, the next task is sampled when an episode starts, and its level is built in the
+        # background while the episode runs. So the curriculum picks each task before complete_task() reports the
+        # one before it, and adaptive curricula react to a result one episode later than without prefetching. A
+        # fixed level never needs building, so there's nothing to prefetch.
+        self._level_prefetcher = LevelPrefetcher() if prefetch_levels and level is None else None
+        self._next_task: Task | None = None
+
+        # Converted C++ configs by task name, with the game config they were converted from. Converting is
+        # slow, so tasks whose game config hasn't changed since it was last seen reuse it.
+        self._c_cfgs: dict[str, tuple[dict, GameConfig]] = {}
+        # The config self._c_env was built with. While tasks keep using it, resets only load a new map.
+        self._c_env_cfg: GameConfig | None = None
+
         self._initialize_c_env()
+        self._prefetch_next_level()
         super().__init__(buf)
 
         if self._render_mode is not None:
@@ -108,19 +124,36 @@ class MettaGridEnv(PufferEnv, GymEnv):
     def _make_episode_id(self):
         return str(uuid.uuid4())
 
+    def _prefetch_next_level(self) -> None:
+        if self._level_prefetcher is not None:
+            self._next_task = self._curriculum.get_task()
+            self._level_prefetcher.prefetch(self._next_task)
+
+    def _get_next_task(self) -> Task:
+        if self._next_task is None:
+            return self._curriculum.get_task()
+        task, self._next_task = self._next_task, None
+        return task
+
     @with_instance_timer("_initialize_c_env")
-    def _initialize_c_env(self) -> None:
-        """Initialize the C++ environment."""
+    def _initialize_c_env(self, level: Optional[Level] = None) -> None:
+        """Initialize the C++ environment, reusing the current one if the task's game config hasn't changed."""
         task = self._task
         task_cfg = task.env_cfg()
-        level = self._level
+        if level is None:
+            level = self._level
 
         if level is None:
             with self.timer("_initialize_c_env.build_map"):
-                level = task_cfg.game.map_builder.build()
+                if self._level_prefetcher is not None:
+                    level = self._level_prefetcher.get(task)
+                else:
+                    level = task_cfg.game.map_builder.build()
+
+        map_ids, map_names = level.encode()
 
         # Validate the level
-        level_agents = np.count_nonzero(np.char.startswith(level.grid, "agent"))
+        level_agents = count_agents(map_ids, map_names)
         assert task_cfg.game.num_agents == level_agents, (
             f"Number of agents {task_cfg.game.num_agents} does not match number of agents in map {level_agents}"
         )
@@ -137,29 +170,47 @@ class MettaGridEnv(PufferEnv, GymEnv):
 
         self._map_labels = level.labels
 
-        # Convert string array to list of strings for C++ compatibility
-        # TODO: push the not-numpy-array higher up the stack, and consider pushing not-a-sparse-list lower.
-        with self.timer("_initialize_c_env.make_c_env"):
-            c_cfg = None
-            try:
-                c_cfg = from_mettagrid_config(game_config_dict)
-            except Exception as e:
-                logger.error(f"Error initializing C++ environment: {e}")
-                logger.error(f"Game config: {game_config_dict}")
-                raise e
-
-            self._c_env = MettaGrid(c_cfg, level.grid.tolist(), self._current_seed)
+        # The map builder is a fresh object for every task, and isn't part of the C++ config.
+        cfg_key = {k: v for k, v in game_config_dict.items() if k != "map_builder"}
+        cached = self._c_cfgs.get(task.name())
+        if cached is not None and cached[0] == cfg_key:
+            c_cfg = cached[1]
+        else:
+            with self.timer("_initialize_c_env.convert_config"):
+                try:
+                    c_cfg = from_mettagrid_config(game_config_dict)
+                except Exception as e:
+                    logger.error(f"Error initializing C++ environment: {e}")
+                    logger.error(f"Game config: {game_config_dict}")
+                    raise e
+            self._c_cfgs[task.name()] = (cfg_key, c_cfg)
+
+        if c_cfg is self._c_env_cfg:
+            with self.timer("_initialize_c_env.load_map"):
+                self._c_env.load_map(map_ids, map_names, self._current_seed)
+        else:
+            with self.timer("_initialize_c_env.make_c_env"):
+                self._c_env = MettaGrid(c_cfg, map_ids, map_names, self._current_seed)
+            self._c_env_cfg = c_cfg
 
         self._grid_env = self._c_env
 
     @override  # pufferlib.PufferEnv.reset
-    @with_instance_timer("reset")
     def reset(self, seed: int | None = None) -> tuple[np.ndarray, dict]:
+        return self._reset(seed)
+
+    def reset_with_level(self, level: Level, seed: int | None = None) -> tuple[np.ndarray, dict]:
+        """Reset the environment onto `level` instead of building a map for the next task."""
+        return self._reset(seed, level)
+
+    @with_instance_timer("reset")
+    def _reset(self, seed: int | None = None, level: Optional[Level] = None) -> tuple[np.ndarray, dict]:
         self.timer.stop("thread_idle")
 
-        self._task = self._curriculum.get_task()
+        self._task = self._get_next_task()
 
-        self._initialize_c_env()
+        self._initialize_c_env(level)
+        self._prefetch_next_level()
         self._steps = 0
         self._resets += 1
 
@@ -234,7 +285,8 @@ class MettaGridEnv(PufferEnv, GymEnv):
 
     @override
     def close(self):
-        pass
+        if self._level_prefetcher is not None:
+            self._level_prefetcher.cancel()
 
     def process_episode_stats(self, infos: Dict[str, Any]):
         self.timer.start("process_episode_stats")
@@ -302,11 +354,10 @@ class MettaGridEnv(PufferEnv, GymEnv):
                     for k, v in agent_stats.items():
                         agent_metrics[agent_idx][k] = float(v)
 
-                grid_objects: Dict[int, Any] = self._c_env.grid_objects()
-                # iterate over grid_object values
-                agent_groups: Dict[int, int] = {
-                    v["agent_id"]: v["agent:group"] for v in grid_objects.values() if v["type"] == 0
-                }
+                agents = self._c_env.grid_snapshot()["agents"]
+                agent_groups: Dict[int, int] = dict(
+                    zip(agents["agent_id"].tolist(), agents["group"].tolist(), strict=True)
+                )
 
                 self._stats_writer.record_episode(
                     self._episode_id,
@@ -339,6 +390,8 @@ class MettaGridEnv(PufferEnv, GymEnv):
             **{f"msec/{op}": lap_elapsed * 1000 for op, lap_elapsed in lap_times.items()},
             "frac/thread_idle": lap_thread_idle_time / wall_time_for_lap,
         }
+        if self._level_prefetcher is not None:
+            infos["timing_per_epoch"].update(self._level_prefetcher.stats())
         infos["timing_cumulative"] = {
             **{
                 f"active_frac/{op}": elapsed / adjusted_wall_time if adjusted_wall_time > 0 else 0
@@ -466,6 +519,28 @@ class MettaGridEnv(PufferEnv, GymEnv):
         """
         return self._c_env.grid_objects()
 
+    @property
+    def grid_occupancy(self) -> np.ndarray:
+        """
+        Get a read-only view of the object ids on the grid, with shape (height, width, layers).
+
+        An id of 0 means the cell is empty. The view shares memory with the environment, so it reflects
+        the current state without copying, and it can be used to look up entries of grid_objects.
+        """
+        return self._c_env.grid_occupancy()
+
+    @property
+    def grid_snapshot(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Get the state of all objects as columns, grouped by kind ("agents", "converters" and "walls").
+
+        Each kind maps column names (id, type_id, r, c, layer and kind-specific ones like orientation, frozen or
+        converting) to arrays with one row per object. Agents and converters also have an (objects, items)
+        "inventory" matrix. The arrays are preallocated and refilled in place on every call, so this is much
+        cheaper than grid_objects, but callers that keep a snapshot across steps need to copy it.
+        """
+        return self._c_env.grid_snapshot()
+
     @property
     def max_action_args(self) -> list[int]:
         """
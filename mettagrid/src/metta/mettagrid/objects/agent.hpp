@@ -94,6 +94,17 @@ public:
         current_stat_reward(0),
         reward(nullptr) {
     GridObject::init(config.type_id, config.type_name, GridLocation(r, c, GridLayer::AgentLayer));
+
+    for (const auto& [stat_name, reward_per_unit] : this->stat_rewards) {
+      StatRewardEntry entry{StatKey(stat_name), reward_per_unit, false, 0, 0};
+      auto max_it = this->stat_reward_max.find(stat_name);
+      if (max_it != this->stat_reward_max.end()) {
+        entry.has_max = true;
+        entry.max = max_it->second;
+      }
+      this->_stat_reward_entries.push_back(std::move(entry));
+      this->stats.watch(stat_name);
+    }
   }
 
   void init(RewardType* reward_ptr) {
@@ -115,6 +126,9 @@ public:
     InventoryDelta delta = new_amount - initial_amount;
 
     // Update inventory
+    if (delta != 0) {
+      this->mark_obs_dirty();
+    }
     if (new_amount > 0) {
       this->inventory[item] = new_amount;
     } else {
@@ -123,9 +137,9 @@ public:
 
     // Update stats
     if (delta > 0) {
-      this->stats.add(this->stats.inventory_item_name(item) + ".gained", static_cast<float>(delta));
+      this->stats.add(item, ItemStat::Gained, static_cast<float>(delta));
     } else if (delta < 0) {
-      this->stats.add(this->stats.inventory_item_name(item) + ".lost", static_cast<float>(-delta));
+      this->stats.add(item, ItemStat::Lost, static_cast<float>(-delta));
     }
 
     // Update resource rewards incrementally
@@ -134,32 +148,34 @@ public:
     return delta;
   }
 
+  // Apply reward changes for any rewarded stats that were updated since the last call. The stats
+  // tracker records which watched stats changed, so this does nothing on steps where none did.
   void compute_stat_rewards() {
-    if (this->stat_rewards.empty()) {
+    const auto& changed = this->stats.changed_watched_stats();
+    if (changed.empty()) {
       return;
     }
 
-    float new_stat_reward = 0;
-    auto stat_dict = this->stats.to_dict();
-
-    for (const auto& [stat_name, reward_per_unit] : this->stat_rewards) {
-      if (stat_dict.count(stat_name) > 0) {
-        float stat_value = stat_dict[stat_name];
-
-        float stats_reward = stat_value * reward_per_unit;
-        if (this->stat_reward_max.count(stat_name) > 0) {
-          stats_reward = std::min(stats_reward, this->stat_reward_max.at(stat_name));
+    float reward_delta = 0;
+    for (StatId stat_id : changed) {
+      for (auto& entry : this->_stat_reward_entries) {
+        if (this->stats.stat_id(entry.key) != stat_id) {
+          continue;
         }
-
-        new_stat_reward += stats_reward;
+        float stats_reward = this->stats.get(stat_id) * entry.reward_per_unit;
+        if (entry.has_max) {
+          stats_reward = std::min(stats_reward, entry.max);
+        }
+        reward_delta += stats_reward - entry.current;
+        entry.current = stats_reward;
       }
     }
+    this->stats.clear_changed_watched_stats();
 
     // Update the agent's reward with the difference
-    float reward_delta = new_stat_reward - this->current_stat_reward;
     if (reward_delta != 0.0f) {
       *this->reward += reward_delta;
-      this->current_stat_reward = new_stat_reward;
+      this->current_stat_reward += reward_delta;
     }
   }
 
@@ -191,6 +207,16 @@ public:
   }
 
 private:
+  struct StatRewardEntry {
+    StatKey key;
+    RewardType reward_per_unit;
+    bool has_max;
+    RewardType max;
+    // This stat's contribution to current_stat_reward
+    RewardType current;
+  };
+  std::vector<StatRewardEntry> _stat_reward_entries;
+
   inline void _update_resource_reward(InventoryItem item, InventoryQuantity old_amount, InventoryQuantity new_amount) {
     // Early exit if this item doesn't contribute to rewards
     auto reward_it = this->resource_rewards.find(item);
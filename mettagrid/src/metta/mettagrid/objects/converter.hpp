@@ -55,6 +55,15 @@ struct ConverterConfig : public GridObjectConfig {
 
 class Converter : public HasInventory {
 private:
+  // Stat names are resolved to ids once per name table, so updating them doesn't hash strings.
+  StatKey _blocked_output_full_stat{"blocked.output_full"};
+  StatKey _blocked_insufficient_input_stat{"blocked.insufficient_input"};
+  StatKey _conversions_started_stat{"conversions.started"};
+  StatKey _conversions_completed_stat{"conversions.completed"};
+  StatKey _conversions_permanent_stop_stat{"conversions.permanent_stop"};
+  StatKey _cooldown_started_stat{"cooldown.started"};
+  StatKey _cooldown_completed_stat{"cooldown.completed"};
+
   // This should be called any time the converter could start converting. E.g.,
   // when things are added to its input, and when it finishes converting.
   void maybe_start_converting() {
@@ -75,13 +84,13 @@ private:
       }
     }
     if (this->max_output >= 0 && total_output >= this->max_output) {
-      stats.incr("blocked.output_full");
+      stats.incr(_blocked_output_full_stat);
       return;
     }
     // Check if the converter has enough input.
     for (const auto& [item, input_amount] : this->input_resources) {
       if (this->inventory.count(item) == 0 || this->inventory.at(item) < input_amount) {
-        stats.incr("blocked.insufficient_input");
+        stats.incr(_blocked_insufficient_input_stat);
         return;
       }
     }
@@ -100,12 +109,13 @@ private:
       if (this->inventory[item] == 0) {
         this->inventory.erase(item);
       }
-      stats.add(stats.inventory_item_name(item) + ".consumed", static_cast<float>(amount));
+      stats.add(item, ItemStat::Consumed, static_cast<float>(amount));
     }
     // All the previous returns were "we don't start converting".
     // This one is us starting to convert.
     this->converting = true;
-    stats.incr("conversions.started");
+    this->mark_obs_dirty();
+    stats.incr(_conversions_started_stat);
     this->event_manager->schedule_event(EventType::FinishConverting, this->conversion_ticks, this->id, 0);
   }
 
@@ -156,18 +166,20 @@ public:
 
   void finish_converting() {
     this->converting = false;
-    stats.incr("conversions.completed");
+    this->mark_obs_dirty();
+    stats.incr(_conversions_completed_stat);
 
     // Add output to inventory
     for (const auto& [item, amount] : this->output_resources) {
       HasInventory::update_inventory(item, static_cast<InventoryDelta>(amount));
-      stats.add(stats.inventory_item_name(item) + ".produced", static_cast<float>(amount));
+      stats.add(item, ItemStat::Produced, static_cast<float>(amount));
     }
 
     if (this->cooldown > 0) {
       // Start cooldown phase
       this->cooling_down = true;
-      stats.incr("cooldown.started");
+      this->mark_obs_dirty();
+      stats.incr(_cooldown_started_stat);
       this->event_manager->schedule_event(EventType::CoolDown, this->cooldown, this->id, 0);
     } else if (this->cooldown == 0) {
       // No cooldown, try to start converting again immediately
@@ -175,13 +187,15 @@ public:
     } else if (this->cooldown < 0) {
       // Negative cooldown means never convert again
       this->cooling_down = true;
-      stats.incr("conversions.permanent_stop");
+      this->mark_obs_dirty();
+      stats.incr(_conversions_permanent_stop_stat);
     }
   }
 
   void finish_cooldown() {
     this->cooling_down = false;
-    stats.incr("cooldown.completed");
+    this->mark_obs_dirty();
+    stats.incr(_cooldown_completed_stat);
     this->maybe_start_converting();
   }
 
@@ -189,9 +203,9 @@ public:
     InventoryDelta delta = HasInventory::update_inventory(item, attempted_delta);
     if (delta != 0) {
       if (delta > 0) {
-        stats.add(stats.inventory_item_name(item) + ".added", delta);
+        stats.add(item, ItemStat::Added, delta);
       } else {
-        stats.add(stats.inventory_item_name(item) + ".removed", -delta);
+        stats.add(item, ItemStat::Removed, -delta);
       }
     }
     this->maybe_start_converting();
@@ -32,6 +32,7 @@ public:
     }
 
     InventoryDelta clamped_delta = clamped_amount - initial_amount;
+    this->mark_obs_dirty();
     return clamped_delta;
   }
 };
@@ -64,7 +64,7 @@ public:
   // Returns the number of tokens that were available to write. This will be the number of tokens actually
   // written if there was enough space -- or a greater number if there was not enough space.
   size_t encode_tokens(const GridObject* obj, ObservationTokens tokens, ObservationType location) {
-    return append_tokens_if_room_available(tokens, obj->obs_features(), location);
+    return append_tokens_if_room_available(tokens, obj->cached_obs_features(), location);
   }
 
   const std::map<ObservationType, float> feature_normalizations() const {
@@ -6,6 +6,7 @@
 #include <stdexcept>
 #include <string>
 #include <utility>
+#include <vector>
 
 #include "objects/constants.hpp"
 
@@ -140,5 +141,20 @@ struct ObservationPattern {
   }
 };
 
+/**
+ * Materialize an ObservationPattern into a list of (row, col) offsets.
+ *
+ * The visit order only depends on the window size, so environments compute this once and reuse it for
+ * every observer rather than re-running the pattern iterator per agent per step.
+ */
+inline std::vector<std::pair<int, int>> observation_offsets(int height, int width) {
+  std::vector<std::pair<int, int>> offsets;
+  offsets.reserve(static_cast<size_t>(height) * static_cast<size_t>(width));
+  for (const auto& offset : ObservationPattern{height, width}) {
+    offsets.push_back(offset);
+  }
+  return offsets;
+}
+
 }  // namespace PackedCoordinate
 #endif  // PACKED_COORDINATE_HPP_
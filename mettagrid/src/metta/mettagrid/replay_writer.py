@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Iterator, NamedTuple
 
 from omegaconf import OmegaConf
 
@@ -8,11 +8,12 @@ if TYPE_CHECKING:
     from metta.mettagrid.mettagrid_env import MettaGridEnv
 
 import json
+import tempfile
 import zlib
 
 import numpy as np
 
-from metta.mettagrid.util.file import http_url, write_data
+from metta.mettagrid.util.file import http_url, write_file
 
 
 class ReplayWriter:
@@ -29,22 +30,203 @@ class ReplayWriter:
         self.episodes[episode_id].log_step(actions, rewards)
 
     def write_replay(self, episode_id: str) -> str | None:
-        """Write the replay to the replay directory and return the URL."""
-        if self.replay_dir is None:
-            return None
-        episode_replay = self.episodes[episode_id]
+        """Write the replay to the replay directory and return the URL.
+
+        The episode is finished either way, so its recording is discarded, even if there is no replay directory or
+        writing fails."""
+        episode_replay = self.episodes.pop(episode_id, None)
         if episode_replay is None:
             raise ValueError(f"Episode {episode_id} not found")
-        replay_path = f"{self.replay_dir}/{episode_id}.json.z"
-        episode_replay.write_replay(replay_path)
-        return http_url(replay_path)
+        try:
+            if self.replay_dir is None:
+                return None
+            replay_path = f"{self.replay_dir}/{episode_id}.json.z"
+            episode_replay.write_replay(replay_path)
+            return http_url(replay_path)
+        finally:
+            episode_replay.close()
+
+
+class ReplayField(NamedTuple):
+    """A key recorded for grid objects of one kind.
+
+    `kind` controls how values are written out: "int", "float", "bool" or "action" (a [type, arg] pair).
+    Sparse fields are only written for objects where they are ever non-zero, like inventory items.
+    """
+
+    name: str
+    kind: str = "int"
+    sparse: bool = False
+
+
+class DerivedKey(NamedTuple):
+    """A replay key computed from recorded fields, at every step where any of them changes."""
+
+    name: str
+    sources: tuple[str, ...]
+    compute: Callable[..., Any]
+
+
+# Snapshot columns recorded for every object, and the replay keys they're written as.
+_LOCATION_FIELDS = {"id": "id", "type_id": "type", "r": "r", "c": "c", "layer": "layer"}
+
+# Per-kind snapshot columns (see MettaGrid.grid_snapshot), and the replay keys they're written as.
+_KIND_FIELDS = {
+    "agents": {
+        "agent_id": ReplayField("agent_id"),
+        "group": ReplayField("agent:group"),
+        "orientation": ReplayField("agent:orientation"),
+        "color": ReplayField("agent:color"),
+        "glyph": ReplayField("agent:glyph", sparse=True),
+        "frozen": ReplayField("freeze_remaining"),
+    },
+    "converters": {
+        "color": ReplayField("color"),
+        "converting": ReplayField("is_converting", "bool"),
+        "cooling_down": ReplayField("is_cooling_down", "bool"),
+    },
+    "walls": {
+        "swappable": ReplayField("swappable", sparse=True),
+    },
+}
+
+
+def _same(value: Any) -> Any:
+    return value
+
+
+# Keys that MettaGrid.grid_objects (and so earlier replays) has under more than one name, or as the observation
+# feature rather than the raw state, written from the recorded fields.
+_LOCATION_DERIVED_KEYS = [
+    DerivedKey("type_id", ("type",), _same),
+    DerivedKey("location", ("r", "c", "layer"), lambda r, c, layer: [r, c, layer]),
+]
+_KIND_DERIVED_KEYS = {
+    "agents": [
+        DerivedKey("agent:frozen", ("freeze_remaining",), lambda frozen: int(frozen != 0)),
+        DerivedKey("is_frozen", ("freeze_remaining",), lambda frozen: frozen != 0),
+        DerivedKey("is_swappable", ("freeze_remaining",), lambda frozen: frozen != 0),
+        DerivedKey("orientation", ("agent:orientation",), _same),
+        DerivedKey("group_id", ("agent:group",), _same),
+        DerivedKey("color", ("agent:color",), _same),
+    ],
+    "converters": [
+        DerivedKey("converting", ("is_converting", "is_cooling_down"), lambda a, b: int(a or b)),
+        DerivedKey("agent:color", ("color",), _same),
+    ],
+    "walls": [
+        DerivedKey("is_swappable", ("swappable",), bool),
+    ],
+}
+
+# Keys that come from the step's actions and rewards rather than the snapshot.
+_AGENT_STEP_FIELDS = [
+    ReplayField("action", "action"),
+    ReplayField("action_success", "bool"),
+    ReplayField("reward", "float"),
+    ReplayField("total_reward", "float"),
+]
+
+# Actions are stored as a single value, type * _ACTION_BASE + arg, so that both fit in one column.
+_ACTION_BASE = 1 << 32
+
+
+class ChangeLog:
+    """Append-only columnar log of (step, row, field, value) change records.
+
+    Records are buffered in fixed-size chunks. Each full chunk is compressed column by column and spooled to a
+    temporary file, so memory use doesn't grow with the length of the episode.
+    """
+
+    def __init__(self, chunk_size: int = 1 << 16):
+        self.chunk_size = chunk_size
+        self._steps = np.empty(chunk_size, dtype=np.int32)
+        self._rows = np.empty(chunk_size, dtype=np.int32)
+        self._fields = np.empty(chunk_size, dtype=np.int32)
+        self._values = np.empty(chunk_size, dtype=np.float64)
+        self._size = 0
+        self._spool = tempfile.TemporaryFile()
+        # (num_records, compressed sizes of each column) for every spooled chunk.
+        self._chunks: list[tuple[int, list[int]]] = []
+        self.num_records = 0
+
+    def append(self, step: int, rows: np.ndarray, fields: np.ndarray, values: np.ndarray):
+        start = 0
+        while start < len(rows):
+            count = min(len(rows) - start, self.chunk_size - self._size)
+            end = self._size + count
+            self._steps[self._size : end] = step
+            self._rows[self._size : end] = rows[start : start + count]
+            self._fields[self._size : end] = fields[start : start + count]
+            self._values[self._size : end] = values[start : start + count]
+            self._size = end
+            start += count
+            if self._size == self.chunk_size:
+                self._flush()
+        self.num_records += len(rows)
+
+    def _flush(self):
+        if self._size == 0:
+            return
+        sizes = []
+        for column in self._columns(self._size):
+            compressed = zlib.compress(column.tobytes(), 1)
+            self._spool.write(compressed)
+            sizes.append(len(compressed))
+        self._chunks.append((self._size, sizes))
+        self._size = 0
+
+    def _columns(self, size: int) -> list[np.ndarray]:
+        return [self._steps[:size], self._rows[:size], self._fields[:size], self._values[:size]]
+
+    def read(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns all records, in the order they were appended, as (steps, rows, fields, values)."""
+        columns: list[list[np.ndarray]] = [[], [], [], []]
+        self._spool.seek(0)
+        for _num_records, sizes in self._chunks:
+            for column, template, size in zip(columns, self._columns(0), sizes, strict=True):
+                column.append(np.frombuffer(zlib.decompress(self._spool.read(size)), dtype=template.dtype))
+        self._spool.seek(0, 2)
+        for column, pending in zip(columns, self._columns(self._size), strict=True):
+            column.append(pending.copy())
+        steps, rows, fields, values = (np.concatenate(column) for column in columns)
+        return steps, rows, fields, values
+
+    def close(self):
+        """Deletes the spooled records. The log can't be used after closing it."""
+        self._spool.close()
+
+
+def _derive_changes(derived_key: DerivedKey, field_changes: dict[str, list[list]]) -> list[list]:
+    """[step, value] changes of a derived key, from the changes of its sources. Every source is recorded on the
+    first step, so the key has a value from then on."""
+    sources = [field_changes[source] for source in derived_key.sources]
+    positions = [0] * len(sources)
+    current = [changes[0][1] for changes in sources]
+    steps = sorted({step for changes in sources for step, _ in changes})
+    derived = []
+    for step in steps:
+        for i, changes in enumerate(sources):
+            while positions[i] < len(changes) and changes[positions[i]][0] <= step:
+                current[i] = changes[positions[i]][1]
+                positions[i] += 1
+        value = derived_key.compute(*current)
+        if not derived or derived[-1][1] != value:
+            derived.append([step, value])
+    return derived
 
 
 class EpisodeReplay:
+    """Records an episode as per-step changes to object state, and writes it as a mettascope replay.
+
+    Each step the current state of every object is gathered from the env's grid snapshot into one
+    (objects, fields) array, diffed against the previous step, and only the changed cells are appended to a
+    ChangeLog. The replay JSON is only built when writing, and is encoded and compressed one object at a time.
+    """
+
     def __init__(self, env: MettaGridEnv):
         self.env = env
         self.step = 0
-        self.grid_objects = []
         self.total_rewards = np.zeros(env.num_agents)
         self.replay_data = {
             "version": 1,
@@ -54,62 +236,178 @@ class EpisodeReplay:
             "map_size": [env.map_width, env.map_height],
             "num_agents": env.num_agents,
             "max_steps": env.max_steps,
-            "grid_objects": self.grid_objects,
         }
 
+        snapshot = env.grid_snapshot
+        inventory_fields = [ReplayField(f"inv:{item}", sparse=True) for item in env.inventory_item_names]
+        self.fields: list[ReplayField] = [ReplayField(key) for key in _LOCATION_FIELDS.values()]
+        field_index = {field.name: i for i, field in enumerate(self.fields)}
+
+        def index_of(field: ReplayField) -> int:
+            if field.name not in field_index:
+                field_index[field.name] = len(self.fields)
+                self.fields.append(field)
+            return field_index[field.name]
+
+        # Each kind owns a contiguous block of rows. `_kind_columns` lists (rows, kind, snapshot column, field
+        # index) for every snapshot column that gets recorded.
+        self._kind_columns: list[tuple[slice, str, str, int]] = []
+        self._kind_inventory: list[tuple[slice, str, list[int]]] = []
+        # Field indices each row can have, so that fields of other kinds aren't written for it, and the keys
+        # derived from them.
+        row_fields: list[list[int]] = []
+        row_derived_keys: list[list[DerivedKey]] = []
+        num_rows = 0
+        for kind, kind_fields in _KIND_FIELDS.items():
+            columns = snapshot[kind]
+            rows = slice(num_rows, num_rows + len(columns["id"]))
+            num_rows = rows.stop
+            indices = []
+            derived_keys = _LOCATION_DERIVED_KEYS + _KIND_DERIVED_KEYS[kind]
+            for column, key in _LOCATION_FIELDS.items():
+                self._kind_columns.append((rows, kind, column, field_index[key]))
+                indices.append(field_index[key])
+            for column, field in kind_fields.items():
+                self._kind_columns.append((rows, kind, column, index_of(field)))
+                indices.append(index_of(field))
+            if kind == "agents":
+                self._agent_rows = rows
+                self._agent_step_fields = [index_of(field) for field in _AGENT_STEP_FIELDS]
+                indices.extend(self._agent_step_fields)
+            if "inventory" in columns:
+                inventory = [index_of(field) for field in inventory_fields]
+                self._kind_inventory.append((rows, kind, inventory))
+                indices.extend(inventory)
+                derived_keys = derived_keys + [
+                    DerivedKey(
+                        "inventory",
+                        tuple(field.name for field in inventory_fields),
+                        lambda *amounts: {item: amount for item, amount in enumerate(amounts) if amount},
+                    )
+                ]
+            row_fields.extend([indices] * (rows.stop - rows.start))
+            row_derived_keys.extend([derived_keys] * (rows.stop - rows.start))
+        self._row_fields = row_fields
+        self._row_derived_keys = row_derived_keys
+        self._static_keys = self._read_static_keys(snapshot)
+
+        self._state = np.zeros((num_rows, len(self.fields)), dtype=np.float64)
+        # NaN never compares equal, so every cell is recorded on the first step.
+        self._previous = np.full_like(self._state, np.nan)
+        self.changes = ChangeLog()
+
+    def _read_static_keys(self, snapshot: dict[str, dict[str, np.ndarray]]) -> list[dict[str, Any]]:
+        """Keys of each row's grid object that nothing recorded or derived covers, like converter recipes and
+        durations. They come from the objects' configs and don't change during an episode, so they're read once."""
+        grid_objects = self.env.grid_objects
+        ids = np.concatenate([snapshot[kind]["id"] for kind in _KIND_FIELDS]).tolist()
+        static_keys = []
+        for row, object_id in enumerate(ids):
+            covered = {self.fields[field].name for field in self._row_fields[row]}
+            covered.update(key.name for key in self._row_derived_keys[row])
+            static_keys.append({key: value for key, value in grid_objects[object_id].items() if key not in covered})
+        return static_keys
+
     def log_step(self, actions: np.ndarray, rewards: np.ndarray):
         self.total_rewards += rewards
-        for i, grid_object in enumerate(self.env.grid_objects.values()):
-            update_object = grid_object.copy()
-            if len(self.grid_objects) <= i:
-                self.grid_objects.append({})
-            if "agent_id" in grid_object:
-                agent_id = update_object["agent_id"]
-                update_object["action"] = actions[agent_id].tolist()
-                update_object["action_success"] = bool(self.env.action_success[agent_id])
-                update_object["reward"] = rewards[agent_id].item()
-                update_object["total_reward"] = self.total_rewards[agent_id].item()
-            self._seq_key_merge(self.grid_objects[i], self.step, update_object)
+        snapshot = self.env.grid_snapshot
+        for rows, kind, column, field in self._kind_columns:
+            self._state[rows, field] = snapshot[kind][column]
+        for rows, kind, inventory in self._kind_inventory:
+            self._state[rows, inventory] = snapshot[kind]["inventory"]
+
+        agent_ids = snapshot["agents"]["agent_id"]
+        agent_actions = np.asarray(actions, dtype=np.int64)[agent_ids]
+        action, action_success, reward, total_reward = self._agent_step_fields
+        rows = self._agent_rows
+        self._state[rows, action] = agent_actions[:, 0] * _ACTION_BASE + (agent_actions[:, 1] & (_ACTION_BASE - 1))
+        self._state[rows, action_success] = np.asarray(self.env.action_success)[agent_ids]
+        self._state[rows, reward] = rewards[agent_ids]
+        self._state[rows, total_reward] = self.total_rewards[agent_ids]
+
+        changed_rows, changed_fields = np.nonzero(self._state != self._previous)
+        self.changes.append(self.step, changed_rows, changed_fields, self._state[changed_rows, changed_fields])
+        np.copyto(self._previous, self._state)
         self.step += 1
 
-    def _seq_key_merge(self, grid_object: dict, step: int, update_object: dict):
-        """Add a sequence keys to replay grid object."""
-        for key, value in update_object.items():
-            if key not in grid_object:
-                # Add new key.
-                if step == 0:
-                    grid_object[key] = [[step, value]]
-                else:
-                    grid_object[key] = [[0, 0], [step, value]]
-            else:
-                # Only add new entry if it has changed:
-                if grid_object[key][-1][1] != value:
-                    grid_object[key].append([step, value])
-        # If key has vanished, add a zero entry.
-        for key in grid_object.keys():
-            if key not in update_object:
-                if grid_object[key][-1][1] != 0:
-                    grid_object[key].append([step, 0])
+    def _decode(self, field: ReplayField, value: float) -> Any:
+        if field.kind == "float":
+            return value
+        if field.kind == "bool":
+            return bool(value)
+        if field.kind == "action":
+            action_type, action_arg = divmod(int(value), _ACTION_BASE)
+            if action_arg >= _ACTION_BASE // 2:
+                action_arg -= _ACTION_BASE
+            return [action_type, action_arg]
+        return int(value)
 
-    def get_replay_data(self):
-        """Gets full replay as a tree of plain python dictionaries."""
-        self.replay_data["max_steps"] = self.step
-        # Trim value changes to make them more compact.
-        for grid_object in self.grid_objects:
-            for key, changes in list(grid_object.items()):
-                if isinstance(changes, list) and len(changes) == 1:
-                    grid_object[key] = changes[0][1]
-
-        self.replay_data["config"] = OmegaConf.to_container(self.env._task.env_cfg())
+    def _grid_objects(self) -> Iterator[dict]:
+        """Yields replay grid objects in id order, with each key as a constant or a list of [step, value] changes."""
+        if self.step == 0:
+            return
+        steps, rows, fields, values = self.changes.read()
+        num_fields = len(self.fields)
+        # Records were appended in step order, so a stable sort groups them by (row, field) and keeps each
+        # group in step order.
+        keys = rows.astype(np.int64) * num_fields + fields
+        order = np.argsort(keys, kind="stable")
+        keys, steps, values = keys[order], steps[order], values[order]
+
+        ids = self._state[:, 0].astype(np.int64)
+        for row in np.argsort(ids, kind="stable").tolist():
+            grid_object = {}
+            # Every recorded field's [step, value] changes, including sparse ones that are never written.
+            field_changes: dict[str, list[list]] = {}
+            for field_idx in self._row_fields[row]:
+                field = self.fields[field_idx]
+                key = row * num_fields + field_idx
+                start, end = np.searchsorted(keys, [key, key + 1])
+                if start == end:
+                    continue
+                field_values = values[start:end].tolist()
+                changes = [
+                    [step, self._decode(field, value)]
+                    for step, value in zip(steps[start:end].tolist(), field_values, strict=True)
+                ]
+                field_changes[field.name] = changes
+                if field.sparse and not any(field_values):
+                    continue
+                grid_object[field.name] = changes[0][1] if len(changes) == 1 else changes
+            for derived_key in self._row_derived_keys[row]:
+                changes = _derive_changes(derived_key, field_changes)
+                grid_object[derived_key.name] = changes[0][1] if len(changes) == 1 else changes
+            grid_object.update(self._static_keys[row])
+            yield grid_object
+
+    def _header(self) -> dict:
+        header = dict(self.replay_data)
+        header["max_steps"] = self.step
+        header["config"] = OmegaConf.to_container(self.env._task.env_cfg())
         # The map_builder is not needed for replay, and it's not serializable.
-        del self.replay_data["config"]["game"]["map_builder"]
+        del header["config"]["game"]["map_builder"]
+        return header
 
-        return self.replay_data
+    def get_replay_data(self):
+        """Gets full replay as a tree of plain python dictionaries."""
+        replay_data = self._header()
+        replay_data["grid_objects"] = list(self._grid_objects())
+        return replay_data
 
     def write_replay(self, path: str):
-        """Writes a replay to a file."""
-        replay_data = json.dumps(self.get_replay_data())  # Convert to JSON string
-        replay_bytes = replay_data.encode("utf-8")  # Encode to bytes
-        compressed_data = zlib.compress(replay_bytes)  # Compress the bytes
+        """Writes a replay to a file, encoding and compressing it one grid object at a time."""
+        header = json.dumps(self._header())
+        compressor = zlib.compressobj()
+        with tempfile.NamedTemporaryFile(suffix=".json.z") as replay_file:
+            replay_file.write(compressor.compress(f'{header[:-1]}, "grid_objects": ['.encode("utf-8")))
+            for i, grid_object in enumerate(self._grid_objects()):
+                text = json.dumps(grid_object) if i == 0 else ", " + json.dumps(grid_object)
+                replay_file.write(compressor.compress(text.encode("utf-8")))
+            replay_file.write(compressor.compress(b"]}"))
+            replay_file.write(compressor.flush())
+            replay_file.flush()
+            write_file(path, replay_file.name, content_type="application/x-compress")
 
-        write_data(path, compressed_data, content_type="application/x-compress")
+    def close(self):
+        """Deletes the recorded changes. The replay can't be written after closing it."""
+        self.changes.close()
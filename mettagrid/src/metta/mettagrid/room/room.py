@@ -29,7 +29,9 @@ class Room(LevelBuilder):
     def _add_border(self, room):
         b = self._border_width
         h, w = room.shape
-        final_level = np.full((h + b * 2, w + b * 2), self._border_object, dtype="<U50")
+        # Keep the room's string width (widened for the border object if needed), rather than always using <U50.
+        dtype = np.promote_types(room.dtype, np.array(self._border_object).dtype)
+        final_level = np.full((h + b * 2, w + b * 2), self._border_object, dtype=dtype)
         final_level[b : b + h, b : b + w] = room
         return final_level
 
@@ -1,49 +1,208 @@
 #ifndef STATS_TRACKER_HPP_
 #define STATS_TRACKER_HPP_
 
+#include <atomic>
+#include <cstdint>
 #include <map>
+#include <memory>
 #include <stdexcept>
 #include <string>
-#include <variant>
+#include <unordered_map>
+#include <utility>
+#include <vector>
 
 // Forward declaration
 class MettaGrid;
 
 using InventoryItem = uint8_t;
+using StatId = uint32_t;
+
+// Per-item stats that are updated on the hot path (inventory changes, converter production, ...).
+// Their ids are registered once per inventory item when a StatNameTable is built, so updating
+// them is an array lookup rather than a string concatenation plus a hash.
+enum class ItemStat : uint8_t {
+  Gained = 0,
+  Lost,
+  Get,
+  Put,
+  Consumed,
+  Produced,
+  Added,
+  Removed,
+  Count
+};
+
+constexpr const char* ItemStatSuffixes[] = {"gained", "lost", "get", "put", "consumed", "produced", "added", "removed"};
+
+static_assert(sizeof(ItemStatSuffixes) / sizeof(ItemStatSuffixes[0]) == static_cast<size_t>(ItemStat::Count),
+              "ItemStatSuffixes must have one entry per ItemStat");
+
+// Interns stat names into dense integer ids. One table is shared by every StatsTracker in an
+// environment, so names are stored once and only looked up again when stats are exported.
+class StatNameTable {
+public:
+  inline static const std::string NO_ENV_INVENTORY_ITEM_NAME = "[unknown -- stats tracker not initialized]";
+
+  explicit StatNameTable(const std::vector<std::string>& inventory_item_names = {})
+      : _serial(_next_serial.fetch_add(1, std::memory_order_relaxed)), _inventory_item_names(inventory_item_names) {
+    constexpr size_t item_stat_count = static_cast<size_t>(ItemStat::Count);
+    _item_stat_ids.reserve(_inventory_item_names.size() * item_stat_count);
+    for (const auto& item_name : _inventory_item_names) {
+      for (size_t kind = 0; kind < item_stat_count; kind++) {
+        _item_stat_ids.push_back(intern(item_name + "." + ItemStatSuffixes[kind]));
+      }
+    }
+  }
+
+  // Returns the id for `name`, registering it if this is the first time we've seen it.
+  StatId intern(const std::string& name) {
+    auto it = _ids.find(name);
+    if (it != _ids.end()) {
+      return it->second;
+    }
+    StatId id = static_cast<StatId>(_names.size());
+    _names.push_back(name);
+    _ids.emplace(name, id);
+    return id;
+  }
+
+  const std::string& name(StatId id) const {
+    return _names.at(id);
+  }
+
+  size_t size() const {
+    return _names.size();
+  }
+
+  // Uniquely identifies this table for the lifetime of the process. Unlike the table's address, a
+  // serial is never reused, so it's safe to use for invalidating cached ids (see StatKey).
+  uint64_t serial() const {
+    return _serial;
+  }
+
+  const std::string& inventory_item_name(InventoryItem item) const {
+    if (item >= _inventory_item_names.size()) {
+      return NO_ENV_INVENTORY_ITEM_NAME;
+    }
+    return _inventory_item_names[item];
+  }
+
+  StatId item_stat(InventoryItem item, ItemStat kind) {
+    if (item < _inventory_item_names.size()) {
+      return _item_stat_ids[item * static_cast<size_t>(ItemStat::Count) + static_cast<size_t>(kind)];
+    }
+    return intern(inventory_item_name(item) + "." + ItemStatSuffixes[static_cast<size_t>(kind)]);
+  }
+
+private:
+  inline static std::atomic<uint64_t> _next_serial{1};
+
+  uint64_t _serial;
+  std::vector<std::string> _inventory_item_names;
+  std::vector<StatId> _item_stat_ids;
+  std::vector<std::string> _names;
+  std::unordered_map<std::string, StatId> _ids;
+};
+
+// A fixed stat name whose id is resolved once per StatNameTable and then cached. Owners (action
+// handlers, agents, converters) keep these as members so the hot path never builds or hashes strings.
+// The cache is not synchronized, so a StatKey should only be used by the environment that owns it.
+class StatKey {
+public:
+  explicit StatKey(std::string name) : _name(std::move(name)) {}
+
+  StatId id(StatNameTable& table) const {
+    if (_table_serial != table.serial()) {
+      _id = table.intern(_name);
+      _table_serial = table.serial();
+    }
+    return _id;
+  }
+
+  const std::string& name() const {
+    return _name;
+  }
+
+private:
+  std::string _name;
+  mutable uint64_t _table_serial = 0;
+  mutable StatId _id = 0;
+};
 
 class StatsTracker {
 private:
-  std::map<std::string, float> _stats;
-  std::map<std::string, unsigned int> _first_seen_at;
-  std::map<std::string, unsigned int> _last_seen_at;
-  std::map<std::string, float> _min_value;
-  std::map<std::string, float> _max_value;
-  std::map<std::string, unsigned int> _update_count;
+  std::shared_ptr<StatNameTable> _names;
+  // Flat per-stat arrays, indexed by StatId. They grow lazily as this tracker touches new ids.
+  std::vector<float> _stats;
+  std::vector<unsigned int> _first_seen_at;
+  std::vector<unsigned int> _last_seen_at;
+  std::vector<float> _min_value;
+  std::vector<float> _max_value;
+  std::vector<unsigned int> _update_count;
+  std::vector<bool> _seen;
+  // Ids this tracker has touched, in order of first update. Lets us export and reset in
+  // O(touched stats) rather than O(all stats registered in the environment).
+  std::vector<StatId> _seen_ids;
+  // Watched stats (see watch()). Indexed by StatId; ids past the end are unwatched.
+  std::vector<uint8_t> _watch_state;
+  std::vector<StatId> _watched_ids;
+  std::vector<StatId> _changed_watched_ids;
   MettaGrid* _env;
 
+  enum WatchState : uint8_t { Unwatched = 0, Watched, WatchedChanged };
+
+  void mark_watched_changed(StatId id) {
+    if (id < _watch_state.size() && _watch_state[id] == Watched) {
+      _watch_state[id] = WatchedChanged;
+      _changed_watched_ids.push_back(id);
+    }
+  }
+
+  // Makes sure the arrays cover `id`. Returns true if this is the first update of `id`.
+  bool ensure_tracked(StatId id) {
+    if (id >= _stats.size()) {
+      size_t new_size = static_cast<size_t>(id) + 1;
+      _stats.resize(new_size, 0.0f);
+      _first_seen_at.resize(new_size, 0);
+      _last_seen_at.resize(new_size, 0);
+      _min_value.resize(new_size, 0.0f);
+      _max_value.resize(new_size, 0.0f);
+      _update_count.resize(new_size, 0);
+      _seen.resize(new_size, false);
+    }
+    if (_seen[id]) {
+      return false;
+    }
+    _seen[id] = true;
+    _seen_ids.push_back(id);
+    if (_env) {
+      _first_seen_at[id] = get_current_step();
+    }
+    return true;
+  }
+
   // Track timing for any update
-  void track_timing(const std::string& key) {
+  void track_timing(StatId id) {
     if (_env) {
-      unsigned int step = get_current_step();
-      if (_first_seen_at.find(key) == _first_seen_at.end()) {
-        _first_seen_at[key] = step;
-      }
-      _last_seen_at[key] = step;
-      _update_count[key]++;
+      _last_seen_at[id] = get_current_step();
+      _update_count[id]++;
     }
   }
 
   // Helper to get current step - implemented where MettaGrid is complete
   unsigned int get_current_step() const;
 
+  // The environment's shared name table - implemented where MettaGrid is complete
+  std::shared_ptr<StatNameTable> env_name_table() const;
+
   // Track min/max values automatically
-  void track_bounds(const std::string& key, float value) {
-    if (_min_value.find(key) == _min_value.end()) {
-      _min_value[key] = value;
-      _max_value[key] = value;
+  void track_bounds(StatId id, float value, bool first_update) {
+    if (first_update) {
+      _min_value[id] = value;
+      _max_value[id] = value;
     } else {
-      if (value < _min_value[key]) _min_value[key] = value;
-      if (value > _max_value[key]) _max_value[key] = value;
+      if (value < _min_value[id]) _min_value[id] = value;
+      if (value > _max_value[id]) _max_value[id] = value;
     }
   }
 
@@ -54,89 +213,188 @@ private:
   friend class StatsTrackerTest;
 
 public:
-  inline static const std::string NO_ENV_INVENTORY_ITEM_NAME = "[unknown -- stats tracker not initialized]";
+  inline static const std::string& NO_ENV_INVENTORY_ITEM_NAME = StatNameTable::NO_ENV_INVENTORY_ITEM_NAME;
 
-  StatsTracker() : _env(nullptr) {}
+  StatsTracker() : _names(std::make_shared<StatNameTable>()), _env(nullptr) {}
 
   void set_environment(MettaGrid* env) {
     _env = env;
+    if (_env) {
+      set_name_table(env_name_table());
+    }
   }
 
   MettaGrid* get_env() const {
     return _env;
   }
 
-  const std::string& inventory_item_name(InventoryItem item) const;
+  StatNameTable& names() const {
+    return *_names;
+  }
+
+  // Switch to a (usually shared) name table. Any stats recorded so far are carried over under the
+  // new table's ids.
+  void set_name_table(std::shared_ptr<StatNameTable> names) {
+    if (!names || names == _names) {
+      return;
+    }
+    StatsTracker migrated;
+    migrated._names = std::move(names);
+    migrated._env = _env;
+    for (StatId old_id : _watched_ids) {
+      StatId new_id = migrated.watch(_names->name(old_id));
+      if (_watch_state[old_id] == WatchedChanged) {
+        migrated.mark_watched_changed(new_id);
+      }
+    }
+    for (StatId old_id : _seen_ids) {
+      StatId new_id = migrated._names->intern(_names->name(old_id));
+      migrated.ensure_tracked(new_id);
+      migrated._stats[new_id] = _stats[old_id];
+      migrated._first_seen_at[new_id] = _first_seen_at[old_id];
+      migrated._last_seen_at[new_id] = _last_seen_at[old_id];
+      migrated._min_value[new_id] = _min_value[old_id];
+      migrated._max_value[new_id] = _max_value[old_id];
+      migrated._update_count[new_id] = _update_count[old_id];
+    }
+    *this = std::move(migrated);
+  }
+
+  const std::string& inventory_item_name(InventoryItem item) const {
+    return _names->inventory_item_name(item);
+  }
+
+  StatId stat_id(const std::string& key) {
+    return _names->intern(key);
+  }
+
+  StatId stat_id(const StatKey& key) {
+    return key.id(*_names);
+  }
+
+  StatId item_stat_id(InventoryItem item, ItemStat kind) {
+    return _names->item_stat(item, kind);
+  }
+
+  // Watch a stat, so that updates to it are reported by changed_watched_stats(). This lets owners
+  // react to a handful of stats (e.g. stat rewards) without scanning everything via to_dict().
+  StatId watch(const std::string& key) {
+    StatId id = stat_id(key);
+    if (id >= _watch_state.size()) {
+      _watch_state.resize(static_cast<size_t>(id) + 1, Unwatched);
+    }
+    if (_watch_state[id] == Unwatched) {
+      _watch_state[id] = Watched;
+      _watched_ids.push_back(id);
+    }
+    return id;
+  }
+
+  // Watched stats that have been updated since the last clear_changed_watched_stats().
+  const std::vector<StatId>& changed_watched_stats() const {
+    return _changed_watched_ids;
+  }
+
+  void clear_changed_watched_stats() {
+    for (StatId id : _changed_watched_ids) {
+      _watch_state[id] = Watched;
+    }
+    _changed_watched_ids.clear();
+  }
+
+  void add(StatId id, float amount) {
+    bool first_update = ensure_tracked(id);
+    _stats[id] += amount;
+    track_timing(id);
+    track_bounds(id, _stats[id], first_update);
+    mark_watched_changed(id);
+  }
+
+  void add(const StatKey& key, float amount) {
+    add(stat_id(key), amount);
+  }
 
   void add(const std::string& key, float amount) {
-    _stats[key] += amount;
-    track_timing(key);
-    track_bounds(key, _stats[key]);
+    add(stat_id(key), amount);
+  }
+
+  void add(InventoryItem item, ItemStat kind, float amount) {
+    add(item_stat_id(item, kind), amount);
   }
 
   // Increment by 1 (convenience method)
+  void incr(StatId id) {
+    add(id, 1);
+  }
+
+  void incr(const StatKey& key) {
+    add(stat_id(key), 1);
+  }
+
   void incr(const std::string& key) {
-    add(key, 1);
+    add(stat_id(key), 1);
+  }
+
+  void set(StatId id, float value) {
+    bool first_update = ensure_tracked(id);
+    _stats[id] = value;
+    track_timing(id);
+    track_bounds(id, value, first_update);
+    mark_watched_changed(id);
   }
 
   void set(const std::string& key, float value) {
-    _stats[key] = value;
-    track_timing(key);
-    track_bounds(key, value);
+    set(stat_id(key), value);
+  }
+
+  // Current value of a stat, or 0 if it hasn't been updated.
+  float get(StatId id) const {
+    return id < _stats.size() ? _stats[id] : 0.0f;
   }
 
   // Calculate rate (updates per step)
   float rate(const std::string& key) const {
     if (!_env) return 0.0f;
 
-    auto it = _update_count.find(key);
-    if (it == _update_count.end()) return 0.0f;
+    StatId id = _names->intern(key);
+    if (id >= _update_count.size() || !_seen[id]) return 0.0f;
 
     unsigned int steps = get_current_step();
-    return (steps > 0) ? static_cast<float>(it->second) / static_cast<float>(steps) : 0.0f;
+    return (steps > 0) ? static_cast<float>(_update_count[id]) / static_cast<float>(steps) : 0.0f;
   }
 
-  // Convert to map for Python API (all values as floats)
+  // Convert to map for Python API (all values as floats). This is the only place stat names are
+  // materialized, so it should only be called when exporting stats (e.g. at the end of an episode).
   std::map<std::string, float> to_dict() const {
     std::map<std::string, float> result;
 
     // Add all stats
-    for (const auto& [key, value] : _stats) {
-      result[key] = value;
+    for (StatId id : _seen_ids) {
+      result[_names->name(id)] = _stats[id];
     }
 
     // // Add timing metadata and calculated stats
-    // for (const auto& [key, step] : _first_seen_at) {
-    //   result[key + ".first_step"] = static_cast<float>(step);
-    // }
-
-    // for (const auto& [key, step] : _last_seen_at) {
-    //   result[key + ".last_step"] = static_cast<float>(step);
-    // }
-
-    // for (const auto& [key, count] : _update_count) {
+    // for (StatId id : _seen_ids) {
+    //   const std::string& key = _names->name(id);
+    //   result[key + ".first_step"] = static_cast<float>(_first_seen_at[id]);
+    //   result[key + ".last_step"] = static_cast<float>(_last_seen_at[id]);
+    //   unsigned int count = _update_count[id];
+    //   if (count == 0) continue;
     //   result[key + ".updates"] = static_cast<float>(count);
     //   result[key + ".rate"] = rate(key);
-    //   result[key + ".avg"] = result[key] / count;
-
+    //   result[key + ".avg"] = _stats[id] / count;
+    //
     //   // Also calculate activity rate if there's a time span
-    //   auto first_it = _first_seen_at.find(key);
-    //   auto last_it = _last_seen_at.find(key);
-    //   if (first_it != _first_seen_at.end() && last_it != _last_seen_at.end()) {
-    //     int duration = static_cast<int>(last_it->second) - static_cast<int>(first_it->second);
-    //     if (duration > 0 && count > 1) {
-    //       result[key + ".activity_rate"] = static_cast<float>(count - 1) / static_cast<float>(duration);
-    //     }
+    //   int duration = static_cast<int>(_last_seen_at[id]) - static_cast<int>(_first_seen_at[id]);
+    //   if (duration > 0 && count > 1) {
+    //     result[key + ".activity_rate"] = static_cast<float>(count - 1) / static_cast<float>(duration);
     //   }
     // }
 
     // // Add min/max values
-    // for (const auto& [key, min_val] : _min_value) {
-    //   result[key + ".min"] = min_val;
-    // }
-
-    // for (const auto& [key, max_val] : _max_value) {
-    //   result[key + ".max"] = max_val;
+    // for (StatId id : _seen_ids) {
+    //   result[_names->name(id) + ".min"] = _min_value[id];
+    //   result[_names->name(id) + ".max"] = _max_value[id];
     // }
 
     return result;
@@ -144,12 +402,17 @@ public:
 
   // Reset all statistics
   void reset() {
-    _stats.clear();
-    _first_seen_at.clear();
-    _last_seen_at.clear();
-    _min_value.clear();
-    _max_value.clear();
-    _update_count.clear();
+    for (StatId id : _seen_ids) {
+      _stats[id] = 0.0f;
+      _first_seen_at[id] = 0;
+      _last_seen_at[id] = 0;
+      _min_value[id] = 0.0f;
+      _max_value[id] = 0.0f;
+      _update_count[id] = 0;
+      _seen[id] = false;
+      mark_watched_changed(id);
+    }
+    _seen_ids.clear();
   }
 };
 
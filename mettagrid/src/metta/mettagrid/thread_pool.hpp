@@ -0,0 +1,120 @@
+#ifndef THREAD_POOL_HPP_
+#define THREAD_POOL_HPP_
+
+#include <condition_variable>
+#include <cstdint>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+// A fixed set of threads that repeatedly run one task in parallel, so that work split across threads every step
+// doesn't pay for starting and joining threads every step.
+//
+// run(task) calls task(thread_idx) once for every thread_idx in [0, num_threads()). Index 0 runs on the calling
+// thread, the rest on the pool's worker threads. If any call throws, run() rethrows the exception from the lowest
+// index once every call has finished.
+class ThreadPool {
+public:
+  explicit ThreadPool(size_t num_threads) {
+    for (size_t thread_idx = 1; thread_idx < num_threads; thread_idx++) {
+      _workers.emplace_back(&ThreadPool::_worker_loop, this, thread_idx);
+    }
+  }
+
+  ~ThreadPool() {
+    {
+      std::lock_guard<std::mutex> lock(_mutex);
+      _stopping = true;
+    }
+    _start_cv.notify_all();
+    for (auto& worker : _workers) {
+      worker.join();
+    }
+  }
+
+  ThreadPool(const ThreadPool&) = delete;
+  ThreadPool& operator=(const ThreadPool&) = delete;
+
+  size_t num_threads() const {
+    return _workers.size() + 1;
+  }
+
+  void run(const std::function<void(size_t)>& task) {
+    if (_workers.empty()) {
+      task(0);
+      return;
+    }
+
+    {
+      std::lock_guard<std::mutex> lock(_mutex);
+      _task = &task;
+      _errors.assign(num_threads(), nullptr);
+      _pending = _workers.size();
+      _generation++;
+    }
+    _start_cv.notify_all();
+
+    try {
+      task(0);
+    } catch (...) {
+      _errors[0] = std::current_exception();
+    }
+
+    {
+      std::unique_lock<std::mutex> lock(_mutex);
+      _done_cv.wait(lock, [this] { return _pending == 0; });
+      _task = nullptr;
+    }
+    for (const auto& error : _errors) {
+      if (error) {
+        std::rethrow_exception(error);
+      }
+    }
+  }
+
+private:
+  std::vector<std::thread> _workers;
+  std::mutex _mutex;
+  std::condition_variable _start_cv;
+  std::condition_variable _done_cv;
+  const std::function<void(size_t)>* _task = nullptr;
+  // Bumped for every run(), so that each worker runs each task exactly once.
+  uint64_t _generation = 0;
+  size_t _pending = 0;
+  bool _stopping = false;
+  // One slot per thread, so that threads record their errors without taking the lock.
+  std::vector<std::exception_ptr> _errors;
+
+  void _worker_loop(size_t thread_idx) {
+    uint64_t seen_generation = 0;
+    while (true) {
+      const std::function<void(size_t)>* task;
+      {
+        std::unique_lock<std::mutex> lock(_mutex);
+        _start_cv.wait(lock, [&] { return _stopping || _generation != seen_generation; });
+        if (_stopping) {
+          return;
+        }
+        seen_generation = _generation;
+        task = _task;
+      }
+
+      try {
+        (*task)(thread_idx);
+      } catch (...) {
+        _errors[thread_idx] = std::current_exception();
+      }
+
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        if (--_pending == 0) {
+          _done_cv.notify_one();
+        }
+      }
+    }
+  }
+};
+
+#endif  // THREAD_POOL_HPP_
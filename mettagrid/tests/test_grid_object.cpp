@@ -41,9 +41,13 @@ TEST_F(GridLocationTest, ThreeParamConstructor) {
 // Concrete implementation of GridObject for testing
 class TestGridObject : public GridObject {
 public:
+  ObservationType value = 1;
+  mutable int obs_features_calls = 0;
+
   std::vector<PartialObservationToken> obs_features() const override {
+    obs_features_calls++;
     std::vector<PartialObservationToken> features;
-    features.push_back({0, 1});
+    features.push_back({0, value});
     return features;
   }
 };
@@ -69,3 +73,17 @@ TEST_F(GridObjectTest, InitWithLocation) {
   EXPECT_EQ(10, obj.location.c);
   EXPECT_EQ(2, obj.location.layer);
 }
+
+// Test that cached features are reused until the object is marked dirty
+TEST_F(GridObjectTest, CachedObsFeaturesRefreshWhenDirty) {
+  EXPECT_TRUE(obj.obs_dirty());
+  EXPECT_EQ(1, obj.cached_obs_features()[0].value);
+  EXPECT_EQ(1, obj.cached_obs_features()[0].value);
+  EXPECT_EQ(1, obj.obs_features_calls);
+  EXPECT_FALSE(obj.obs_dirty());
+
+  obj.value = 7;
+  obj.mark_obs_dirty();
+  EXPECT_EQ(7, obj.cached_obs_features()[0].value);
+  EXPECT_EQ(2, obj.obs_features_calls);
+}
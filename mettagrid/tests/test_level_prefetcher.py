@@ -0,0 +1,89 @@
+import os
+import signal
+import time
+
+import pytest
+from hydra import compose, initialize
+
+from metta.mettagrid.curriculum.core import SingleTaskCurriculum
+from metta.mettagrid.level_prefetcher import LevelPrefetcher
+from metta.mettagrid.mettagrid_env import MettaGridEnv
+
+
+@pytest.fixture(scope="module")
+def cfg():
+    with initialize(version_base=None, config_path="../configs"):
+        yield compose(config_name="test_basic")
+
+
+def test_prefetched_level_is_a_hit_or_wait(cfg):
+    curriculum = SingleTaskCurriculum("test", cfg)
+    prefetcher = LevelPrefetcher()
+    task = curriculum.get_task()
+    prefetcher.prefetch(task)
+    level = prefetcher.get(task)
+    assert level.grid.shape == task.env_cfg().game.map_builder.build().grid.shape
+
+    stats = prefetcher.stats()
+    assert stats["level_prefetch/hits"] + stats["level_prefetch/waits"] == 1
+    assert stats["level_prefetch/misses"] == 0
+    # stats() resets the counters.
+    assert prefetcher.stats()["level_prefetch/hits"] == 0
+
+
+def test_unprefetched_task_is_a_miss(cfg):
+    curriculum = SingleTaskCurriculum("test", cfg)
+    prefetcher = LevelPrefetcher()
+    prefetcher.prefetch(curriculum.get_task())
+    prefetcher.get(curriculum.get_task())
+    stats = prefetcher.stats()
+    assert stats["level_prefetch/misses"] == 1
+    assert stats["level_prefetch/hits"] + stats["level_prefetch/waits"] == 0
+
+
+def test_forked_child_builds_its_own_levels(cfg):
+    curriculum = SingleTaskCurriculum("test", cfg)
+    prefetcher = LevelPrefetcher()
+    # Start the parent's pool, and leave a build pending across the fork.
+    task = curriculum.get_task()
+    prefetcher.prefetch(task)
+
+    pid = os.fork()
+    if pid == 0:
+        # The child's pool threads weren't forked with it, so both of these hang unless it starts a new pool.
+        exit_code = 1
+        try:
+            prefetcher.get(task)
+            child_prefetcher = LevelPrefetcher()
+            child_task = curriculum.get_task()
+            child_prefetcher.prefetch(child_task)
+            child_prefetcher.get(child_task)
+            if child_prefetcher.stats()["level_prefetch/misses"] == 0:
+                exit_code = 0
+        finally:
+            os._exit(exit_code)
+
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            break
+        time.sleep(0.1)
+    else:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        pytest.fail("Forked child hung building a prefetched level")
+    assert os.waitstatus_to_exitcode(status) == 0
+    prefetcher.cancel()
+
+
+def test_env_resets_from_prefetched_levels(cfg):
+    env = MettaGridEnv(SingleTaskCurriculum("test", cfg), render_mode=None, prefetch_levels=True)
+    for _ in range(3):
+        obs, _ = env.reset()
+        assert obs is not None
+    stats = env._level_prefetcher.stats()
+    # The first level is built in __init__ before anything could be prefetched.
+    assert stats["level_prefetch/misses"] == 1
+    assert stats["level_prefetch/hits"] + stats["level_prefetch/waits"] == 3
+    env.close()
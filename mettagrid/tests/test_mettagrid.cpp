@@ -3,6 +3,7 @@
 #include "actions/attack.hpp"
 #include "actions/get_output.hpp"
 #include "actions/put_recipe_items.hpp"
+#include "actions/rotate.hpp"
 #include "event.hpp"
 #include "grid.hpp"
 #include "objects/agent.hpp"
@@ -264,6 +265,43 @@ TEST_F(MettaGridCppTest, AgentInventoryUpdate_RewardToZero) {
 
 // ==================== Grid Tests ====================
 
+TEST_F(MettaGridCppTest, AgentStatRewards_AppliedIncrementally) {
+  AgentConfig agent_cfg = create_test_agent_config();
+  agent_cfg.stat_rewards["action.attack.success"] = 0.5f;
+  agent_cfg.stat_rewards["ore.gained"] = 0.1f;
+  agent_cfg.stat_reward_max["action.attack.success"] = 1.0f;
+  std::unique_ptr<Agent> agent(new Agent(0, 0, agent_cfg));
+
+  float agent_reward = 0.0f;
+  agent->init(&agent_reward);
+
+  // Nothing changed, so nothing to do
+  agent->compute_stat_rewards();
+  EXPECT_FLOAT_EQ(agent_reward, 0.0f);
+
+  // Unrewarded stats don't register as changes
+  agent->stats.incr("action.move.success");
+  EXPECT_TRUE(agent->stats.changed_watched_stats().empty());
+
+  agent->stats.incr("action.attack.success");
+  agent->compute_stat_rewards();
+  EXPECT_FLOAT_EQ(agent_reward, 0.5f);
+  EXPECT_TRUE(agent->stats.changed_watched_stats().empty());
+
+  // Capped at stat_reward_max
+  agent->stats.add("action.attack.success", 5);
+  agent->compute_stat_rewards();
+  EXPECT_FLOAT_EQ(agent_reward, 1.0f);
+
+  // Item stats go through the same path. ore.gained also adds resource reward.
+  agent->stats.set_name_table(std::make_shared<StatNameTable>(std::vector<std::string>{"ore", "laser", "armor", "heart"}));
+  agent_reward = 0.0f;
+  agent->update_inventory(TestItems::ORE, 2);
+  agent->compute_stat_rewards();
+  EXPECT_FLOAT_EQ(agent_reward, 2 * 0.125f + 2 * 0.1f);
+  EXPECT_FLOAT_EQ(agent->current_stat_reward, 1.0f + 0.2f);
+}
+
 TEST_F(MettaGridCppTest, GridCreation) {
   Grid grid(5, 10);  // row/height, col/width
 
@@ -455,6 +493,64 @@ TEST_F(MettaGridCppTest, GetOutput) {
 
 // ==================== Event System Tests ====================
 
+// ==================== Action Tracking Tests ====================
+
+TEST_F(MettaGridCppTest, ActionTrackerRecordsSuccessfulActions) {
+  ActionTracker tracker(3);
+  EXPECT_EQ(tracker.last_action(0), ActionTracker::NoAction);
+
+  tracker.record(0, 1, true);
+  tracker.record(0, 1, true);
+  tracker.record(0, 2, false);  // failures don't change the last action
+  EXPECT_EQ(tracker.last_action(0), 1);
+  EXPECT_EQ(tracker.consecutive_count(0), 2u);
+  EXPECT_EQ(tracker.total_count(0, 1), 2u);
+
+  tracker.record(1, 2, true);
+  EXPECT_EQ(tracker.last_action(1), 2);
+  EXPECT_EQ(tracker.last_action(0), 1);
+
+  tracker.record(0, 2, true);
+  EXPECT_EQ(tracker.last_action(0), 2);
+  EXPECT_EQ(tracker.consecutive_count(0), 1u);
+  EXPECT_EQ(tracker.total_count(0, 1), 2u);
+
+  tracker.clear();
+  EXPECT_EQ(tracker.last_action(0), ActionTracker::NoAction);
+  EXPECT_EQ(tracker.total_count(0, 1), 0u);
+}
+
+TEST_F(MettaGridCppTest, SequentialRotationsTrackedPerEnv) {
+  // Two grids with their own trackers, standing in for two envs in the same process.
+  ActionConfig rotate_cfg({}, {});
+  Grid grid_a(5, 5);
+  Grid grid_b(5, 5);
+  ActionTracker tracker_a(1);
+  ActionTracker tracker_b(1);
+  Rotate rotate_a(rotate_cfg, true);
+  Rotate rotate_b(rotate_cfg, true);
+  rotate_a.init(&grid_a, &tracker_a, 0);
+  rotate_b.init(&grid_b, &tracker_b, 0);
+
+  AgentConfig agent_cfg = create_test_agent_config();
+  Agent* agent_a = new Agent(1, 1, agent_cfg);
+  Agent* agent_b = new Agent(1, 1, agent_cfg);
+  float reward_a = 0.0f;
+  float reward_b = 0.0f;
+  agent_a->init(&reward_a);
+  agent_b->init(&reward_b);
+  grid_a.add_object(agent_a);
+  grid_b.add_object(agent_b);
+
+  // Both agents have agent_id 0. Rotating in env A must not count as a previous rotation in env B.
+  EXPECT_TRUE(rotate_a.handle_action(agent_a->id, Orientation::Left));
+  EXPECT_TRUE(rotate_a.handle_action(agent_a->id, Orientation::Right));
+  EXPECT_TRUE(rotate_b.handle_action(agent_b->id, Orientation::Down));
+
+  EXPECT_FLOAT_EQ(agent_a->stats.to_dict()["movement.sequential_rotations"], 1.0f);
+  EXPECT_EQ(agent_b->stats.to_dict().count("movement.sequential_rotations"), 0u);
+}
+
 TEST_F(MettaGridCppTest, EventManager) {
   Grid grid(10, 10);
   EventManager event_manager;
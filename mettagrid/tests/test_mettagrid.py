@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from typing import List, Tuple
 
 import numpy as np
+import pytest
 
+from metta.mettagrid.level_builder import Level
 from metta.mettagrid.mettagrid_c import MettaGrid, PackedCoordinate
 from metta.mettagrid.mettagrid_c_config import from_mettagrid_config
 from metta.mettagrid.mettagrid_env import dtype_actions
@@ -67,8 +69,16 @@ class TestEnvironmentBuilder:
         return game_map
 
     @staticmethod
-    def create_environment(game_map: np.ndarray, max_steps: int = 10, num_agents: int | None = None) -> MettaGrid:
+    def create_environment(
+        game_map: np.ndarray, max_steps: int = 10, num_agents: int | None = None, observation_threads: int = 1
+    ) -> MettaGrid:
         """Create a MettaGrid environment from a game map."""
+        game_config = TestEnvironmentBuilder.create_game_config(max_steps, num_agents, observation_threads)
+        return MettaGrid(game_config, game_map.tolist(), 42)
+
+    @staticmethod
+    def create_game_config(max_steps: int = 10, num_agents: int | None = None, observation_threads: int = 1):
+        """Create the C++ game config used by create_environment."""
         if num_agents is None:
             num_agents = EnvConfig.NUM_AGENTS
 
@@ -93,8 +103,9 @@ class TestEnvironmentBuilder:
             "groups": {"red": {"id": 0, "props": {}}},
             "objects": {"wall": {"type_id": 1}},
             "agent": {},
+            "observation_threads": observation_threads,
         }
-        return MettaGrid(from_mettagrid_config(game_config), game_map.tolist(), 42)
+        return from_mettagrid_config(game_config)
 
 
 class ObservationHelper:
@@ -233,3 +244,250 @@ class TestPackedCoordinate:
                 raise AssertionError(f"Should have raised exception for ({row}, {col})")
             except ValueError:
                 pass  # Expected
+
+
+class TestObservationThreads:
+    """Tests for computing observations on multiple threads."""
+
+    def test_threaded_observations_match_serial(self):
+        game_map = TestEnvironmentBuilder.create_basic_grid(width=12, height=10)
+        positions = [(r, c) for r in range(1, 9) for c in (2, 5, 8)]
+        game_map = TestEnvironmentBuilder.place_agents(game_map, positions)
+        num_agents = len(positions)
+
+        serial_env = TestEnvironmentBuilder.create_environment(game_map, max_steps=20, num_agents=num_agents)
+        threaded_env = TestEnvironmentBuilder.create_environment(
+            game_map, max_steps=20, num_agents=num_agents, observation_threads=4
+        )
+
+        serial_obs, _ = serial_env.reset()
+        threaded_obs, _ = threaded_env.reset()
+        np.testing.assert_array_equal(serial_obs, threaded_obs)
+
+        rng = np.random.default_rng(0)
+        max_args = serial_env.max_action_args()
+        for _ in range(10):
+            action_types = rng.integers(0, len(max_args), size=num_agents)
+            action_args = [rng.integers(0, max_args[t] + 1) for t in action_types]
+            actions = np.array(list(zip(action_types, action_args, strict=True)), dtype=dtype_actions)
+            serial_obs, serial_rewards, *_ = serial_env.step(actions)
+            threaded_obs, threaded_rewards, *_ = threaded_env.step(actions)
+            np.testing.assert_array_equal(serial_obs, threaded_obs)
+            np.testing.assert_array_equal(serial_rewards, threaded_rewards)
+
+        serial_stats = serial_env.get_episode_stats()["game"]
+        threaded_stats = threaded_env.get_episode_stats()["game"]
+        for key in ("tokens_written", "tokens_dropped", "tokens_free_space"):
+            assert serial_stats[key] == threaded_stats[key]
+
+    def test_more_threads_than_agents(self):
+        game_map = TestEnvironmentBuilder.create_basic_grid()
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(1, 1), (2, 4)])
+        env = TestEnvironmentBuilder.create_environment(game_map, observation_threads=8)
+
+        obs, _ = env.reset()
+        assert obs.shape == (2, EnvConfig.NUM_OBS_TOKENS, EnvConfig.OBS_TOKEN_SIZE)
+        assert env.get_episode_stats()["game"]["tokens_written"] > 0
+
+
+class TestGridOccupancy:
+    """Tests for the zero-copy grid occupancy view."""
+
+    def test_occupancy_matches_grid_objects(self, basic_env):
+        occupancy = basic_env.grid_occupancy()
+        assert occupancy.shape == (basic_env.map_height, basic_env.map_width, 2)
+        assert not occupancy.flags.writeable
+
+        objects = basic_env.grid_objects()
+        assert set(occupancy[occupancy != 0].tolist()) == set(objects.keys())
+        for obj_id, obj in objects.items():
+            assert occupancy[obj["r"], obj["c"], obj["layer"]] == obj_id
+
+    def test_occupancy_view_tracks_moves(self, basic_env):
+        basic_env.reset()
+        occupancy = basic_env.grid_occupancy()
+        agent_id, agent = next((k, v) for k, v in basic_env.grid_objects().items() if v["type"] == 0)
+        before = (agent["r"], agent["c"])
+
+        move_idx = basic_env.action_names().index("move")
+        rotate_idx = basic_env.action_names().index("rotate")
+        noop_idx = basic_env.action_names().index("noop")
+        actions = np.full((basic_env.num_agents, 2), [noop_idx, 0], dtype=dtype_actions)
+        agent_idx = agent["agent_id"]
+        # Face right, then move forward
+        actions[agent_idx] = [rotate_idx, 3]
+        basic_env.step(actions)
+        actions[agent_idx] = [move_idx, 0]
+        basic_env.step(actions)
+
+        agent = basic_env.grid_objects()[agent_id]
+        after = (agent["r"], agent["c"])
+        assert after != before
+        assert occupancy[after[0], after[1], agent["layer"]] == agent_id
+        assert occupancy[before[0], before[1], agent["layer"]] == 0
+
+
+class TestGridSnapshot:
+    """Tests for the columnar object snapshot."""
+
+    def test_snapshot_matches_grid_objects(self, basic_env):
+        basic_env.reset()
+        snapshot = basic_env.grid_snapshot()
+        objects = basic_env.grid_objects()
+
+        agents = snapshot["agents"]
+        walls = snapshot["walls"]
+        assert len(agents["id"]) + len(walls["id"]) + len(snapshot["converters"]["id"]) == len(objects)
+        assert agents["agent_id"].tolist() == list(range(basic_env.num_agents))
+        assert agents["inventory"].shape == (basic_env.num_agents, len(basic_env.inventory_item_names()))
+
+        for row, obj_id in enumerate(agents["id"].tolist()):
+            obj = objects[obj_id]
+            assert obj["type"] == agents["type_id"][row] == 0
+            assert (obj["r"], obj["c"], obj["layer"]) == (agents["r"][row], agents["c"][row], agents["layer"][row])
+            assert obj["agent:group"] == agents["group"][row]
+            assert obj["agent:orientation"] == agents["orientation"][row]
+            assert obj["agent:frozen"] == agents["frozen"][row]
+        for row, obj_id in enumerate(walls["id"].tolist()):
+            obj = objects[obj_id]
+            assert (obj["r"], obj["c"]) == (walls["r"][row], walls["c"][row])
+            assert obj.get("swappable", 0) == walls["swappable"][row]
+
+    def test_snapshot_reuses_buffers(self, basic_env):
+        basic_env.reset()
+        first = basic_env.grid_snapshot()
+        orientations = first["agents"]["orientation"]
+        before = orientations.copy()
+
+        rotate_idx = basic_env.action_names().index("rotate")
+        actions = np.zeros((basic_env.num_agents, 2), dtype=dtype_actions)
+        actions[:, 0] = rotate_idx
+        actions[:, 1] = 3
+        basic_env.step(actions)
+
+        second = basic_env.grid_snapshot()
+        assert second["agents"]["orientation"] is orientations
+        assert not np.array_equal(orientations, before)
+        assert (orientations == 3).all()
+
+
+class TestEncodedMap:
+    """Tests for building environments from integer-coded maps."""
+
+    def test_encoded_map_matches_string_map(self):
+        game_map = TestEnvironmentBuilder.create_basic_grid()
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(1, 1), (2, 4)])
+        string_env = TestEnvironmentBuilder.create_environment(game_map)
+
+        map_ids, map_names = Level(game_map, []).encode()
+        assert map_ids.dtype == np.uint8
+        assert sorted(map_names) == ["agent.red", "empty", "wall"]
+        encoded_env = MettaGrid(TestEnvironmentBuilder.create_game_config(), map_ids, map_names, 42)
+
+        assert encoded_env.initial_grid_hash == string_env.initial_grid_hash
+        assert encoded_env.grid_objects() == string_env.grid_objects()
+        np.testing.assert_array_equal(encoded_env.reset()[0], string_env.reset()[0])
+
+    @pytest.mark.parametrize("dtype", [np.uint16, np.int64])
+    def test_wider_id_types_match_uint8(self, dtype):
+        game_map = TestEnvironmentBuilder.create_basic_grid()
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(1, 1), (2, 4)])
+        map_ids, map_names = Level(game_map, []).encode()
+        uint8_env = MettaGrid(TestEnvironmentBuilder.create_game_config(), map_ids, map_names, 42)
+        wide_env = MettaGrid(TestEnvironmentBuilder.create_game_config(), map_ids.astype(dtype), map_names, 42)
+
+        assert wide_env.initial_grid_hash == uint8_env.initial_grid_hash
+        np.testing.assert_array_equal(wide_env.reset()[0], uint8_env.reset()[0])
+
+    def test_unknown_names_only_fail_when_used(self):
+        game_map = TestEnvironmentBuilder.create_basic_grid()
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(1, 1), (2, 4)])
+        map_ids, map_names = Level(game_map, []).encode()
+
+        MettaGrid(TestEnvironmentBuilder.create_game_config(), map_ids, map_names + ["dragon"], 42)
+        map_ids[1, 2] = len(map_names)
+        with pytest.raises(RuntimeError, match="Unknown object type: dragon"):
+            MettaGrid(TestEnvironmentBuilder.create_game_config(), map_ids, map_names + ["dragon"], 42)
+        with pytest.raises(RuntimeError, match="out of range"):
+            MettaGrid(TestEnvironmentBuilder.create_game_config(), map_ids, map_names, 42)
+
+    def test_encode_uses_uint16_for_many_names(self):
+        grid = np.array([[f"name{i}" for i in range(300)]])
+        map_ids, map_names = Level(grid, []).encode()
+        assert map_ids.dtype == np.uint16
+        assert [map_names[i] for i in map_ids[0]] == grid[0].tolist()
+
+    def test_encode_round_trips_non_contiguous_grids(self):
+        grid = np.array([["wall", "agent.red", "empty"], ["é", "wall", "agent.blue"]]).T
+        map_ids, map_names = Level(grid, []).encode()
+        assert map_names == ["wall", "é", "agent.red", "empty", "agent.blue"]
+        np.testing.assert_array_equal(np.array(map_names)[map_ids], grid)
+        assert Level(grid, []).count_agents() == 2
+
+
+class TestLoadMap:
+    """Tests for reusing an environment with a new map."""
+
+    def test_load_map_matches_fresh_env(self, basic_env):
+        basic_env.reset()
+        noop_idx = basic_env.action_names().index("noop")
+        basic_env.step(np.full((basic_env.num_agents, 2), [noop_idx, 0], dtype=dtype_actions))
+
+        game_map = TestEnvironmentBuilder.create_basic_grid(width=10, height=6)
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(2, 2), (4, 7)])
+        fresh_env = TestEnvironmentBuilder.create_environment(game_map)
+
+        basic_env.load_map(game_map.tolist(), 0)
+        assert (basic_env.map_height, basic_env.map_width) == (6, 10)
+        assert basic_env.current_step == 0
+        assert basic_env.initial_grid_hash == fresh_env.initial_grid_hash
+
+        obs, _ = basic_env.reset()
+        fresh_obs, _ = fresh_env.reset()
+        np.testing.assert_array_equal(obs, fresh_obs)
+        assert basic_env.grid_objects().keys() == fresh_env.grid_objects().keys()
+        assert len(basic_env.grid_snapshot()["walls"]["id"]) == len(fresh_env.grid_snapshot()["walls"]["id"])
+        assert (
+            basic_env.get_episode_stats()["game"]["objects.wall"]
+            == fresh_env.get_episode_stats()["game"]["objects.wall"]
+        )
+
+        move_idx = basic_env.action_names().index("move")
+        actions = np.full((basic_env.num_agents, 2), [move_idx, 0], dtype=dtype_actions)
+        obs, rewards, *_ = basic_env.step(actions)
+        fresh_obs, fresh_rewards, *_ = fresh_env.step(actions)
+        np.testing.assert_array_equal(obs, fresh_obs)
+        np.testing.assert_array_equal(rewards, fresh_rewards)
+
+    def test_occupancy_view_survives_load_map(self, basic_env):
+        occupancy = basic_env.grid_occupancy()
+        before = occupancy.copy()
+        game_map = TestEnvironmentBuilder.create_basic_grid(width=10, height=6)
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(2, 2), (4, 7)])
+        basic_env.load_map(game_map.tolist(), 0)
+
+        # The old view still points at the previous grid.
+        np.testing.assert_array_equal(occupancy, before)
+        assert basic_env.grid_occupancy().shape == (6, 10, 2)
+
+    def test_load_encoded_map(self, basic_env):
+        game_map = TestEnvironmentBuilder.create_basic_grid(width=10, height=6)
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(2, 2), (4, 7)])
+        fresh_env = TestEnvironmentBuilder.create_environment(game_map)
+
+        map_ids, map_names = Level(game_map, []).encode()
+        basic_env.load_map(map_ids, map_names, 0)
+        assert basic_env.initial_grid_hash == fresh_env.initial_grid_hash
+        np.testing.assert_array_equal(basic_env.reset()[0], fresh_env.reset()[0])
+
+    def test_load_map_requires_same_agent_count(self, basic_env):
+        game_map = TestEnvironmentBuilder.create_basic_grid(width=10, height=6)
+        game_map = TestEnvironmentBuilder.place_agents(game_map, [(1, 1)])
+        with pytest.raises(RuntimeError, match="agents"):
+            basic_env.load_map(game_map.tolist(), 0)
+
+        # The env is left as it was
+        assert (basic_env.map_height, basic_env.map_width) == (4, 8)
+        obs, _ = basic_env.reset()
+        assert obs.shape[0] == basic_env.num_agents
+        assert len(basic_env.grid_snapshot()["agents"]["agent_id"]) == basic_env.num_agents
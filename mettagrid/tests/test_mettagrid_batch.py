@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from metta.mettagrid.mettagrid_c import MettaGrid, MettaGridBatch
+from metta.mettagrid.mettagrid_c_config import from_mettagrid_config
+from metta.mettagrid.mettagrid_env import dtype_actions
+
+NUM_AGENTS = 2
+MAX_STEPS = 5
+
+
+def make_game_config(max_steps: int = MAX_STEPS):
+    return from_mettagrid_config(
+        {
+            "max_steps": max_steps,
+            "num_agents": NUM_AGENTS,
+            "obs_width": 3,
+            "obs_height": 3,
+            "num_observation_tokens": 50,
+            "inventory_item_names": ["laser", "armor"],
+            "actions": {
+                "noop": {"enabled": True},
+                "move": {"enabled": True},
+                "rotate": {"enabled": True},
+                "attack": {"enabled": False},
+                "put_items": {"enabled": False},
+                "get_items": {"enabled": False},
+                "swap": {"enabled": False},
+                "change_color": {"enabled": False},
+                "change_glyph": {"enabled": False, "number_of_glyphs": 4},
+            },
+            "groups": {"red": {"id": 0, "props": {}}},
+            "objects": {"wall": {"type_id": 1}},
+            "agent": {},
+        }
+    )
+
+
+def make_map(agent_positions):
+    game_map = [["empty"] * 6 for _ in range(5)]
+    for c in range(6):
+        game_map[0][c] = game_map[-1][c] = "wall"
+    for r in range(5):
+        game_map[r][0] = game_map[r][-1] = "wall"
+    for r, c in agent_positions:
+        game_map[r][c] = "agent.red"
+    return game_map
+
+
+MAPS = [make_map([(1, 1), (2, 3)]), make_map([(1, 2), (3, 4)]), make_map([(2, 1), (3, 3)])]
+
+
+def random_actions(rng, num_agents, max_args):
+    action_types = rng.integers(0, len(max_args), size=num_agents)
+    action_args = [rng.integers(0, max_args[t] + 1) for t in action_types]
+    return np.array(list(zip(action_types, action_args, strict=True)), dtype=dtype_actions)
+
+
+@pytest.mark.parametrize("num_threads", [1, 3])
+def test_batch_matches_individual_envs(num_threads):
+    cfg = make_game_config(max_steps=0)
+    batch = MettaGridBatch(cfg, MAPS, 7, num_threads)
+    envs = [MettaGrid(cfg, game_map, 7 + i) for i, game_map in enumerate(MAPS)]
+    assert batch.num_envs == len(MAPS)
+    assert batch.num_agents == len(MAPS) * NUM_AGENTS
+
+    batch_obs, _ = batch.reset()
+    env_obs = np.concatenate([env.reset()[0] for env in envs])
+    np.testing.assert_array_equal(batch_obs, env_obs)
+
+    rng = np.random.default_rng(0)
+    max_args = envs[0].max_action_args()
+    for _ in range(10):
+        actions = random_actions(rng, batch.num_agents, max_args)
+        batch_obs, batch_rewards, _, _, infos = batch.step(actions)
+        results = [env.step(actions[i * NUM_AGENTS : (i + 1) * NUM_AGENTS]) for i, env in enumerate(envs)]
+        np.testing.assert_array_equal(batch_obs, np.concatenate([r[0] for r in results]))
+        np.testing.assert_array_equal(batch_rewards, np.concatenate([r[1] for r in results]))
+        assert infos["episodes"] == []
+
+
+def test_batch_writes_into_shared_buffers():
+    batch = MettaGridBatch(make_game_config(), MAPS, 0)
+    obs, _ = batch.reset()
+    actions = np.zeros((batch.num_agents, 2), dtype=dtype_actions)
+    next_obs, rewards, terminals, truncations, _ = batch.step(actions)
+
+    assert next_obs.shape == (batch.num_agents, 50, 3)
+    assert np.shares_memory(obs, next_obs)
+    assert rewards.shape == terminals.shape == truncations.shape == (batch.num_agents,)
+
+
+def test_batch_auto_resets_from_queued_maps():
+    batch = MettaGridBatch(make_game_config(), MAPS[:2], 0, 2)
+    batch.add_maps([MAPS[2]])
+    assert batch.num_queued_maps == 1
+    batch.reset()
+
+    actions = np.zeros((batch.num_agents, 2), dtype=dtype_actions)
+    for _ in range(MAX_STEPS - 1):
+        _, _, terminals, _, infos = batch.step(actions)
+        assert not terminals.any()
+        assert infos["episodes"] == []
+
+    _, _, terminals, _, infos = batch.step(actions)
+    # The finishing step still reports the episode's dones
+    assert terminals.all()
+    episodes = infos["episodes"]
+    assert [episode["env_idx"] for episode in episodes] == [0, 1]
+    for episode in episodes:
+        assert episode["steps"] == MAX_STEPS
+        assert episode["episode_rewards"].shape == (NUM_AGENTS,)
+        assert "agent" in episode["episode_stats"]
+
+    # Env 0 took the queued map, env 1 reused its own
+    assert batch.num_queued_maps == 0
+    agent_rows = sorted((o["r"], o["c"]) for o in batch.env(0).grid_objects().values() if o["type"] == 0)
+    assert agent_rows == [(2, 1), (3, 3)]
+    assert batch.env(0).current_step == 0
+
+    _, _, terminals, _, infos = batch.step(actions)
+    assert not terminals.any()
+    assert batch.env(1).current_step == 1
+
+
+def test_batch_env_handles_survive_auto_reset():
+    batch = MettaGridBatch(make_game_config(), MAPS[:1], 0)
+    batch.add_maps([MAPS[2]])
+    env = batch.env(0)
+    batch.reset()
+
+    actions = np.zeros((batch.num_agents, 2), dtype=dtype_actions)
+    for _ in range(MAX_STEPS):
+        _, _, _, _, infos = batch.step(actions)
+    assert [episode["env_idx"] for episode in infos["episodes"]] == [0]
+
+    # The handle taken before the episode ended now sees the new episode
+    assert env.current_step == 0
+    agent_rows = sorted((o["r"], o["c"]) for o in env.grid_objects().values() if o["type"] == 0)
+    assert agent_rows == [(2, 1), (3, 3)]
+    batch.step(actions)
+    assert env.current_step == 1
+
+
+def test_batch_rejects_wrong_action_shape():
+    batch = MettaGridBatch(make_game_config(), MAPS, 0)
+    batch.reset()
+    with pytest.raises(RuntimeError):
+        batch.step(np.zeros((NUM_AGENTS, 2), dtype=dtype_actions))
@@ -1,4 +1,6 @@
+import numpy as np
 import pytest
+from hydra import compose, initialize
 from omegaconf import OmegaConf
 from omegaconf.errors import ConfigAttributeError
 from pydantic import ValidationError
@@ -17,3 +19,20 @@ def test_invalid_env_map_type_raises():
 def test_invalid_env_cfg_type_raises():
     with pytest.raises(ValidationError):
         MettaGridEnv({}, render_mode=None)
+
+
+def test_reset_reuses_c_env():
+    with initialize(version_base=None, config_path="../configs"):
+        cfg = compose(config_name="test_basic")
+    env = MettaGridEnv(SingleTaskCurriculum("test", cfg), render_mode=None)
+    env.reset()
+    c_env = env._c_env
+    env.reset()
+    # Same task and game config, so only the map is reloaded.
+    assert env._c_env is c_env
+    noop = env.action_names.index("noop")
+    env.step(np.full((env.num_agents, 2), [noop, 0], dtype=np.int32))
+
+    env.reset_with_level(SingleTaskCurriculum("test", cfg).get_task().env_cfg().game.map_builder.build())
+    assert env._c_env is c_env
+    assert env._c_env.current_step == 0
@@ -5,6 +5,7 @@
 
 #include "../mettagrid/packed_coordinate.hpp"  // Adjust path as needed
 
+using PackedCoordinate::observation_offsets;
 using PackedCoordinate::ObservationPattern;
 using Offset = std::pair<int, int>;
 
@@ -94,6 +95,13 @@ TEST_P(ObservationPatternParamTest, MatchesReferenceOffsets) {
   EXPECT_EQ(actual, expected);
 }
 
+TEST_P(ObservationPatternParamTest, PrecomputedOffsetsMatchPattern) {
+  int height = GetParam().first;
+  int width = GetParam().second;
+
+  EXPECT_EQ(observation_offsets(height, width), compute_sorted_offsets(height, width));
+}
+
 #if defined(__clang__)
 #define INSTANTIATE_TEST_MACRO INSTANTIATE_TEST_SUITE_P
 #else
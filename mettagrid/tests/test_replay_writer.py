@@ -0,0 +1,137 @@
+import json
+import zlib
+
+import numpy as np
+import pytest
+from hydra import compose, initialize
+
+from metta.mettagrid.curriculum.core import SingleTaskCurriculum
+from metta.mettagrid.mettagrid_env import MettaGridEnv
+from metta.mettagrid.replay_writer import ChangeLog, EpisodeReplay, ReplayWriter
+
+
+@pytest.fixture(scope="module")
+def cfg():
+    with initialize(version_base=None, config_path="../configs"):
+        yield compose(config_name="test_basic")
+
+
+def value_at(value, step):
+    """Value of a replay key at `step`, from either a constant or a list of [step, value] changes."""
+    if not isinstance(value, list) or not value or not isinstance(value[0], list):
+        return value
+    current = None
+    for change_step, change_value in value:
+        if change_step > step:
+            break
+        current = change_value
+    return current
+
+
+def test_change_log_spools_chunks():
+    log = ChangeLog(chunk_size=4)
+    for step in range(5):
+        rows = np.arange(3, dtype=np.int32)
+        log.append(step, rows, rows + 1, rows * 0.5 + step)
+
+    steps, rows, fields, values = log.read()
+    assert log.num_records == 15
+    assert steps.tolist() == [step for step in range(5) for _ in range(3)]
+    assert rows.tolist() == [0, 1, 2] * 5
+    assert fields.tolist() == [1, 2, 3] * 5
+    assert values.tolist() == [row * 0.5 + step for step in range(5) for row in range(3)]
+    # Reading doesn't disturb further appends.
+    log.append(5, np.array([7]), np.array([8]), np.array([9.0]))
+    assert log.read()[1].tolist()[-1] == 7
+
+
+def test_replay_matches_env_state(cfg, tmp_path):
+    replay_writer = ReplayWriter(str(tmp_path))
+    env = MettaGridEnv(SingleTaskCurriculum("test", cfg), render_mode=None, replay_writer=replay_writer)
+    env.reset(seed=1)
+    episode_id = env._episode_id
+
+    rng = np.random.default_rng(0)
+    max_args = env.max_action_args
+    movement = [env.action_names.index(name) for name in ["noop", "move", "rotate"]]
+    states = []
+    for _ in range(20):
+        action_types = rng.choice(movement, size=env.num_agents)
+        action_args = [rng.integers(0, max_args[t] + 1) for t in action_types]
+        actions = np.stack([action_types, action_args], axis=1).astype(np.int32)
+        env.step(actions)
+        states.append((env.grid_objects, actions))
+
+    replay_data = replay_writer.episodes[episode_id].get_replay_data()
+    replay_writer.write_replay(episode_id)
+    assert episode_id not in replay_writer.episodes
+    with open(tmp_path / f"{episode_id}.json.z", "rb") as f:
+        replay = json.loads(zlib.decompress(f.read()))
+
+    assert replay["max_steps"] == 20
+    assert replay["num_agents"] == env.num_agents
+    grid_objects = replay["grid_objects"]
+    assert [value_at(obj["id"], 0) for obj in grid_objects] == sorted(states[0][0].keys())
+
+    for step, (objects, actions) in enumerate(states):
+        for replay_object in grid_objects:
+            obj = objects[value_at(replay_object["id"], step)]
+            # Every key of the env's grid objects is in the replay, with the value it had at that step.
+            for key, value in obj.items():
+                assert value_at(replay_object[key], step) == json.loads(json.dumps(value)), key
+            if "agent_id" in obj:
+                assert value_at(replay_object["action"], step) == actions[obj["agent_id"]].tolist()
+
+    # Converters alternate between converting and cooling down, and "converting" is the observation feature
+    # (converting or cooling down) rather than the raw state.
+    converters = [obj for obj in grid_objects if "is_converting" in obj]
+    assert converters
+    assert any(isinstance(obj["is_converting"], list) for obj in converters)
+    for obj in converters:
+        for step in range(20):
+            expected = int(value_at(obj["is_converting"], step) or value_at(obj["is_cooling_down"], step))
+            assert value_at(obj["converting"], step) == expected
+
+    assert json.loads(json.dumps(replay_data["grid_objects"])) == grid_objects
+
+
+def test_replay_records_frozen_as_observed(cfg, monkeypatch):
+    env = MettaGridEnv(SingleTaskCurriculum("test", cfg), render_mode=None)
+    env.reset(seed=1)
+    replay = EpisodeReplay(env)
+
+    # Freeze the first agent for a few steps, as if it had been attacked.
+    freeze_remaining = iter([0, 10, 9, 8, 0])
+    snapshot_property = MettaGridEnv.grid_snapshot
+
+    def frozen_snapshot(self):
+        snapshot = snapshot_property.fget(self)
+        snapshot["agents"]["frozen"][0] = next(freeze_remaining)
+        return snapshot
+
+    monkeypatch.setattr(MettaGridEnv, "grid_snapshot", property(frozen_snapshot))
+    noop = np.zeros((env.num_agents, 2), dtype=np.int32)
+    noop[:, 0] = env.action_names.index("noop")
+    for _ in range(5):
+        env.step(noop)
+        replay.log_step(noop, np.zeros(env.num_agents))
+
+    agent = next(obj for obj in replay.get_replay_data()["grid_objects"] if obj.get("agent_id") == 0)
+    assert agent["freeze_remaining"] == [[0, 0], [1, 10], [2, 9], [3, 8], [4, 0]]
+    assert agent["agent:frozen"] == [[0, 0], [1, 1], [4, 0]]
+    assert agent["is_frozen"] == [[0, False], [1, True], [4, False]]
+    assert agent["is_swappable"] == [[0, False], [1, True], [4, False]]
+
+
+def test_write_replay_releases_episode_without_replay_dir(cfg):
+    replay_writer = ReplayWriter()
+    env = MettaGridEnv(SingleTaskCurriculum("test", cfg), render_mode=None, replay_writer=replay_writer)
+    env.reset(seed=1)
+    episode_id = env._episode_id
+    spool = replay_writer.episodes[episode_id].changes._spool
+
+    assert replay_writer.write_replay(episode_id) is None
+    assert replay_writer.episodes == {}
+    assert spool.closed
+    with pytest.raises(ValueError, match="not found"):
+        replay_writer.write_replay(episode_id)
@@ -217,3 +217,123 @@ TEST_F(StatsTrackerTest, CompleteMetadata) {
   // EXPECT_EQ(0, result.count("resource.updates"));
   // EXPECT_EQ(0, result.count("resource.rate"));
 }
+
+// Test that string and id based updates share the same stat
+TEST_F(StatsTrackerTest, StringAndIdUpdatesShareStat) {
+  StatId id = stats.stat_id("shared");
+  stats.incr("shared");
+  stats.add(id, 2);
+
+  EXPECT_EQ(id, stats.stat_id("shared"));
+  auto result = stats.to_dict();
+  EXPECT_EQ(1u, result.size());
+  EXPECT_FLOAT_EQ(3.0f, result["shared"]);
+}
+
+// Test that interning is stable and dense
+TEST_F(StatsTrackerTest, NameTableInternsOnce) {
+  StatNameTable table;
+  StatId a = table.intern("a");
+  StatId b = table.intern("b");
+
+  EXPECT_NE(a, b);
+  EXPECT_EQ(a, table.intern("a"));
+  EXPECT_EQ(2u, table.size());
+  EXPECT_EQ("b", table.name(b));
+}
+
+// Test that item stats are registered up front and named after the inventory item
+TEST_F(StatsTrackerTest, ItemStatsArePreregistered) {
+  auto table = std::make_shared<StatNameTable>(std::vector<std::string>{"ore", "heart"});
+  size_t registered = table->size();
+  EXPECT_EQ(2u * static_cast<size_t>(ItemStat::Count), registered);
+
+  stats.set_name_table(table);
+  stats.add(1, ItemStat::Gained, 3);
+  stats.add(0, ItemStat::Lost, 1);
+
+  // No new names should be needed for registered items
+  EXPECT_EQ(registered, table->size());
+  auto result = stats.to_dict();
+  EXPECT_FLOAT_EQ(3.0f, result["heart.gained"]);
+  EXPECT_FLOAT_EQ(1.0f, result["ore.lost"]);
+}
+
+// Test that stats survive a switch to a shared name table
+TEST_F(StatsTrackerTest, SetNameTableMigratesStats) {
+  stats.add("before", 5);
+
+  auto table = std::make_shared<StatNameTable>();
+  table->intern("other");
+  stats.set_name_table(table);
+  stats.add("before", 1);
+  stats.incr("after");
+
+  auto result = stats.to_dict();
+  EXPECT_EQ(2u, result.size());
+  EXPECT_FLOAT_EQ(6.0f, result["before"]);
+  EXPECT_FLOAT_EQ(1.0f, result["after"]);
+}
+
+// Test that trackers sharing a table keep independent values
+TEST_F(StatsTrackerTest, SharedTableIndependentValues) {
+  auto table = std::make_shared<StatNameTable>();
+  StatsTracker other;
+  stats.set_name_table(table);
+  other.set_name_table(table);
+
+  StatKey key("hits");
+  stats.incr(key);
+  stats.incr(key);
+  other.incr(key);
+
+  EXPECT_EQ(1u, table->size());
+  EXPECT_FLOAT_EQ(2.0f, stats.to_dict()["hits"]);
+  EXPECT_FLOAT_EQ(1.0f, other.to_dict()["hits"]);
+}
+
+// Test that a StatKey re-resolves its id when used with a different table
+TEST_F(StatsTrackerTest, StatKeyResolvesPerTable) {
+  StatNameTable first;
+  StatNameTable second;
+  second.intern("padding");
+  StatKey key("resource");
+
+  StatId first_id = key.id(first);
+  StatId second_id = key.id(second);
+
+  EXPECT_EQ("resource", first.name(first_id));
+  EXPECT_EQ("resource", second.name(second_id));
+  EXPECT_NE(first_id, second_id);
+}
+
+// Test that only watched stats are reported as changed, once per change batch
+TEST_F(StatsTrackerTest, WatchedStatsReportChanges) {
+  StatId watched = stats.watch("watched");
+  stats.incr("unwatched");
+  EXPECT_TRUE(stats.changed_watched_stats().empty());
+
+  stats.incr("watched");
+  stats.add(watched, 2);
+  ASSERT_EQ(1u, stats.changed_watched_stats().size());
+  EXPECT_EQ(watched, stats.changed_watched_stats()[0]);
+
+  stats.clear_changed_watched_stats();
+  EXPECT_TRUE(stats.changed_watched_stats().empty());
+
+  stats.set("watched", 1);
+  EXPECT_EQ(1u, stats.changed_watched_stats().size());
+}
+
+// Test that watches survive a switch to a shared name table
+TEST_F(StatsTrackerTest, WatchesMigrateWithNameTable) {
+  stats.watch("watched");
+
+  auto table = std::make_shared<StatNameTable>();
+  table->intern("padding");
+  stats.set_name_table(table);
+  stats.incr("watched");
+
+  ASSERT_EQ(1u, stats.changed_watched_stats().size());
+  EXPECT_EQ(table->intern("watched"), stats.changed_watched_stats()[0]);
+}
@@ -0,0 +1,57 @@
+#include <gtest/gtest.h>
+
+#include <atomic>
+#include <stdexcept>
+#include <thread>
+#include <vector>
+
+#include "../mettagrid/thread_pool.hpp"
+
+TEST(ThreadPoolTest, RunsEveryIndexOncePerRun) {
+  ThreadPool pool(4);
+  ASSERT_EQ(pool.num_threads(), 4u);
+
+  std::vector<int> counts(pool.num_threads(), 0);
+  for (int run = 0; run < 100; run++) {
+    pool.run([&](size_t thread_idx) { counts[thread_idx]++; });
+  }
+  for (int count : counts) {
+    EXPECT_EQ(count, 100);
+  }
+}
+
+TEST(ThreadPoolTest, IndexZeroRunsOnTheCallingThread) {
+  ThreadPool pool(3);
+  std::vector<std::thread::id> ids(pool.num_threads());
+  pool.run([&](size_t thread_idx) { ids[thread_idx] = std::this_thread::get_id(); });
+
+  EXPECT_EQ(ids[0], std::this_thread::get_id());
+  EXPECT_NE(ids[1], std::this_thread::get_id());
+  EXPECT_NE(ids[1], ids[2]);
+}
+
+TEST(ThreadPoolTest, SingleThreadRunsInline) {
+  ThreadPool pool(1);
+  ASSERT_EQ(pool.num_threads(), 1u);
+  std::thread::id id;
+  pool.run([&](size_t) { id = std::this_thread::get_id(); });
+  EXPECT_EQ(id, std::this_thread::get_id());
+}
+
+TEST(ThreadPoolTest, RethrowsWorkerExceptionsAfterEveryIndexFinishes) {
+  ThreadPool pool(4);
+  std::atomic<int> finished = 0;
+  auto fail_on_thread_2 = [&](size_t thread_idx) {
+    if (thread_idx == 2) {
+      throw std::runtime_error("worker failed");
+    }
+    finished++;
+  };
+  EXPECT_THROW(pool.run(fail_on_thread_2), std::runtime_error);
+  EXPECT_EQ(finished, 3);
+
+  // The pool is still usable afterwards
+  finished = 0;
+  pool.run([&](size_t) { finished++; });
+  EXPECT_EQ(finished, 4);
+}
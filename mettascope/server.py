@@ -161,6 +161,8 @@ def make_app(cfg: DictConfig):
         total_rewards = np.zeros(env.num_agents)
 
         async def send_replay_step():
+            # Every step sends every object as a full dict, so env.grid_objects is the cheapest source here. Building
+            # the same dicts in Python from env.grid_snapshot (as the replay writer's keys) is about 3x slower.
             grid_objects = []
             for i, grid_object in enumerate(env.grid_objects.values()):
                 if len(grid_objects) <= i:
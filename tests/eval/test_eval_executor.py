@@ -0,0 +1,56 @@
+import time
+
+from omegaconf import OmegaConf
+
+from metta.agent.mocks import MockPolicyRecord
+from metta.eval.eval_executor import EvalExecutor, EvalJob
+from metta.eval.eval_request_config import EvalResults, EvalRewardSummary
+from metta.sim.simulation_config import SimulationSuiteConfig
+
+
+def _fake_eval(job: EvalJob) -> EvalResults:
+    """Stands in for run_eval_job in the worker process. Epoch 1's evaluation is slower than epoch 2's."""
+    if job.policy_uri.endswith("1.pt"):
+        time.sleep(0.5)
+    if job.policy_uri.endswith("bad.pt"):
+        raise ValueError("bad policy")
+    return EvalResults(
+        scores=EvalRewardSummary(category_scores={"navigation": float(len(job.policy_uri))}),
+        replay_urls={"navigation/maze": [job.policy_uri + ".replay"]},
+    )
+
+
+def _submit(executor: EvalExecutor, epoch: int, uri: str) -> None:
+    executor.submit(
+        epoch=epoch,
+        agent_step=epoch * 100,
+        policy_record=MockPolicyRecord.from_key_and_version(uri, epoch),  # type: ignore[arg-type]
+        simulation_suite=SimulationSuiteConfig(name="test", num_episodes=1, simulations={}),
+        replay_dir=None,
+        stats_epoch_id=None,
+        wandb_policy_name=None,
+    )
+
+
+def test_results_arrive_in_submission_order_with_their_epochs():
+    cfg = OmegaConf.create({"device": "cpu", "run": "test_run"})
+    executor = EvalExecutor(cfg, num_workers=2, num_threads=1, run_job=_fake_eval)
+    try:
+        _submit(executor, 1, "file:///tmp/policy_1.pt")
+        _submit(executor, 2, "file:///tmp/policy_2.pt")
+        _submit(executor, 3, "file:///tmp/policy_bad.pt")
+
+        # Submitting doesn't wait for the evaluations
+        assert executor.num_pending == 3
+
+        completed = executor.wait()
+        assert [pending.epoch for pending in completed] == [1, 2, 3]
+        assert [pending.agent_step for pending in completed] == [100, 200, 300]
+        assert executor.num_pending == 0
+
+        results = completed[0].future.result()
+        assert results.scores.category_scores == {"navigation": float(len("file:///tmp/policy_1.pt"))}
+        assert results.replay_urls == {"navigation/maze": ["file:///tmp/policy_1.pt.replay"]}
+        assert isinstance(completed[2].future.exception(), ValueError)
+    finally:
+        executor.close()
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+import torch
+from torch import nn
+
+from metta.rl.async_checkpointer import AsyncCheckpointer, HostSnapshot
+
+
+def test_writes_run_in_order_in_the_background():
+    checkpointer = AsyncCheckpointer(max_pending=2)
+    gate = threading.Event()
+    written = []
+
+    checkpointer.submit("first", HostSnapshot(), lambda: (gate.wait(timeout=5), written.append("first")))
+    checkpointer.submit("second", HostSnapshot(), lambda: written.append("second"))
+
+    # Neither write blocked the caller
+    assert written == []
+    assert checkpointer.num_pending == 2
+
+    gate.set()
+    checkpointer.wait()
+    assert written == ["first", "second"]
+    assert checkpointer.num_pending == 0
+    checkpointer.close()
+
+
+def test_submit_waits_when_too_many_writes_are_pending():
+    checkpointer = AsyncCheckpointer(max_pending=1)
+    gate = threading.Event()
+    written = []
+
+    checkpointer.submit("first", HostSnapshot(), lambda: (gate.wait(timeout=5), written.append("first")))
+    threading.Timer(0.1, gate.set).start()
+    checkpointer.submit("second", HostSnapshot(), lambda: written.append("second"))
+
+    # The second submit had to wait for the first write
+    assert written[0] == "first"
+    checkpointer.close()
+    assert written == ["first", "second"]
+
+
+def test_synchronous_when_no_saves_may_be_pending():
+    checkpointer = AsyncCheckpointer(max_pending=0)
+    written = []
+    checkpointer.submit("only", HostSnapshot(), lambda: written.append(threading.current_thread()))
+    assert written == [threading.current_thread()]
+    checkpointer.close()
+
+
+def test_failed_write_raises_on_the_training_thread():
+    checkpointer = AsyncCheckpointer(max_pending=2)
+
+    def fail():
+        raise OSError("disk full")
+
+    checkpointer.submit("failing", HostSnapshot(), fail)
+    with pytest.raises(OSError, match="disk full"):
+        checkpointer.wait()
+    checkpointer.close()
+
+
+def test_module_snapshot_is_independent_of_the_original():
+    module = nn.Sequential(nn.Linear(3, 4), nn.BatchNorm1d(4))
+    module[0].weight.grad = torch.ones_like(module[0].weight)
+    weight = module[0].weight.detach().clone()
+    running_mean = module[1].running_mean.clone()
+
+    snapshot = HostSnapshot()
+    copy = snapshot.module(module)
+    snapshot.taken().wait()
+    with torch.no_grad():
+        module[0].weight.add_(1)
+        module[1].running_mean.add_(1)
+
+    assert type(copy) is nn.Sequential
+    assert isinstance(copy[0].weight, nn.Parameter)
+    assert copy[0].weight.grad is None
+    assert torch.equal(copy[0].weight, weight)
+    assert torch.equal(copy[1].running_mean, running_mean)
+
+
+def test_state_snapshot_copies_nested_tensors():
+    module = nn.Linear(3, 4)
+    optimizer = torch.optim.Adam(module.parameters())
+    module(torch.randn(2, 3)).sum().backward()
+    optimizer.step()
+
+    state = HostSnapshot().state(optimizer.state_dict())
+    optimizer.step()
+
+    exp_avg = state["state"][0]["exp_avg"]
+    assert exp_avg is not optimizer.state_dict()["state"][0]["exp_avg"]
+    assert not torch.equal(exp_avg, optimizer.state_dict()["state"][0]["exp_avg"])
+    assert state["param_groups"] == optimizer.state_dict()["param_groups"]
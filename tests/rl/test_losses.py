@@ -6,6 +6,7 @@ tracking and computing various loss metrics during training.
 """
 
 import pytest
+import torch
 
 from metta.rl.losses import Losses
 
@@ -125,3 +126,25 @@ class TestLosses:
         ]
         for key in expected_keys:
             assert key in stats
+
+    def test_accumulate(self):
+        """Test that accumulate sums tensor terms and counts minibatches."""
+        losses = Losses()
+
+        losses.accumulate(policy_loss=torch.tensor(1.0), approx_kl=torch.tensor(0.25))
+        losses.accumulate(policy_loss=torch.tensor(3.0), approx_kl=torch.tensor(0.75), entropy=torch.tensor([2.0]))
+
+        assert losses.minibatches_processed == 2
+        assert losses.policy_loss_sum == pytest.approx(4.0)
+        assert losses.approx_kl_sum == pytest.approx(1.0)
+
+        # Sums read before the next accumulate are refreshed afterwards
+        losses.accumulate(policy_loss=torch.tensor(2.0))
+        stats = losses.stats()
+        assert stats["policy_loss"] == pytest.approx(2.0)  # 6.0 / 3
+        assert stats["entropy"] == pytest.approx(2.0 / 3)
+        assert stats["value_loss"] == 0.0
+
+        losses.zero()
+        assert losses.policy_loss_sum == 0.0
+        assert losses.minibatches_processed == 0
@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+import pytest
+
+from metta.mettagrid.curriculum.core import SingleTaskCurriculum
+from metta.rl.vecenv import DoubleBufferedVecEnv, make_vecenv
+
+
+class FakeVecEnv:
+    """Serial-style vecenv whose send() steps its envs, recording which group stepped and when."""
+
+    def __init__(self, name: str, num_agents: int, log: list, step_gate: threading.Event | None = None):
+        self.name = name
+        self.num_agents = num_agents
+        self.agents_per_batch = num_agents
+        self.driver_env = object()
+        self.single_observation_space = None
+        self.single_action_space = None
+        self.log = log
+        self.step_gate = step_gate
+        self.steps = 0
+        self.seed = None
+        self.closed = False
+
+    def async_reset(self, seed):
+        self.seed = seed
+
+    def send(self, actions):
+        if self.step_gate is not None:
+            self.step_gate.wait(timeout=5)
+        self.steps += 1
+        self.log.append((self.name, int(actions[0, 0])))
+
+    def recv(self):
+        obs = np.full((self.num_agents, 1), self.steps)
+        zeros = np.zeros(self.num_agents)
+        return obs, zeros, zeros, zeros, [], np.arange(self.num_agents), np.ones(self.num_agents, dtype=bool)
+
+    def close(self):
+        self.closed = True
+
+
+def test_groups_alternate_with_offset_agent_ids():
+    log = []
+    vecenv = DoubleBufferedVecEnv([FakeVecEnv("a", 3, log), FakeVecEnv("b", 3, log)], envs_per_group=2)
+    assert vecenv.num_agents == 6
+    assert vecenv.agents_per_batch == 3
+
+    vecenv.async_reset(10)
+    assert [group.seed for group in vecenv.groups] == [10, 12]
+
+    env_ids = []
+    for step in range(4):
+        obs, _, _, _, _, env_id, _ = vecenv.recv()
+        env_ids.append(list(env_id))
+        assert obs[0, 0] == step // 2
+        vecenv.send(np.full((3, 2), step, dtype=np.int32))
+    # Wait for both groups' last steps.
+    vecenv.recv()
+    vecenv.send(np.zeros((3, 2), dtype=np.int32))
+    vecenv.recv()
+    vecenv.close()
+
+    assert env_ids == [[0, 1, 2], [3, 4, 5]] * 2
+    assert log[:4] == [("a", 0), ("b", 1), ("a", 2), ("b", 3)]
+    assert all(group.closed for group in vecenv.groups)
+
+
+def test_send_returns_before_the_group_steps():
+    log = []
+    gate = threading.Event()
+    vecenv = DoubleBufferedVecEnv([FakeVecEnv("a", 2, log, gate), FakeVecEnv("b", 2, log)], envs_per_group=1)
+    vecenv.async_reset(0)
+
+    vecenv.recv()
+    vecenv.send(np.zeros((2, 2), dtype=np.int32))
+    # Group "a" is still stepping, but group "b" is ready for the policy.
+    _, _, _, _, _, env_id, _ = vecenv.recv()
+    assert list(env_id) == [2, 3]
+    assert log == []
+
+    gate.set()
+    vecenv.send(np.zeros((2, 2), dtype=np.int32))
+    vecenv.recv()
+    assert log[0] == ("a", 0)
+    vecenv.close()
+
+
+def test_double_buffered_needs_even_envs():
+    curriculum = SingleTaskCurriculum("test", {})
+    with pytest.raises(ValueError, match="must be even"):
+        make_vecenv(curriculum, "serial", num_envs=3, double_buffered=True)
@@ -0,0 +1,129 @@
+import os
+import tempfile
+from pathlib import Path
+
+import hydra
+import pytest
+import torch
+from omegaconf import OmegaConf
+
+from metta.agent.mocks import MockAgent, MockPolicy
+from metta.agent.policy_metadata import PolicyMetadata
+from metta.agent.policy_record import PolicyRecord
+from metta.agent.policy_store import PolicyStore
+from metta.sim.simulation import SimulationCompatibilityError
+from metta.sim.simulation_config import SimulationSuiteConfig
+from metta.sim.simulation_stats_db import SimulationStatsDB
+from metta.sim.simulation_suite import SimulationSuite
+
+
+class ShardWritingSuite(SimulationSuite):
+    """Stands in for running each simulation by writing a one-simulation stats DB, and records where it ran."""
+
+    def _run_simulation(self, name: str) -> tuple[Path, list[str]]:
+        if "npc" in name:
+            raise SimulationCompatibilityError("NPC policy is incompatible")
+        path = Path(self._stats_dir) / f"{name.replace('/', '_')}.duckdb"
+        db = SimulationStatsDB(path)
+        db._insert_simulation(name, name, self.name, "env", *db.key_and_version(self._policy_pr))
+        db.close()
+        return path, [f"s3://replays/{name}/{os.getpid()}/{type(self._policy_pr.policy).__name__}"]
+
+
+def _make_suite(num_workers: int, stats_dir: str) -> ShardWritingSuite:
+    cfg = OmegaConf.create({"device": "cpu", "run": "test_run", "data_dir": stats_dir})
+    policy_store = PolicyStore(cfg, wandb_run=None)
+    policy_record = PolicyRecord(
+        policy_store, "test_policy", f"file://{stats_dir}/test_policy.pt", PolicyMetadata(epoch=3)
+    )
+    policy_record.policy = MockPolicy()
+    # Workers load the policy from its file
+    policy_store.save(policy_record)
+
+    config = SimulationSuiteConfig(
+        name="test_suite",
+        num_episodes=1,
+        num_workers=num_workers,
+        simulations={
+            "navigation/a": {"env": "env/a"},
+            "navigation/b": {"env": "env/b"},
+            "navigation/npc": {"env": "env/npc"},
+            "memory/c": {"env": "env/c"},
+        },
+    )
+    return ShardWritingSuite(
+        config=config,
+        policy_pr=policy_record,
+        policy_store=policy_store,
+        device=torch.device("cpu"),
+        vectorization="serial",
+        stats_dir=stats_dir,
+    )
+
+
+def test_workers_are_not_sent_the_cached_policy():
+    with tempfile.TemporaryDirectory() as stats_dir:
+        suite = _make_suite(2, stats_dir)
+        _ = suite._policy_pr.policy
+        state = suite.__getstate__()
+        assert state["_policy_pr"]._cached_policy is None
+        assert state["_policy_pr"].uri == suite._policy_pr.uri
+        assert suite._policy_pr._cached_policy is not None
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_simulations_merge_into_one_stats_db(num_workers):
+    with tempfile.TemporaryDirectory() as stats_dir:
+        results = _make_suite(num_workers, stats_dir).simulate()
+
+        simulations = results.stats_db.query("SELECT name FROM simulations ORDER BY name")["name"].tolist()
+        assert simulations == ["memory/c", "navigation/a", "navigation/b"]
+
+        # The NPC-incompatible simulation is skipped, and the rest keep their config order
+        assert results.replay_urls is not None
+        assert list(results.replay_urls.keys()) == ["navigation/a", "navigation/b", "memory/c"]
+
+        pids = set()
+        for urls in results.replay_urls.values():
+            _, pid, policy_class = urls[0].rsplit("/", 2)
+            pids.add(int(pid))
+            assert policy_class == "MockPolicy"
+        if num_workers == 1:
+            assert pids == {os.getpid()}
+        else:
+            assert os.getpid() not in pids
+        results.stats_db.close()
+
+
+def test_workers_run_real_simulations():
+    with tempfile.TemporaryDirectory() as stats_dir, hydra.initialize(config_path="../../configs", version_base=None):
+        cfg = OmegaConf.create({"device": "cpu", "run": "test_run", "data_dir": stats_dir})
+        policy_store = PolicyStore(cfg, wandb_run=None)
+        policy_record = PolicyRecord(
+            policy_store, "test_policy", f"file://{stats_dir}/test_policy.pt", PolicyMetadata(epoch=3)
+        )
+        policy_record.policy = MockAgent()
+        policy_store.save(policy_record)
+
+        config = SimulationSuiteConfig(
+            name="test_suite",
+            num_episodes=2,
+            num_workers=2,
+            env_overrides={"game": {"max_steps": 5}},
+            simulations={"debug/a": {"env": "env/mettagrid/debug"}, "debug/b": {"env": "env/mettagrid/debug"}},
+        )
+        suite = SimulationSuite(
+            config=config,
+            policy_pr=policy_record,
+            policy_store=policy_store,
+            device=torch.device("cpu"),
+            vectorization="multiprocessing",
+            stats_dir=stats_dir,
+        )
+        results = suite.simulate()
+
+        episodes = results.stats_db.query(
+            "SELECT s.name, COUNT(*) AS n FROM episodes e JOIN simulations s ON e.simulation_id = s.id GROUP BY s.name"
+        )
+        assert dict(zip(episodes["name"], episodes["n"], strict=True)) == {"debug/a": 2, "debug/b": 2}
+        results.stats_db.close()
@@ -23,6 +23,7 @@ from omegaconf import DictConfig, OmegaConf
 
 from metta.agent.policy_store import PolicyStore
 from metta.app_backend.stats_client import StatsClient
+from metta.common.profiling.stopwatch import Stopwatch
 from metta.common.util.config import Config
 from metta.common.util.stats_client_cfg import get_stats_client
 from metta.eval.eval_service import evaluate_policy
@@ -64,22 +65,19 @@ def _determine_run_name(policy_uri: str) -> str:
 # --------------------------------------------------------------------------- #
 
 
-def main(cfg: DictConfig) -> None:
-    logger = logging.getLogger("tools.sim")
-    if not cfg.get("run"):
-        cfg.run = _determine_run_name(cfg.policy_uri)
-        logger.info(f"Auto-generated run name: {cfg.run}")
-
-    logger.info(f"Sim job config:\n{OmegaConf.to_yaml(cfg, resolve=True)}")
+def run_sim_job(
+    cfg: DictConfig,
+    policy_store: PolicyStore,
+    stats_client: StatsClient | None,
+    logger: logging.Logger,
+    timer: Stopwatch | None = None,
+) -> dict:
+    """Evaluates each policy of `cfg.sim_job`, and returns their results. Times the "policy" and "evaluate" phases."""
+    timer = timer or Stopwatch(logger)
     sim_job = SimJob(cfg.sim_job)
 
     all_results = {"simulation_suite": sim_job.simulation_suite.name, "policies": []}
 
-    policy_store = PolicyStore(cfg, None)
-    stats_client: StatsClient | None = get_stats_client(cfg, logger)
-    if stats_client is not None:
-        stats_client.validate_authenticated()
-
     device = torch.device(cfg.device)
 
     # Get eval_task_id from config if provided
@@ -89,22 +87,24 @@ def main(cfg: DictConfig) -> None:
     for policy_uri in sim_job.policy_uris:
         # TODO: institutionalize this better?
         metric = sim_job.simulation_suite.name + "_score"
-        policy_prs = policy_store.policy_records(policy_uri, sim_job.selector_type, n=1, metric=metric)
+        with timer("policy"):
+            policy_prs = policy_store.policy_records(policy_uri, sim_job.selector_type, n=1, metric=metric)
         results = {"policy_uri": policy_uri, "checkpoints": []}
         for pr in policy_prs:
-            policy_results = evaluate_policy(
-                policy_record=pr,
-                simulation_suite=sim_job.simulation_suite,
-                stats_dir=sim_job.stats_dir,
-                replay_dir=f"{sim_job.replay_dir}/{pr.run_name}",
-                device=device,
-                vectorization=cfg.vectorization,
-                export_stats_db_uri=sim_job.stats_db_uri,
-                policy_store=policy_store,
-                stats_client=stats_client,
-                logger=logger,
-                eval_task_id=eval_task_id,
-            )
+            with timer("evaluate"):
+                policy_results = evaluate_policy(
+                    policy_record=pr,
+                    simulation_suite=sim_job.simulation_suite,
+                    stats_dir=sim_job.stats_dir,
+                    replay_dir=f"{sim_job.replay_dir}/{pr.run_name}",
+                    device=device,
+                    vectorization=cfg.vectorization,
+                    export_stats_db_uri=sim_job.stats_db_uri,
+                    policy_store=policy_store,
+                    stats_client=stats_client,
+                    logger=logger,
+                    eval_task_id=eval_task_id,
+                )
             results["checkpoints"].append(
                 {
                     "name": pr.run_name,
@@ -120,6 +120,23 @@ def main(cfg: DictConfig) -> None:
                 }
             )
         all_results["policies"].append(results)
+    return all_results
+
+
+def main(cfg: DictConfig) -> None:
+    logger = logging.getLogger("tools.sim")
+    if not cfg.get("run"):
+        cfg.run = _determine_run_name(cfg.policy_uri)
+        logger.info(f"Auto-generated run name: {cfg.run}")
+
+    logger.info(f"Sim job config:\n{OmegaConf.to_yaml(cfg, resolve=True)}")
+
+    policy_store = PolicyStore(cfg, None)
+    stats_client: StatsClient | None = get_stats_client(cfg, logger)
+    if stats_client is not None:
+        stats_client.validate_authenticated()
+
+    all_results = run_sim_job(cfg, policy_store, stats_client, logger)
 
     # Always output JSON results to stdout
     # Ensure all logging is flushed before printing JSON
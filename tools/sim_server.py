@@ -0,0 +1,112 @@
+#!/usr/bin/env -S uv run
+"""
+Long-lived simulation server for eval task workers.
+
+Runs the same job as tools/sim.py, but for many tasks in one process, so that each task doesn't pay for interpreter
+startup, imports, hydra setup and policy downloads again.
+
+ ▸ Reads one JSON request per line on stdin: {"id": ..., "overrides": [...]}, with the overrides tools/sim.py would
+   be run with
+ ▸ Writes one JSON response per line on stdout: {"id", "ok", "results", "error", "timings", "exiting"}, after a
+   {"ready": true, "timings": ...} line once it's set up. Logs go to stderr
+ ▸ Keeps its policy store (and its policy cache) and stats client across tasks
+ ▸ Exits when stdin closes, or after a task runs out of memory
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+
+_start_time = time.time()
+
+# Responses get stdout to themselves; everything else printed, imports included, goes to stderr
+_responses = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+import hydra  # noqa: E402
+from omegaconf import DictConfig, OmegaConf  # noqa: E402
+
+from metta.agent.policy_store import PolicyStore  # noqa: E402
+from metta.app_backend.stats_client import StatsClient  # noqa: E402
+from metta.common.profiling.stopwatch import Stopwatch  # noqa: E402
+from metta.common.util.fs import get_repo_root  # noqa: E402
+from metta.common.util.logging_helpers import init_logging  # noqa: E402
+from metta.common.util.resolvers import register_resolvers  # noqa: E402
+from metta.common.util.stats_client_cfg import get_stats_client  # noqa: E402
+from metta.util.init.mettagrid_environment import init_mettagrid_environment  # noqa: E402
+from tools.sim import _determine_run_name, run_sim_job  # noqa: E402
+
+logger = logging.getLogger("tools.sim_server")
+
+
+class SimServer:
+    def __init__(self):
+        self._policy_store: PolicyStore | None = None
+        self._stats_client: StatsClient | None = None
+
+    def _compose(self, overrides: list[str]) -> DictConfig:
+        cfg = hydra.compose(config_name="sim_job", overrides=overrides)
+        if not cfg.get("run"):
+            cfg.run = _determine_run_name(cfg.policy_uri)
+        if cfg.get("run_dir"):
+            os.makedirs(cfg.run_dir, exist_ok=True)
+        init_mettagrid_environment(cfg)
+        return cfg
+
+    def run_task(self, overrides: list[str], timer: Stopwatch) -> dict:
+        with timer("compose"):
+            cfg = self._compose(overrides)
+        logger.info(f"Sim job config:\n{OmegaConf.to_yaml(cfg, resolve=True)}")
+
+        # Every task of a worker runs with the same device, data dir and stats server, so these are built once
+        if self._policy_store is None:
+            self._policy_store = PolicyStore(cfg, None)
+            self._stats_client = get_stats_client(cfg, logger)
+            if self._stats_client is not None:
+                self._stats_client.validate_authenticated()
+
+        return run_sim_job(cfg, self._policy_store, self._stats_client, logger, timer)
+
+
+def main() -> None:
+    init_logging()
+    register_resolvers()
+
+    def respond(response: dict) -> None:
+        _responses.write(json.dumps(response) + "\n")
+
+    server = SimServer()
+    with hydra.initialize_config_dir(config_dir=str(get_repo_root() / "configs"), version_base=None):
+        respond({"ready": True, "timings": {"startup": time.time() - _start_time}})
+
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            timer = Stopwatch(logger)
+            response = {"id": request["id"], "ok": True, "results": None, "error": None}
+            out_of_memory = False
+            try:
+                with timer("total"):
+                    response["results"] = server.run_task(request["overrides"], timer)
+            except Exception as e:
+                out_of_memory = isinstance(e, MemoryError)
+                logger.error(f"Task {request['id']} failed: {e}", exc_info=True)
+                response.update(ok=False, error="".join(traceback.format_exception_only(e)).strip())
+            response["timings"] = timer.get_all_elapsed()
+            response["exiting"] = out_of_memory
+            respond(response)
+
+            if out_of_memory:
+                # The process may be left in a bad state, so have the worker start a fresh one
+                logger.error("Exiting after running out of memory")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()